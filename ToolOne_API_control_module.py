@@ -1,14 +1,564 @@
+import atexit
+import concurrent.futures
+import copy
+import functools
 import logging
-import psutil
+import logging.handlers
 import os
-from win32com.client import Dispatch
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from ToolOne_applications import application_fingerprint, prefetch_application
+from ToolOne_planner import APPLICATION_STATE_PAUSED, APPLICATION_STATE_RUNNING, APPLICATION_STATE_UNLOADED, \
+    CALIBRATION_STATE_OFFLINE, CALIBRATION_STATE_ONLINE, DesiredState, RecorderSettings, ToolOneState, \
+    plan_transition, read_state
+from ToolOne_metrics import InstrumentedComObject, metrics
+from ToolOne_signals import SignalCatalog, SignalSet
 
 # this variable is used for local module only.
 # On the project level,
 logger = logging.getLogger(__name__)
 
-# list of signals to record during scenario test generation
-signals_to_record = []
+# result of ToolOneControl.set_signals_to_record
+SignalRegistrationSummary = namedtuple("SignalRegistrationSummary", ["added", "removed", "unchanged"])
+
+# tool state read in one pass by ToolOneControl.snapshot(); timestamp is time.monotonic() of the read
+ToolOneSnapshot = namedtuple("ToolOneSnapshot", ["project_name", "project_path", "experiment_name", "application_name",
+                                                 "application_state", "calibration_state", "is_measuring",
+                                                 "timestamp"])
+
+# polling interval bounds of the wait_for_* methods [s]
+WAIT_MIN_INTERVAL = 0.01
+WAIT_MAX_INTERVAL = 1.0
+
+# format of the log records written by logger_setup()
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(funcName)s - %(message)s"
+# handlers added to the root logger by logger_setup(), handlers to close on logger_shutdown(), and the background
+# writer of the asynchronous mode
+_log_handlers = []
+_log_closables = []
+_log_listener = None
+
+# platform selector of the platform operations addressing every platform of the active experiment
+ALL_PLATFORMS = "all"
+# outcome of a platform operation on one of several platforms: index and name of the platform, return value of the
+# operation or None, the exception it raised or None, duration [s]
+PlatformResult = namedtuple("PlatformResult", ["index", "name", "result", "error", "duration"])
+# worker threads running platform operations concurrently
+PLATFORM_WORKERS = 8
+
+# connect modes of ToolOneControl
+CONNECT_NOW = "now"
+CONNECT_BACKGROUND = "background"
+CONNECT_LAZY = "lazy"
+
+# result of ToolOneControl.open_session(): SignalCatalog of the experiment (None without catalog), signals of the
+# signal file missing in the catalog, and dict phase -> duration [s] of the startup
+SessionInfo = namedtuple("SessionInfo", ["catalog", "unknown_signals", "timings"])
+
+# chunk duration of a size-based recording rotation until the data rate of the first chunk is known [s]
+ROTATION_INITIAL_DURATION = 60.0
+
+# COM ProgID of the ToolOne automation server
+TOOLONE_PROG_ID = "ToolOneNG.Application"
+# executable name of the ToolOne automation server process
+TOOLONE_PROCESS_NAME = "ToolOne.exe"
+# public methods without watchdog deadline: no COM calls, or with a timeout of their own
+_UNGUARDED_METHODS = ("invalidate_handle_cache", "invalidate_snapshot", "handle_cache_statistics", "discard_standby",
+                      "prefetch_application", "wait_for_calibration_state", "wait_for_measurement_stopped",
+                      "wait_for_application_state", "wait_for_recording_file", "get_recording_manifest")
+
+
+def dispatch_ToolOne():
+    """ Default backend of ToolOneControl: connects to the ToolOne automation server over COM.
+    win32com is imported here so the module can be used with other backends (e.g. ToolOne_simulator) off Windows.
+    :return: ToolOne application object
+    """
+    from win32com.client import Dispatch
+    return Dispatch(TOOLONE_PROG_ID)
+
+
+def dispatch_new_ToolOne():
+    """ Backend starting a separate ToolOne process instead of attaching to a running one, used when several
+    ToolOneControl objects must not share one ToolOne (e.g. ToolOne_pool workers).
+    :return: ToolOne application object
+    """
+    from win32com.client import DispatchEx
+    return DispatchEx(TOOLONE_PROG_ID)
+
+
+def _com_initialize():
+    """ Initializer of worker threads: enters a single-threaded COM apartment (no-op without pywin32) """
+    try:
+        import pythoncom
+    except ImportError:
+        return
+    pythoncom.CoInitializeEx(pythoncom.COINIT_APARTMENTTHREADED)
+
+
+def _com_uninitialize():
+    try:
+        import pythoncom
+    except ImportError:
+        return
+    pythoncom.CoUninitialize()
+
+
+class _MarshaledInstance(object):
+    """ COM stream carrying a ToolOne object from the thread that created it to another apartment """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+
+def _marshal(instance):
+    """ Prepares a COM object to be used by another thread; other backends are passed on unchanged """
+    if isinstance(instance, InstrumentedComObject):
+        instance = instance._target
+    if not hasattr(instance, "_oleobj_"):
+        return instance
+    import pythoncom
+    return _MarshaledInstance(pythoncom.CoMarshalInterThreadInterfaceInStream(pythoncom.IID_IDispatch,
+                                                                              instance._oleobj_))
+
+
+def _unmarshal(marshaled):
+    """ Counterpart of _marshal() in the receiving thread, the stream can only be unmarshaled once """
+    if not isinstance(marshaled, _MarshaledInstance):
+        return marshaled
+    import pythoncom
+    from win32com.client import Dispatch
+    return Dispatch(pythoncom.CoGetInterfaceAndReleaseStream(marshaled.stream, pythoncom.IID_IDispatch))
+
+
+class PlatformOperationError(Exception):
+    """
+    Raised when an operation on several platforms failed on at least one of them, after all platforms completed.
+
+    Args:
+        message: description of the failure
+        results: list of PlatformResult of all selected platforms
+    """
+
+    def __init__(self, message, results):
+        Exception.__init__(self, message)
+        self.results = results
+
+
+def _platform_call(get_application, operation):
+    """ Runs operation on the real-time application (None when no application is loaded) of one platform
+    :return: (result, exception or None, duration [s])
+    """
+    start = time.perf_counter()
+    try:
+        return operation(get_application()), None, time.perf_counter() - start
+    except Exception as error:
+        return None, error, time.perf_counter() - start
+
+
+def _platform_call_in_thread(marshaled, index, operation):
+    """ Runs on a platform worker thread with its own proxy of the ToolOne object """
+    return _platform_call(lambda: _unmarshal(marshaled).ActiveExperiment.Platforms[index].RealTimeApplication,
+                          operation)
+
+
+class ToolOneHangError(TimeoutError):
+    """
+    Raised when a ToolOneControl method exceeded its deadline and the watchdog killed the hung ToolOne process. The
+    ToolOneControl is reconnected to a new ToolOne with the project and experiment reopened.
+    """
+
+
+def _dispatch_with_process_id(dispatch):
+    """ Calls the backend and finds the ToolOne process it started. The process id is asked from the main window of
+    the COM server. Where that is not possible, the ToolOne processes before and after the start are compared; a
+    process this call did not start is never taken, and with several new ToolOne processes (e.g. pool workers
+    starting at the same time) the id stays unknown rather than guessed.
+    :return: (ToolOne object, process id or None when it cannot be determined, e.g. without psutil)
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    before = set(psutil.pids()) if psutil is not None else None
+    instance = dispatch()
+    process_id = _server_process_id(instance)
+    if process_id is not None or psutil is None:
+        return instance, process_id
+    started = [pid for pid in set(psutil.pids()) - before if _is_ToolOne_process(psutil, pid)]
+    if len(started) != 1:
+        logger.warning("Could not determine the ToolOne process id, new ToolOne processes: %s", started)
+        return instance, None
+    return instance, started[0]
+
+
+def _server_process_id(instance):
+    """ Process id of the ToolOne COM server owning the main window, None without pywin32 or window handle """
+    try:
+        import win32process
+    except ImportError:
+        return None
+    try:
+        _, process_id = win32process.GetWindowThreadProcessId(int(instance.MainWindow.Handle))
+    except Exception:
+        logger.debug("Could not read the process id of the ToolOne main window", exc_info=True)
+        return None
+    return process_id or None
+
+
+def _is_ToolOne_process(psutil, pid):
+    try:
+        return psutil.Process(pid).name() == TOOLONE_PROCESS_NAME
+    except psutil.Error:
+        return False
+
+
+def _kill_process(pid):
+    """ Kills a ToolOne process by id, checking the name so a reused id of another process is not killed """
+    import psutil
+    try:
+        process = psutil.Process(pid)
+        if process.name() == TOOLONE_PROCESS_NAME:
+            process.kill()
+            process.wait(10)
+    except psutil.NoSuchProcess:
+        pass
+
+
+class _Watchdog(object):
+    """
+    Background thread calling expired(description) when an armed deadline passes before it is disarmed. One deadline
+    is armed at a time, ToolOneControl methods do not run concurrently. disarm() waits for a running expired() call,
+    because killing the hung process makes the guarded call fail before the kill has returned.
+    """
+
+    def __init__(self, expired):
+        self._expired = expired
+        self._condition = threading.Condition()
+        self._deadline = None
+        self._description = None
+        self._fired = False
+        # set while expired() runs
+        self._handling = False
+        self._thread = threading.Thread(target=self._run, name="ToolOne-watchdog", daemon=True)
+        self._thread.start()
+
+    def arm(self, timeout, description):
+        with self._condition:
+            self._deadline = time.monotonic() + timeout
+            self._description = description
+            self._fired = False
+            self._condition.notify()
+
+    def disarm(self):
+        """ returns True when the deadline expired before, after expired() has returned """
+        with self._condition:
+            self._deadline = None
+            while self._handling:
+                self._condition.wait()
+            return self._fired
+
+    def _run(self):
+        with self._condition:
+            while True:
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self._deadline = None
+                self._fired = True
+                self._handling = True
+                description = self._description
+                self._condition.release()
+                try:
+                    self._expired(description)
+                except Exception:
+                    logger.exception("Watchdog could not handle the expired deadline of %s", description)
+                finally:
+                    self._condition.acquire()
+                    self._handling = False
+                    self._condition.notify_all()
+
+
+def _guarded(method):
+    """ Runs a public ToolOneControl method under the watchdog deadline of the control (outermost calls only) """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def guarded(self, *args, **kwargs):
+        timeout = self.call_timeouts.get(name, self.call_timeout)
+        if timeout is None or self._guard_depth:
+            return method(self, *args, **kwargs)
+        watchdog = self._watchdog
+        if watchdog is None:
+            watchdog = self._watchdog = _Watchdog(self._deadline_expired)
+        self._guard_depth += 1
+        self._killed = False
+        watchdog.arm(timeout, name)
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as error:
+            if watchdog.disarm() and self._killed:
+                self._recover_from_hang(name, timeout, error)
+            raise
+        else:
+            if watchdog.disarm() and self._killed:
+                # the call returned, but ToolOne was killed meanwhile
+                self._recover_from_hang(name, timeout, None)
+            return result
+        finally:
+            self._guard_depth -= 1
+    return guarded
+
+
+def _start_ToolOne(dispatch, project=None, experiment=None):
+    """ Runs on the background COM thread: starts a hidden ToolOne process with the project and experiment open
+    :return: (marshaled ToolOne object, process id, dict phase -> duration [s])
+    """
+    timings = {}
+    start = time.perf_counter()
+    instance, process_id = _dispatch_with_process_id(dispatch)
+    instance.MainWindow.Visible = False
+    timings["connect"] = time.perf_counter() - start
+    if project is not None:
+        start = time.perf_counter()
+        instance.OpenProject(project)
+        timings["open_project"] = time.perf_counter() - start
+        if experiment is not None:
+            start = time.perf_counter()
+            instance.ActiveProject.Experiments[experiment].Activate()
+            timings["activate_experiment"] = time.perf_counter() - start
+    return _marshal(instance), process_id, timings
+
+
+def _quit_ToolOne(marshaled, save_changes=False):
+    """ Runs on the standby thread: stops the applications of a ToolOne process no longer in use and quits it """
+    try:
+        instance = _unmarshal(marshaled)
+        experiment = instance.ActiveExperiment
+        if experiment is not None:
+            for platform in experiment.Platforms:
+                application = platform.RealTimeApplication
+                if application is not None and application.State in (APPLICATION_STATE_RUNNING,
+                                                                      APPLICATION_STATE_PAUSED):
+                    application.Stop()
+        instance.Quit(save_changes)
+    except Exception:
+        logger.exception("Could not quit the previous ToolOne process")
+
+
+def _discard_standby(future):
+    """ Runs on the standby thread after the start of the standby: quits it """
+    try:
+        marshaled, _, _ = future.result()
+    except Exception:
+        return
+    _quit_ToolOne(marshaled)
+
+
+class _SignalReader(object):
+    """
+    Reads current values of signals from one ToolOne object, in one round-trip per platform when the variable
+    description provides the bulk ReadValues method, else one per signal. The variable of every signal is looked up
+    once. Like the ToolOne object, a reader is used by one thread only.
+    """
+
+    def __init__(self, instance):
+        self._instance = instance
+        # (variable description, its variables) of every platform with a loaded application
+        self._variable_descriptions = None
+        # signal path -> (variable description, variable) of the platform providing it
+        self._locations = {}
+        # id(variable description) -> whether it provides the bulk ReadValues method
+        self._bulk_reads = {}
+
+    def _locate(self, name):
+        location = self._locations.get(name)
+        if location is None:
+            if self._variable_descriptions is None:
+                self._variable_descriptions = []
+                for platform in self._instance.ActiveExperiment.Platforms:
+                    variable_description = platform.ActiveVariableDescription
+                    if variable_description is not None:
+                        self._variable_descriptions.append((variable_description, variable_description.Variables))
+            for variable_description, variables in self._variable_descriptions:
+                if variables.Contains(name):
+                    location = self._locations[name] = (variable_description, variables[name])
+                    break
+            else:
+                raise KeyError("Signal {} is not available in the active experiment".format(name))
+        return location
+
+    def read(self, names):
+        """ returns the current values of the signals, in the order of names """
+        locations = [self._locate(name) for name in names]
+        groups = {}
+        for position, (variable_description, _) in enumerate(locations):
+            groups.setdefault(id(variable_description), (variable_description, []))[1].append(position)
+        values = [None] * len(names)
+        for key, (variable_description, positions) in groups.items():
+            if key not in self._bulk_reads:
+                self._bulk_reads[key] = hasattr(variable_description, "ReadValues")
+            if self._bulk_reads[key]:
+                for position, value in zip(positions, variable_description.ReadValues([names[position]
+                                                                                      for position in positions])):
+                    values[position] = value
+            else:
+                for position in positions:
+                    values[position] = locations[position][1].Value
+        return values
+
+
+class _ParameterWriter(_SignalReader):
+    """
+    Writes calibration parameters, in one round-trip per platform when the variable description provides the bulk
+    WriteValues method, else one per parameter. The writer remembers the values it wrote, so writing an unchanged value
+    again is skipped, and the value every parameter had before its first write, so the parameters of an earlier
+    parameter set can be reset. It lives in the handle cache and is dropped together with the application, whose
+    parameters then have their initial values again.
+    """
+
+    def __init__(self, instance):
+        _SignalReader.__init__(self, instance)
+        # parameter path -> value last written (or read before writing) by this writer
+        self.values = {}
+        # parameter path -> value before the first write of this writer
+        self.defaults = {}
+        # previous values of the parameters changed by the last write(), see ToolOneControl.rollback_parameters()
+        self.rollback_values = None
+        # id(variable description) -> whether it provides the bulk WriteValues method
+        self._bulk_writes = {}
+
+    def _write(self, parameters):
+        groups = {}
+        for name, value in parameters.items():
+            variable_description, variable = self._locate(name)
+            groups.setdefault(id(variable_description), (variable_description, []))[1].append((name, variable, value))
+        for key, (variable_description, entries) in groups.items():
+            if key not in self._bulk_writes:
+                self._bulk_writes[key] = hasattr(variable_description, "WriteValues")
+            if self._bulk_writes[key]:
+                variable_description.WriteValues([name for name, _, _ in entries], [value for _, _, value in entries])
+            else:
+                for _, variable, value in entries:
+                    variable.Value = value
+
+    def write(self, parameters, atomic=True, force=False, reset_unlisted=False):
+        """ writes the changed parameters and returns their paths; atomic restores the previous values on a failure,
+        reset_unlisted writes the defaults of the parameters written before and missing in parameters """
+        parameters = dict(parameters)
+        if reset_unlisted:
+            for name, value in self.defaults.items():
+                parameters.setdefault(name, value)
+        unknown = [name for name in parameters if name not in self.values]
+        if unknown:
+            current = dict(zip(unknown, self.read(unknown)))
+            for name, value in current.items():
+                self.defaults.setdefault(name, value)
+            self.values.update(current)
+        changed = {name: value for name, value in parameters.items() if force or self.values[name] != value}
+        if not changed:
+            return []
+        previous = {name: self.values[name] for name in changed}
+        try:
+            self._write(changed)
+        except Exception:
+            # the parameters written before the failure are unknown until they are restored
+            for name in changed:
+                self.values.pop(name, None)
+            if atomic:
+                logger.warning("Restoring %s parameters after a failed write...", len(previous))
+                try:
+                    self._write(previous)
+                    self.values.update(previous)
+                except Exception:
+                    logger.exception("Could not restore the parameters")
+            raise
+        self.values.update(changed)
+        self.rollback_values = previous if atomic else None
+        return list(changed)
+
+
+class _RecordingRotation(object):
+    """
+    Rolls a recorder to a new file whenever the current chunk reached the maximum duration or (estimated from the
+    data rate of the previous chunk) the maximum size, on a thread with its own COM apartment, and hands every
+    completed chunk to a ChunkIndexer. A roll is a Stop() and Start() of the recorder; the samples between the two
+    round-trips are not recorded. The trigger started the first chunk, the following ones start immediately.
+    """
+
+    def __init__(self, instance, recorder_index, indexer, max_bytes=None, max_duration=None,
+                 overwrite_existing=False):
+        self.indexer = indexer
+        # OverwriteExisting of Recorder.Start() for every new chunk
+        self.overwrite_existing = overwrite_existing
+        # set when the last chunk was handed to the indexer
+        self.finished = False
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self.error = None
+        self._recorder_index = recorder_index
+        self._stopping = threading.Event()
+        # the COM object is marshaled in the apartment of the control and unmarshaled by the rotation thread
+        self._thread = threading.Thread(target=self._run, args=(_marshal(instance),), name="ToolOne-rotation",
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _run(self, marshaled):
+        # loaded by start_recording_rotation() already
+        from ToolOne_recording import open_recording
+        _com_initialize()
+        try:
+            instance = _unmarshal(marshaled)
+            measurement_data_management = instance.MeasurementDataManagement
+            recorder = measurement_data_management.Recorders[self._recorder_index]
+            chunk_duration = self.max_duration or ROTATION_INITIAL_DURATION
+            started = time.monotonic()
+            checked = False
+            while not self._stopping.wait(max(started + chunk_duration - time.monotonic(), 0.0)):
+                if not measurement_data_management.IsMeasuring:
+                    logger.info("Measurement stopped, ending the recording rotation")
+                    break
+                recorder.Stop()
+                # without trigger, waiting for it again would lose the data until it fires
+                recorder.Start(False, self.overwrite_existing)
+                rolled = time.monotonic()
+                chunk_paths = recorder.LastRecordedFiles
+                logger.debug("Rolled recorder %s after %.1f s", self._recorder_index, rolled - started)
+                if not checked:
+                    # a recording format without reader fails the rotation at the first chunk, not every chunk later
+                    for chunk_path in chunk_paths:
+                        open_recording(chunk_path).close()
+                    checked = True
+                for chunk_path in chunk_paths:
+                    self.indexer.add(chunk_path)
+                if self.max_bytes:
+                    size = sum(os.path.getsize(chunk_path) for chunk_path in chunk_paths
+                               if os.path.exists(chunk_path))
+                    if size:
+                        chunk_duration = self.max_bytes / (size / (rolled - started))
+                        if self.max_duration:
+                            chunk_duration = min(chunk_duration, self.max_duration)
+                started = rolled
+        except Exception as error:
+            self.error = error
+            logger.exception("Recording rotation failed")
+        finally:
+            _com_uninitialize()
+
+    def stop(self):
+        """ stops rolling; the current chunk is completed by the caller stopping the recorder """
+        self._stopping.set()
+        self._thread.join()
 
 
 class ToolOneControl(object):
@@ -17,20 +567,405 @@ class ToolOneControl(object):
 
     Args:
         window_visible:
+        dispatch: backend returning the ToolOne application object, called on every (re)start.
+            Defaults to dispatch_ToolOne, use ToolOne_simulator.SimulatedToolOne to run without ToolOne.
+        snapshot_ttl: time in seconds the state getters (online_calibration_state, is_running_measurement, ...) are
+            served from the last snapshot() instead of COM; 0 disables it
+        standby: keep a warm standby ToolOne process for restart_ToolOne(), see prepare_standby()
+        standby_dispatch: backend of the standby, defaults to dispatch_new_ToolOne
+        call_timeout: deadline in seconds of every public method, None for no deadline. A method exceeding it makes
+            the watchdog kill the ToolOne process; the control reconnects, reopens project and experiment and raises
+            ToolOneHangError.
+        call_timeouts: dict method name -> deadline overriding call_timeout, e.g. {"load_application_from_file": 300}
+        connect: CONNECT_NOW connects in the constructor, CONNECT_BACKGROUND starts ToolOne on a background thread and
+            CONNECT_LAZY on first use; see also open_session()
     """
 
-    def __init__(self, window_visible=True):
+    def __init__(self, window_visible=True, dispatch=None, snapshot_ttl=0.0, standby=False, standby_dispatch=None,
+                 call_timeout=None, call_timeouts=None, connect=CONNECT_NOW):
 
         logger.info("Connecting to ToolOne...")
-        self._instance = None
+        self._connected_instance = None
+        self._window_visible = window_visible
+        # process id of the ToolOne process, so a hung ToolOne can be killed without touching other processes
+        self._process_id = None
+        # project and experiment restored after a hung ToolOne was killed
+        self._session = (None, None)
+        # deadlines of the public methods, enforced by the watchdog thread, see _guarded()
+        self.call_timeout = call_timeout
+        self.call_timeouts = dict(call_timeouts or {})
+        self._watchdog = None
+        self._guard_depth = 0
+        self._killed = False
+        # resolved COM sub-objects, see _handle()
+        self._handle_cache = {}
+        self._handle_cache_hits = 0
+        self._handle_cache_misses = 0
+        self._dispatch = dispatch if dispatch is not None else dispatch_ToolOne
+        # latest ToolOneSnapshot, see snapshot()
+        self.snapshot_ttl = snapshot_ttl
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+        # set by ToolOne events to wake up wait_for_* calls, see _connect_events()
+        self._state_changed = threading.Event()
+        self._event_sinks = None
+        self._pump_messages = None
+        # warm ToolOne process swapped in by restart_ToolOne(), see prepare_standby(). Dispatch attaches to the
+        # running ToolOne, so the standby needs a backend starting a separate process.
+        self.standby = standby
+        self._standby_dispatch = standby_dispatch if standby_dispatch is not None else (
+            dispatch_new_ToolOne if self._dispatch is dispatch_ToolOne else self._dispatch)
+        self._standby = None
+        self._standby_session = (None, None)
+        # apartment-threaded thread starting ToolOne processes in the background and quitting replaced ones
+        self._com_executor = None
+        # runs operations on several platforms concurrently, see _on_platforms()
+        self._platform_executor = None
+        # background start of ToolOne, see _finish_connect(), and the project and experiment it opens
+        self._connect_future = None
+        self._connect_session = (None, None)
+        # dict phase -> duration [s] of the background start
+        self._startup_timings = {}
+        if connect == CONNECT_NOW:
+            try:
+                self._instance = self._connect()
+                self._instance.MainWindow.Visible = window_visible
+            except Exception:
+                logger.exception("Could not connect to ToolOne")
+                raise
+            if standby:
+                self._refresh_standby()
+        elif connect == CONNECT_BACKGROUND:
+            self._start_connect()
+        elif connect != CONNECT_LAZY:
+            raise ValueError("Unknown connect mode {}".format(connect))
+
+        self._recorder_index = 0
+        # WithTrigger and OverwriteExisting of the last recording start
+        self._recorder_start_arguments = (False, False)
+        # RecorderSettings of the running recording, None while the recorder is stopped. IsMeasuring does not tell,
+        # the measurement also runs without recording after start_measuring().
+        self._recorder_settings = None
+        # _RecordingRotation of the current or last recording, None when it is not rotated
+        self._recording_rotation = None
+        # platform index -> ApplicationFingerprint of the application loaded by load_application_from_file()
+        self._loaded_applications = {}
+        # signals to record during scenario test generation
+        self.signals = SignalSet()
+
+    @property
+    def _instance(self):
+        """ ToolOne application object; waits for the background start or connects on first use """
+        instance = self._connected_instance
+        if instance is None:
+            instance = self._finish_connect()
+        return instance
+
+    @_instance.setter
+    def _instance(self, instance):
+        self._connected_instance = instance
+
+    def _connect(self):
+        """ Starts the backend; with ToolOne_metrics enabled, every COM invocation on the returned object is timed """
+        instance, self._process_id = _dispatch_with_process_id(self._dispatch)
+        return self._wrap_instance(instance)
+
+    def _com_thread(self):
+        if self._com_executor is None:
+            self._com_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="ToolOne-background", initializer=_com_initialize)
+        return self._com_executor
+
+    def _start_connect(self, project=None, experiment=None):
+        """ Starts ToolOne on the background COM thread, opening project and experiment there """
+        logger.info("Starting ToolOne in the background...")
+        self._connect_session = (project, experiment)
+        self._connect_future = self._com_thread().submit(_start_ToolOne, self._dispatch, project, experiment)
+
+    def _finish_connect(self):
+        """ Connects on first use of a lazy control, or takes over the ToolOne started in the background """
+        future, self._connect_future = self._connect_future, None
         try:
-            self._instance = Dispatch("ToolOneNG.Application")
-            self._instance.MainWindow.Visible = window_visible
+            if future is None:
+                instance = self._connect()
+            else:
+                marshaled, self._process_id, self._startup_timings = future.result()
+                instance = self._wrap_instance(_unmarshal(marshaled))
+                self._session = self._connect_session
+            instance.MainWindow.Visible = self._window_visible
         except Exception:
             logger.exception("Could not connect to ToolOne")
             raise
+        self._connected_instance = instance
+        if self.standby:
+            self._refresh_standby()
+        return instance
+
+    def _kill_ToolOne(self):
+        """ Kills the ToolOne process of this control by its process id; False when the id is unknown """
+        if self._process_id is None:
+            logger.error("The ToolOne process id is unknown, ToolOne cannot be killed")
+            return False
+        logger.warning("Killing ToolOne process %s...", self._process_id)
+        _kill_process(self._process_id)
+        self._process_id = None
+        return True
+
+    def _deadline_expired(self, method_name):
+        """ Called on the watchdog thread when a method exceeded its deadline """
+        logger.error("%s exceeded its deadline, ToolOne is hung", method_name)
+        self._killed = self._kill_ToolOne()
+
+    def _recover_from_hang(self, method_name, timeout, error):
+        """ Connects to a new ToolOne after the hung one was killed, reopens project and experiment and raises
+        ToolOneHangError
+        """
+        self._killed = False
+        project, experiment = self._session
+        logger.info("Reconnecting to ToolOne after the hang of %s...", method_name)
+        self.invalidate_handle_cache()
+        self._loaded_applications.clear()
+        self._recorder_settings = None
+        standby = self._take_standby()
+        self._instance = self._wrap_instance(standby) if standby is not None else self._connect()
+        self._instance.MainWindow.Visible = self._window_visible
+        if project is not None:
+            self.open_project(project)
+            if experiment is not None:
+                self.activate_experiment(experiment)
+        if self.standby and self._standby is None:
+            self.prepare_standby(project, experiment)
+        raise ToolOneHangError("{} did not complete within {} s, ToolOne was killed and reconnected".format(
+            method_name, timeout)) from error
+
+    @staticmethod
+    def _wrap_instance(instance):
+        if metrics.enabled:
+            instance = InstrumentedComObject(instance, metrics, "Application")
+        return instance
+
+    def prepare_standby(self, project=None, experiment=None):
+        """ This function starts a second, hidden ToolOne process in the background and opens the project and
+        experiment in it, so the next restart_ToolOne() only swaps processes. A previous standby is quit. With
+        standby mode enabled, this is done automatically once an experiment is active (on construction or by
+        activate_experiment()) and after every restart.
+        :param project: project to open in the standby, defaults to the active project
+        :param experiment: experiment to activate in the standby, defaults to the active experiment
+        :return: None
+        """
+        logger.info("Preparing a standby ToolOne...")
+        try:
+            if project is None and self._instance.ActiveProject is not None:
+                project = self._instance.ActiveProject.FullPath
+                if experiment is None and self._instance.ActiveExperiment is not None:
+                    experiment = self._instance.ActiveExperiment.Name
+            self.discard_standby()
+            self._standby = self._com_thread().submit(_start_ToolOne, self._standby_dispatch, project, experiment)
+            self._standby_session = (project, experiment)
+        except Exception:
+            logger.exception("Could not prepare a standby ToolOne")
+            raise
 
-        self._recorder_index = 0
+    def discard_standby(self):
+        """ This function quits the standby ToolOne process in the background
+        :return: None
+        """
+        if self._standby is not None:
+            # a standby still queued behind another start is never started
+            if not self._standby.cancel():
+                self._com_thread().submit(_discard_standby, self._standby)
+            self._standby = None
+            self._standby_session = (None, None)
+
+    def _refresh_standby(self):
+        """ Prepares the standby for the active project and experiment unless it has them already. Nothing is prepared
+        before an experiment is active, so opening a session starts one standby, not one per intermediate step. """
+        project = self._instance.ActiveProject
+        experiment = self._instance.ActiveExperiment if project is not None else None
+        if experiment is None:
+            return
+        session = (project.FullPath, experiment.Name)
+        if self._standby is None or self._standby_session != session:
+            self.prepare_standby(*session)
+
+    def _take_standby(self):
+        """ Waits until the standby is started and returns its ToolOne object, None without (working) standby """
+        future, self._standby = self._standby, None
+        if future is None:
+            return None
+        try:
+            marshaled, process_id, _ = future.result()
+            instance = _unmarshal(marshaled)
+        except Exception:
+            logger.exception("The standby ToolOne could not be started, restarting ToolOne instead")
+            return None
+        self._process_id = process_id
+        return instance
+
+    def _handle(self, key, resolve):
+        """ Returns the COM sub-object cached under key, walking the property chain with resolve() on a miss.
+        Every hop of a chain like MeasurementDataManagement.Recorders[0] is a cross-process round-trip, so the
+        objects are resolved once and reused until the object model is rebuilt (see invalidate_handle_cache).
+        None is never cached, because it usually means "not loaded yet".
+        :param key: cache key of the sub-object
+        :param resolve: callable walking the COM property chain
+        :return: COM object
+        """
+        try:
+            handle = self._handle_cache[key]
+        except KeyError:
+            self._handle_cache_misses += 1
+            handle = resolve()
+            if handle is not None:
+                self._handle_cache[key] = handle
+            return handle
+        self._handle_cache_hits += 1
+        return handle
+
+    def invalidate_handle_cache(self):
+        """ This function drops all cached COM sub-objects. It is called by every method which replaces parts of the
+        ToolOne object model (project, experiment, application or the ToolOne process itself).
+        :return: None
+        """
+        logger.debug("Invalidating %s cached COM handles", len(self._handle_cache))
+        self._handle_cache.clear()
+        self._snapshot = None
+        # the event subscriptions belong to the dropped objects
+        self._event_sinks = None
+
+    def invalidate_snapshot(self):
+        """ This function drops the cached snapshot, so the next state getter reads ToolOne again. It is called by
+        every method changing the tool state.
+        :return: None
+        """
+        self._snapshot = None
+
+    def snapshot(self, max_age=None):
+        """ This function reads the whole tool state (project, experiment, application, calibration and measurement)
+        in one pass into an immutable ToolOneSnapshot. Concurrent callers share one read.
+        :param max_age: return the cached snapshot if it is younger than max_age seconds; None always reads ToolOne
+        :return: ToolOneSnapshot
+        """
+        snapshot = self._snapshot
+        if max_age is not None and snapshot is not None and time.monotonic() - snapshot.timestamp < max_age:
+            return snapshot
+        requested = time.monotonic()
+        with self._snapshot_lock:
+            snapshot = self._snapshot
+            # another thread read ToolOne while this one waited for the lock
+            if snapshot is not None and snapshot.timestamp >= requested:
+                return snapshot
+            logger.debug("Reading ToolOne state snapshot...")
+            try:
+                project = self._instance.ActiveProject
+                experiment = self._instance.ActiveExperiment if project is not None else None
+                application = self._real_time_application(0) if experiment is not None else None
+                snapshot = ToolOneSnapshot(
+                    project_name=project.Name if project is not None else None,
+                    project_path=project.FullPath if project is not None else None,
+                    experiment_name=experiment.Name if experiment is not None else None,
+                    application_name=application.Name if application is not None else None,
+                    application_state=application.State if application is not None else APPLICATION_STATE_UNLOADED,
+                    calibration_state=self._calibration_management().State,
+                    is_measuring=self._measurement_data_management().IsMeasuring,
+                    timestamp=time.monotonic())
+            except Exception:
+                logger.exception("Could not read the ToolOne state snapshot")
+                raise
+            self._snapshot = snapshot
+        return snapshot
+
+    def _cached_state(self):
+        """ snapshot serving the state getters, None when snapshot_ttl is disabled """
+        if self.snapshot_ttl <= 0:
+            return None
+        return self.snapshot(max_age=self.snapshot_ttl)
+
+    def handle_cache_statistics(self):
+        """ This function returns the hit/miss counters of the COM handle cache. Every hit is a saved COM round-trip
+        chain.
+        :return: dict with the keys hits, misses and cached_handles
+        """
+        return {"hits": self._handle_cache_hits,
+                "misses": self._handle_cache_misses,
+                "cached_handles": len(self._handle_cache)}
+
+    def _measurement_data_management(self):
+        return self._handle("MeasurementDataManagement", lambda: self._instance.MeasurementDataManagement)
+
+    def _calibration_management(self):
+        return self._handle("CalibrationManagement", lambda: self._instance.CalibrationManagement)
+
+    def _recorder(self):
+        return self._handle(("Recorder", self._recorder_index),
+                            lambda: self._measurement_data_management().Recorders[self._recorder_index])
+
+    def _recorder_signals(self):
+        return self._handle(("RecorderSignals", self._recorder_index), lambda: self._recorder().Signals)
+
+    def _signal_configuration(self):
+        return self._handle("SignalConfiguration",
+                            lambda: self._measurement_data_management().MeasurementConfiguration.Signals)
+
+    def _platform(self, index=0):
+        return self._handle(("Platform", index), lambda: self._instance.PlatformManagement.Platforms[index])
+
+    def _experiment_platform(self, index=0):
+        return self._handle(("ExperimentPlatform", index), lambda: self._instance.ActiveExperiment.Platforms[index])
+
+    def _real_time_application(self, index=0):
+        return self._handle(("RealTimeApplication", index),
+                            lambda: self._experiment_platform(index).RealTimeApplication)
+
+    def _platform_names(self):
+        return self._handle(("PlatformNames",),
+                            lambda: [platform.Name for platform in self._instance.ActiveExperiment.Platforms])
+
+    def _platform_indices(self, platform):
+        """ Resolves a platform selector: index, name, ALL_PLATFORMS or an iterable of indices and names """
+        if isinstance(platform, int):
+            return [platform]
+        names = self._platform_names()
+        if platform == ALL_PLATFORMS:
+            return list(range(len(names)))
+        indices = []
+        for selector in [platform] if isinstance(platform, str) else platform:
+            if isinstance(selector, int):
+                indices.append(selector)
+            elif selector in names:
+                indices.append(names.index(selector))
+            else:
+                raise ValueError("Unknown platform {}, the experiment has {}".format(selector, ", ".join(names)))
+        return indices
+
+    def _on_platforms(self, platform, operation, parallel=True):
+        """ Runs operation(real-time application or None) on the selected platforms. For a single index or name the
+        result of the operation is returned. Several platforms run concurrently on worker threads, each with its own
+        proxy of the ToolOne object, and a list of PlatformResult is returned; PlatformOperationError is raised when
+        the operation failed on one of them.
+        """
+        indices = self._platform_indices(platform)
+        if isinstance(platform, (int, str)) and platform != ALL_PLATFORMS:
+            return operation(self._real_time_application(indices[0]))
+
+        if parallel and len(indices) > 1:
+            if self._platform_executor is None:
+                self._platform_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=PLATFORM_WORKERS, thread_name_prefix="ToolOne-platform", initializer=_com_initialize)
+            futures = [self._platform_executor.submit(_platform_call_in_thread, _marshal(self._instance), index,
+                                                      operation) for index in indices]
+            outcomes = [future.result() for future in futures]
+        else:
+            outcomes = [_platform_call(lambda: self._real_time_application(index), operation) for index in indices]
+        names = self._platform_names()
+        results = [PlatformResult(index, names[index] if index < len(names) else None, result, error, duration)
+                   for index, (result, error, duration) in zip(indices, outcomes)]
+        failed = [result for result in results if result.error is not None]
+        if failed:
+            raise PlatformOperationError("Failed on {} of {} platforms: {}".format(
+                len(failed), len(results), "; ".join("{}: {}".format(result.name, result.error) for result in failed)),
+                results)
+        return results
 
     def open_project(self, file_path):
         """
@@ -41,17 +976,28 @@ class ToolOneControl(object):
         Returns:
 
         """
-        logger.info("Opening project {}...".format(file_path))
+        logger.info("Opening project %s...", file_path)
         try:
             if self._instance.ActiveProject is None:
+                self.invalidate_handle_cache()
+                self._loaded_applications.clear()
+                self._recorder_settings = None
                 self._instance.OpenProject(file_path)
             else:
                 current_open_project = self._instance.ActiveProject.FullPath
                 # check if the same project is already open to avoid opening it again
                 if current_open_project != file_path:
+                    self.invalidate_handle_cache()
+                    self._loaded_applications.clear()
+                    self._recorder_settings = None
                     self._instance.OpenProject(file_path)
+            if self._session[0] != file_path:
+                self._session = (file_path, None)
+            # a standby of another project must not be swapped in, activate_experiment() prepares the new one
+            if self._standby_session[0] != file_path:
+                self.discard_standby()
         except Exception:
-            logger.exception("Could not open project {}".format(file_path))
+            logger.exception("Could not open project %s", file_path)
             raise
 
     def activate_experiment(self, experiment_name):
@@ -63,21 +1009,85 @@ class ToolOneControl(object):
         Returns: None
 
         """
-        logger.info("Activating experiment {}...".format(experiment_name))
+        logger.info("Activating experiment %s...", experiment_name)
         try:
             if self._instance.ActiveExperiment is None:
+                self.invalidate_handle_cache()
+                self._loaded_applications.clear()
+                self._recorder_settings = None
                 self._instance.ActiveProject.Experiments[experiment_name].Activate()
             else:
                 current_experiment = self._instance.ActiveExperiment.Name
                 # check if the same experiment is already activated to avoid activating it again
                 if current_experiment != experiment_name:
+                    self.invalidate_handle_cache()
+                    self._loaded_applications.clear()
+                    self._recorder_settings = None
                     self._instance.ActiveProject.Experiments[experiment_name].Activate()
                 else:
-                    logger.info("Experiment is already activated {}... ".format(experiment_name))
+                    logger.info("Experiment is already activated %s... ", experiment_name)
+            self._session = (self._session[0], experiment_name)
+            if self.standby:
+                self._refresh_standby()
         except Exception:
-            logger.exception("Could not activate experiment {}".format(experiment_name))
+            logger.exception("Could not activate experiment %s", experiment_name)
             raise
 
+    def open_session(self, project, experiment, application=None, signal_file=None, use_catalog=False,
+                     cache_dir=None):
+        """ This function brings up a ToolOne session: project and experiment open, the application loaded and the
+        signals of the signal file in self.signals. When ToolOne is not connected yet, it is started in the background
+        with project and experiment, while this thread parses the signal file, hashes the application and loads the
+        cached signal catalog.
+        :param project: ToolOne project path
+        :param experiment: experiment name
+        :param application: path of the application to load on platform 0
+        :param signal_file: signal file with the signals to record
+        :param use_catalog: resolve the signal file against the SignalCatalog of the experiment, see signal_catalog()
+        :param cache_dir: cache directory of the signal catalog
+        :return: SessionInfo with the per-phase timings
+        """
+        logger.info("Opening session %s / %s...", project, experiment)
+        timings = {}
+        started = time.perf_counter()
+
+        def timed(phase, function, *args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+        try:
+            if self._connected_instance is None and self._connect_future is None:
+                self._start_connect(project, experiment)
+            fingerprint = timed("hash_application", application_fingerprint, application) \
+                if application is not None else None
+            signals = timed("parse_signals", SignalSet.from_file, signal_file) if signal_file is not None else None
+            # the cached catalog belongs to the application build, without application it is built after loading
+            catalog = timed("load_catalog", SignalCatalog.load_cached, project, experiment, cache_dir,
+                            ["0:{}".format(fingerprint.sha256)]) if use_catalog and fingerprint is not None else None
+
+            timed("wait_for_ToolOne", lambda: self._instance)
+            timings.update(("background_" + phase, duration) for phase, duration in self._startup_timings.items())
+            timed("open_project", self.open_project, project)
+            timed("activate_experiment", self.activate_experiment, experiment)
+            if application is not None:
+                timed("load_application", self.load_application_from_file, application)
+            if use_catalog and catalog is None:
+                catalog = timed("build_catalog", self.signal_catalog, project, experiment, cache_dir)
+            unknown = []
+            if signals is not None:
+                if catalog is not None:
+                    signals, unknown = timed("resolve_signals", catalog.resolve, signals)
+                self.signals = signals
+        except Exception:
+            logger.exception("Could not open session %s / %s", project, experiment)
+            raise
+        timings["total"] = time.perf_counter() - started
+        logger.info("Session ready in %.2f s: %s", timings["total"],
+                    ", ".join("{} {:.3f} s".format(phase, duration) for phase, duration in timings.items()))
+        return SessionInfo(catalog, unknown, timings)
+
     def ToolOne_version(self):
         """ This function gets the version of the current ToolOne tool
         :return: version
@@ -97,6 +1107,9 @@ class ToolOneControl(object):
         """
         logger.info("Checking the name of the current active experiment...")
         try:
+            snapshot = self._cached_state()
+            if snapshot is not None:
+                return snapshot.experiment_name
             # get the name of the current active experiment
             current_active_experiment_name = self._instance.ActiveExperiment.Name
         except Exception:
@@ -111,6 +1124,9 @@ class ToolOneControl(object):
         # check the name of current project
         logger.info("Checking the name of the current active project...")
         try:
+            snapshot = self._cached_state()
+            if snapshot is not None:
+                return snapshot.project_name
             # get the name of the current active project
             current_active_project_name = self._instance.ActiveProject.Name
         except Exception:
@@ -138,35 +1154,44 @@ class ToolOneControl(object):
         """
         logger.info("Getting the current tool state for online calibration...")
         try:
+            snapshot = self._cached_state()
+            if snapshot is not None:
+                return snapshot.calibration_state
             # gets the current tool state for calibration
-            application_state = self._instance.CalibrationManagement.State
+            application_state = self._calibration_management().State
         except Exception:
             logger.exception("Could not get the current tool state for online calibration")
             raise
         return application_state
 
-    def start_online_calibration(self):
+    def start_online_calibration(self, check_state=True):
         """ This function starts the online calibration of an experiment
+        :param check_state: only start it when the calibration is offline; False saves the state query when the
+            caller already knows the state
         :return: None
         """
         logger.info("Starting online calibration...")
         try:
-            if self.online_calibration_state() == 0:
+            if not check_state or self.online_calibration_state() == CALIBRATION_STATE_OFFLINE:
                 # start online calibration
-                self._instance.CalibrationManagement.StartOnlineCalibration()
+                self._calibration_management().StartOnlineCalibration()
+                self.invalidate_snapshot()
         except Exception:
             logger.exception("Could not start online calibration")
             raise
 
-    def stop_online_calibration(self):
+    def stop_online_calibration(self, check_state=True):
         """ This function stops the online calibration of an experiment
+        :param check_state: only stop it when the calibration is online; False saves the state query when the
+            caller already knows the state
         :return: None
         """
         logger.info("Stopping online calibration...")
         try:
-            if self.online_calibration_state() == 1:
+            if not check_state or self.online_calibration_state() == CALIBRATION_STATE_ONLINE:
                 # stop online calibration
-                self._instance.CalibrationManagement.StopOnlineCalibration()
+                self._calibration_management().StopOnlineCalibration()
+                self.invalidate_snapshot()
         except Exception:
             logger.exception("Could not stop online calibration")
             raise
@@ -177,8 +1202,11 @@ class ToolOneControl(object):
         """
         logger.info("Checking if the system measurement is running...")
         try:
+            snapshot = self._cached_state()
+            if snapshot is not None:
+                return snapshot.is_measuring
             # check if measurement for current experiment is running
-            running_measurement = self._instance.MeasurementDataManagement.IsMeasuring
+            running_measurement = self._measurement_data_management().IsMeasuring
         except Exception:
             logger.exception("Could not check system measurement state")
             raise
@@ -191,7 +1219,8 @@ class ToolOneControl(object):
         logger.info("Starting measuring for all devices...")
         try:
             # start measuring
-            self._instance.MeasurementDataManagement.Start()
+            self._measurement_data_management().Start()
+            self.invalidate_snapshot()
         except Exception:
             logger.exception("Could not start measuring")
             raise
@@ -202,8 +1231,12 @@ class ToolOneControl(object):
         """
         logger.info("Stopping measuring for all devices...")
         try:
-            # stop measuring
-            self._instance.MeasurementDataManagement.Stop()
+            self._stop_rotation()
+            # stop measuring, this stops the recorders as well
+            self._measurement_data_management().Stop()
+            self._recorder_settings = None
+            self.invalidate_snapshot()
+            self._finish_rotation()
         except Exception:
             logger.exception("Could not stop measuring")
             raise
@@ -228,14 +1261,19 @@ class ToolOneControl(object):
         logger.info("Closing the project...")
         try:
             # close the current project with/without saving modifications
+            self.invalidate_handle_cache()
+            self._loaded_applications.clear()
+            self._recorder_settings = None
             self._instance.ActiveProject.Close(SaveChanges=save_changes)
+            self._session = (None, None)
         except Exception:
             logger.exception("Could not close the project")
             raise
 
     def restart_ToolOne(self, save_changes=False, window_visible=True):
         """
-        Restart ToolOne tool.
+        Restart ToolOne tool. In standby mode the prepared standby process is swapped in and the old process is quit
+        in the background; a new standby is prepared with the same project and experiment.
 
         Args:
             save_changes (bool):
@@ -245,131 +1283,227 @@ class ToolOneControl(object):
         """
         logger.info("Restarting ToolOne tool...")
         try:
-            # quit ToolOne tool
-            self.close_ToolOne(save_changes)
-            # start ToolOne tool
-            self._instance = Dispatch("ToolOneNG.Application")
+            session = self._standby_session
+            standby = self._take_standby()
+            if standby is None:
+                # quit ToolOne tool
+                self.close_ToolOne(save_changes)
+                # all cached COM objects belong to the old process
+                self.invalidate_handle_cache()
+                self._loaded_applications.clear()
+                self._recorder_settings = None
+                # start ToolOne tool
+                self._instance = self._connect()
+            else:
+                old_instance = self._instance
+                self.invalidate_handle_cache()
+                self._loaded_applications.clear()
+                self._recorder_settings = None
+                self._instance = self._wrap_instance(standby)
+                self._com_thread().submit(_quit_ToolOne, _marshal(old_instance), save_changes)
+            self._session = session if standby is not None else (None, None)
             # make the ToolOne GUI visible
             self._instance.MainWindow.Visible = window_visible
+            self._window_visible = window_visible
+            if self.standby:
+                self._refresh_standby()
         except Exception:
             logger.exception("Could not restart ToolOne")
             raise
 
-    def load_application_from_file(self, applicationFullPath):
-        """ This functions loads the application from the file location to the ToolOne platform manager
+    def load_application_from_file(self, applicationFullPath, platform_index=0, force=False):
+        """ This functions loads the application from the file location to the ToolOne platform manager. An application
+        with the same name is only kept when this ToolOneControl loaded it from a file with the same content hash;
+        a rebuilt application replaces it.
         :param applicationFullPath:
-        :return: None
+        :param platform_index: index of the platform in the experiment
+        :param force: load the application even when the identical build is loaded
+        :return: True when the application was loaded, False when the identical build was already loaded
         """
         logger.info("Loading the application on the Platform...")
         try:
-            application_name = os.path.basename(os.path.normpath(applicationFullPath))
-            is_application_loaded = self._instance.PlatformManagement.Platforms[0].RealTimeApplications.Contains(
-                application_name)
-
-            if is_application_loaded == False:
-                # load an application on the Platform
-                self._instance.PlatformManagement.Platforms[0].LoadRealtimeApplication(applicationFullPath)
+            fingerprint = application_fingerprint(applicationFullPath)
+            is_application_loaded = self._platform(platform_index).RealTimeApplications.Contains(fingerprint.name)
+            if is_application_loaded and not force and self._is_loaded_build(applicationFullPath, platform_index):
+                logger.info("Application %s is already loaded", fingerprint.name)
+                return False
+
+            if is_application_loaded:
+                # a different build (or one of unknown origin) with the same name is loaded
+                self.unload_application_from_platform(platform=platform_index)
+            self.invalidate_handle_cache()
+            # load an application on the Platform
+            self._platform(platform_index).LoadRealtimeApplication(applicationFullPath)
+            self._loaded_applications[platform_index] = fingerprint
+            return True
         except Exception:
+            self._loaded_applications.pop(platform_index, None)
             logger.exception("Could not load the application from the Platform")
             raise
 
-    def unload_application_from_platform(self):
+    def _is_loaded_build(self, applicationFullPath, platform_index=0):
+        """ True when this ToolOneControl loaded the application on the platform from a file with the same content """
+        loaded = self._loaded_applications.get(platform_index)
+        if loaded is None:
+            return False
+        # size and mtime only decide whether the file is hashed again, a touched but identical build is the same build
+        fingerprint = application_fingerprint(applicationFullPath)
+        return loaded.name == fingerprint.name and loaded.sha256 == fingerprint.sha256
+
+    def prefetch_application(self, applicationFullPath):
+        """ This function validates and hashes the next application in the background while the current scenario runs,
+        so the following load_application_from_file() does not wait for it
+        :param applicationFullPath:
+        :return: concurrent.futures.Future of the ApplicationFingerprint
+        """
+        logger.info("Prefetching application %s...", applicationFullPath)
+        return prefetch_application(applicationFullPath)
+
+    def unload_application_from_platform(self, stop_calibration=True, platform=0, parallel=True):
         """
         This function unloads the current application from the VEOS platform
-        Returns: None
+
+        Args:
+            stop_calibration (bool): stop the online calibration first, False when the caller already stopped it
+            platform: platform index or name, ALL_PLATFORMS, or a list of indices and names
+            parallel (bool): unload the applications of several platforms concurrently
+
+        Returns: None for a single platform, list of PlatformResult for several
         """
         logger.info("Unloading the application from the Platform...")
         try:
-            # need to stop online calibration before unloading the experiment to avoid a com-error
-            self.stop_online_calibration()
+            if stop_calibration:
+                # need to stop online calibration before unloading the experiment to avoid a com-error
+                self.stop_online_calibration()
             # Unload the application from the Platform
-            self._instance.ActiveExperiment.Platforms[0].RealTimeApplication.Unload()
+            indices = self._platform_indices(platform)
+            try:
+                return self._on_platforms(platform, lambda real_time_application: real_time_application.Unload()
+                                          if real_time_application is not None else None, parallel)
+            finally:
+                self.invalidate_handle_cache()
+                for index in indices:
+                    self._loaded_applications.pop(index, None)
         except Exception:
             logger.exception("Could not unload the application from the Platform")
             raise
 
-    def start_application_on_platform(self):
+    def start_application_on_platform(self, platform=0, parallel=True):
         """ This function starts the offline simulation application on the Platform
-        :return: None
+        :param platform: platform index or name, ALL_PLATFORMS, or a list of indices and names
+        :param parallel: start the applications of several platforms concurrently
+        :return: None for a single platform, list of PlatformResult for several
         """
         logger.info("Starting the offline simulation application on the Platform...")
-        try:
-            # start the application on the Platform
-            active_real_time_applications = self._instance.ActiveExperiment.Platforms[0].RealTimeApplication
+
+        def start(active_real_time_applications):
             if active_real_time_applications != None:
                 active_real_time_applications.Start()
             else:
                 logger.info("Currently no active real time application available to start")
+        try:
+            # start the application on the Platform
+            return self._on_platforms(platform, start, parallel)
         except Exception:
             logger.exception("Could not start the application on the Platform")
             raise
+        finally:
+            self.invalidate_snapshot()
 
-    def stop_application_on_platform(self):
+    def stop_application_on_platform(self, platform=0, parallel=True):
         """
         This function stops the current application on VEOS platform
-        Returns: None
+        Args:
+            platform: platform index or name, ALL_PLATFORMS, or a list of indices and names
+            parallel (bool): stop the applications of several platforms concurrently
+        Returns: None for a single platform, list of PlatformResult for several
         """
         logger.info("Stopping the application currently on the Platform...")
-        try:
-            # stop the application on the Platform
-            active_real_time_applications = self._instance.ActiveExperiment.Platforms[0].RealTimeApplication
+
+        def stop(active_real_time_applications):
             # to avoid error, check if there is a loaded active real time application
             if active_real_time_applications != None:
                 active_real_time_applications.Stop()
             else:
                 logger.info("Currently no active real time application available to stop")
+        try:
+            # stop the application on the Platform
+            return self._on_platforms(platform, stop, parallel)
         except Exception:
             logger.exception("Could not stop the application currently running on the Platform")
             raise
+        finally:
+            self.invalidate_snapshot()
 
-    def pause_application_on_platform(self):
+    def pause_application_on_platform(self, platform=0, parallel=True):
         """
         This function pauses the current application on VEOS platform
-        Returns: None
+        Args:
+            platform: platform index or name, ALL_PLATFORMS, or a list of indices and names
+            parallel (bool): pause the applications of several platforms concurrently
+        Returns: None for a single platform, list of PlatformResult for several
         """
         logger.info("Pausing the application currently on the Platform...")
-        try:
-            # pause the application on the Platform
-            active_real_time_applications = self._instance.ActiveExperiment.Platforms[0].RealTimeApplication
+
+        def pause(active_real_time_applications):
             # to avoid error, check if there is a loaded active real time application
             if active_real_time_applications != None:
                 active_real_time_applications.Pause()
             else:
                 logger.info("Currently no active real time application available to pause")
+        try:
+            # pause the application on the Platform
+            return self._on_platforms(platform, pause, parallel)
         except Exception:
             logger.exception("Could not pause the application currently running on the Platform")
             raise
+        finally:
+            self.invalidate_snapshot()
 
-    def state_application_on_platform(self):
+    def state_application_on_platform(self, platform=0, parallel=True):
         """This function returns the state of the application loaded on the platform. It gives 0 when no application is
         loaded and 1 when an application is loaded.
-        :return: state_application
+        :param platform: platform index or name, ALL_PLATFORMS, or a list of indices and names
+        :param parallel: read the states of several platforms concurrently
+        :return: state_application, list of PlatformResult with the states for several platforms
         """
         logger.info("Getting the state of the application currently on the Platform...")
         try:
+            snapshot = self._cached_state()
+            if snapshot is not None and platform == 0:
+                return snapshot.application_state
             # Getting the state of the application currently on the Platform
-            state_application = self._instance.ActiveExperiment.Platforms[0].RealTimeApplication.State
+            state_application = self._on_platforms(platform, lambda application: application.State
+                                                   if application is not None else APPLICATION_STATE_UNLOADED,
+                                                   parallel)
         except Exception:
             logger.exception("Could not get the state of the application currently on the Platform")
             raise
         return state_application
 
-    def restart_application(self, applicationFullPath):
+    def restart_application(self, applicationFullPath, force=False):
         """
-        This function restarts the application on the platform by unloading then reloading the application
+        This function restarts the application on the platform by unloading then reloading the application. When the
+        identical build is loaded, it is only stopped instead.
 
         Args:
             applicationFullPath: Applications path
+            force (bool): unload and reload even an identical build
 
         Returns: None
 
         """
         logger.info("Restaring the application on the platform...")
         try:
+            if not force and self._is_loaded_build(applicationFullPath) and \
+                    self._platform(0).RealTimeApplications.Contains(self._loaded_applications[0].name):
+                if self.state_application_on_platform() in (APPLICATION_STATE_RUNNING, APPLICATION_STATE_PAUSED):
+                    self.stop_application_on_platform()
+                return
             self.unload_application_from_platform()
-            self.load_application_from_file(applicationFullPath)
+            self.load_application_from_file(applicationFullPath, force=True)
         except Exception:
-            logger.exception("Could not restart the application {} on the platform".format(applicationFullPath))
+            logger.exception("Could not restart the application %s on the platform", applicationFullPath)
             raise
 
     def measurement_recorder(self):
@@ -377,11 +1511,11 @@ class ToolOneControl(object):
         for other options in the Recorder Class.
         :return: Recorder Collection object
         """
-        logging.info("Getting the recorder collection...")
+        logger.info("Getting the recorder collection...")
         try:
-            return self._instance.MeasurementDataManagement.Recorders[self._recorder_index]
+            return self._recorder()
         except Exception:
-            logging.exception("Could not get the recorder collection")
+            logger.exception("Could not get the recorder collection")
             raise
 
     def enable_measurement_start_condition(self, state):
@@ -389,11 +1523,11 @@ class ToolOneControl(object):
         :param state:
         :return: None
         """
-        logging.info("Setting the start condition option to start measuring after an event occurs...")
+        logger.info("Setting the start condition option to start measuring after an event occurs...")
         try:
-            self._instance.MeasurementDataManagement.Recorders[self._recorder_index].StartCondition.Enabled = state
+            self._recorder().StartCondition.Enabled = state
         except Exception:
-            logging.exception("Could not set the start condition option")
+            logger.exception("Could not set the start condition option")
             raise
 
     def set_measurement_trigger_rules(self, trigger_rules):
@@ -401,11 +1535,11 @@ class ToolOneControl(object):
         :param trigger_rules:
         :return: object
         """
-        logging.info("Setting the trigger rules to {}".format(trigger_rules))
+        logger.info("Setting the trigger rules to %s", trigger_rules)
         try:
-            return self._instance.MeasurementDataManagement.TriggerRules[trigger_rules]
+            return self._measurement_data_management().TriggerRules[trigger_rules]
         except Exception:
-            logging.exception("Could not set the trigger rules to {}".format(trigger_rules))
+            logger.exception("Could not set the trigger rules to %s", trigger_rules)
             raise
 
     def link_trigger_rules_with_start_measurement(self, trigger_rule):
@@ -413,12 +1547,11 @@ class ToolOneControl(object):
         :param trigger_rule:
         :return: None
         """
-        logging.info("Linking the trigger rules with the start of recording the measurements...")
+        logger.info("Linking the trigger rules with the start of recording the measurements...")
         try:
-            self._instance.MeasurementDataManagement.Recorders[
-                self._recorder_index].StartCondition.Trigger = trigger_rule
+            self._recorder().StartCondition.Trigger = trigger_rule
         except Exception:
-            logging.exception("Could not link the trigger rules object with the start of recording the measurements")
+            logger.exception("Could not link the trigger rules object with the start of recording the measurements")
             raise
 
     def configure_start_conditions_for_measurement(self, WithTrigger, OverwriteExisting):
@@ -427,94 +1560,273 @@ class ToolOneControl(object):
         :param OverwriteExisting:
         :return: None
         """
-        logging.info("Starting recording the measurements according to the specified parameters...")
+        logger.info("Starting recording the measurements according to the specified parameters...")
         try:
-            self._instance.MeasurementDataManagement.Recorders[self._recorder_index].Start(WithTrigger,
-                                                                                           OverwriteExisting)
+            self._recorder().Start(WithTrigger, OverwriteExisting)
+            self.invalidate_snapshot()
+            self._recorder_start_arguments = (WithTrigger, OverwriteExisting)
+            # start condition and trigger rules are unknown unless arm_recorder() started the recording
+            self._recorder_settings = RecorderSettings(None, None, WithTrigger, OverwriteExisting)
+            if self._recording_rotation is not None and self._recording_rotation.finished:
+                # a new recording, not rotated unless start_recording_rotation() follows
+                self._recording_rotation = None
         except Exception:
-            logging.exception("Could not start the recording of the measurements")
+            logger.exception("Could not start the recording of the measurements")
             raise
 
     def stop_recording_measurement(self):
         """ This function stops recording the measurements.
         :return: None
         """
-        logging.info("Stopping recording the measurements...")
+        logger.info("Stopping recording the measurements...")
         try:
+            self._stop_rotation()
             # stop the recording
-            self._instance.MeasurementDataManagement.Recorders[self._recorder_index].Stop()
+            self._recorder().Stop()
+            self._recorder_settings = None
+            self.invalidate_snapshot()
+            self._finish_rotation()
         except Exception:
-            logging.exception("Could not stop recording the measurements")
+            logger.exception("Could not stop recording the measurements")
             raise
 
+    def _stop_rotation(self):
+        """ Stops rolling the recording, before the caller stops the recorder """
+        rotation = self._recording_rotation
+        if rotation is not None and rotation.running:
+            rotation.stop()
+
+    def _finish_rotation(self):
+        """ Hands the last chunk of a rotated recording stopped by the caller to the indexer """
+        rotation = self._recording_rotation
+        if rotation is not None and not rotation.finished:
+            rotation.finished = True
+            if rotation.error is None:
+                for chunk_path in self._recorder().LastRecordedFiles:
+                    rotation.indexer.add(chunk_path)
+            rotation.indexer.close(wait=False)
+
     def stop_measuring_measurement(self):
         """ This function stops running the measurements.
         :return: None
         """
-        logging.info("Stopping measuring...")
+        logger.info("Stopping measuring...")
         try:
+            self._stop_rotation()
             # stop measuring
-            self._instance.MeasurementDataManagement.Stop()
+            self._measurement_data_management().Stop()
+            self._recorder_settings = None
+            self.invalidate_snapshot()
+            self._finish_rotation()
         except Exception:
-            logging.exception("Could not stop measuring")
+            logger.exception("Could not stop measuring")
             raise
 
-    def read_signals_from_file(self, signals_file_path):
-        # This function reads the signals from a file and stores them in a list
+    def read_signals_from_file(self, signals_file_path, append=False, catalog=None):
+        """ This function reads the signals from a signal file into the signal set of this control (self.signals).
+        Blank lines and lines starting with # are skipped, "#include <path>" lines add the signals of another file.
+        With a catalog, patterns like "Model/Subsystem/*/Speed*" are expanded and unknown signals are left out, so a
+        typo is reported here instead of as a COM error in set_signals_to_record.
+        :param signals_file_path: path of the signal file
+        :param append: keep the signals read before, by default the signal set is replaced
+        :param catalog: SignalCatalog of the active experiment, see signal_catalog()
+        :return: list of the unknown signals and patterns matching nothing (always empty without catalog)
+        """
         logger.info("Reading signals from signals file...")
+        unknown = []
         try:
-            global signals_to_record
-            index = 0
-            with open(signals_file_path, "r") as signals_file:
-                for line in signals_file:
-                    # avoid adding lines starting with #
-                    if line.startswith('#'):
-                        continue
-                    # avoid adding empty lines
-                    if line.startswith('\n'):
-                        continue
-                        # add signal to signals list
-                    signals_to_record.append(line)
-                    index += 1
+            signals = SignalSet.from_file(signals_file_path)
+            if catalog is not None:
+                signals, unknown = catalog.resolve(signals)
+                if unknown:
+                    logger.warning("%s signals of %s are not available in the experiment and are skipped: %s",
+                                   len(unknown), signals_file_path, ", ".join(unknown))
+            if append:
+                self.signals.update(signals)
+            else:
+                self.signals = signals
         except Exception:
             logger.exception("Could not read signals from file")
+            raise
+        return unknown
 
-    def set_signals_to_record(self):
+    def read_signal_values(self, signal_names):
+        """ This function reads the current values of signals of the running application, one round-trip per platform
+        when ToolOne provides VariableDescription.ReadValues. See ToolOne_live.LiveAcquisition for periodic reads.
+        :param signal_names: signal paths
+        :return: list of values in the order of signal_names
+        """
+        try:
+            return self._handle("SignalReader", lambda: _SignalReader(self._instance)).read(signal_names)
+        except Exception:
+            logger.exception("Could not read the signal values")
+            raise
+
+    def set_parameters(self, parameters, atomic=True, force=False, reset_unlisted=False):
+        """ This function writes calibration parameters of the loaded applications, grouped per platform, in one
+        round-trip per platform when ToolOne provides VariableDescription.WriteValues. A value equal to the one last
+        written through this ToolOneControl is not written again; the cache is dropped when the application is
+        (re)loaded. Parameters changed outside of this ToolOneControl are not noticed, use force=True after that.
+        The value of a parameter before its first write is kept as its default.
+        :param parameters: dict parameter path -> value
+        :param atomic: restore the previous values when a write fails, so either the whole parameter set is applied
+            or none of it; also enables rollback_parameters()
+        :param force: write all parameters, also the unchanged ones
+        :param reset_unlisted: reset the parameters written before and missing in parameters to their defaults, so
+            the application runs with exactly this parameter set
+        :return: list of the written parameter paths
+        """
+        logger.info("Setting %s calibration parameters...", len(parameters))
+        try:
+            writer = self._handle("ParameterWriter", lambda: _ParameterWriter(self._instance))
+            written = writer.write(parameters, atomic, force, reset_unlisted)
+        except Exception:
+            logger.exception("Could not set the calibration parameters")
+            raise
+        logger.info("Wrote %s changed parameters", len(written))
+        return written
+
+    def rollback_parameters(self):
+        """ This function restores the values the parameters had before the last atomic set_parameters() call
+        :return: list of the restored parameter paths
+        """
+        logger.info("Rolling back the last calibration parameter set...")
+        try:
+            writer = self._handle("ParameterWriter", lambda: _ParameterWriter(self._instance))
+            if not writer.rollback_values:
+                logger.info("No parameter set to roll back")
+                return []
+            restored = writer.write(writer.rollback_values, atomic=False)
+        except Exception:
+            logger.exception("Could not roll back the calibration parameters")
+            raise
+        return restored
+
+    def available_signals(self):
+        """ This function enumerates the signals of all platforms of the active experiment, i.e. the Path of every
+        variable in Platforms[i].ActiveVariableDescription.Variables. This costs one COM round-trip per signal,
+        use signal_catalog() to reuse the result.
+        :return: list of signal paths
+        """
+        logger.info("Enumerating the signals available in the active experiment...")
+        try:
+            signals = []
+            for platform in self._instance.ActiveExperiment.Platforms:
+                variable_description = platform.ActiveVariableDescription
+                if variable_description is None:
+                    continue
+                signals.extend(variable.Path for variable in variable_description.Variables)
+        except Exception:
+            logger.exception("Could not enumerate the available signals")
+            raise
+        return signals
+
+    def _application_identities(self):
+        """ identities of the applications loaded by load_application_from_file(), the signal catalog cache key """
+        return ["{}:{}".format(index, fingerprint.sha256)
+                for index, fingerprint in sorted(self._loaded_applications.items())]
+
+    def signal_catalog(self, project_path=None, experiment_name=None, cache_dir=None, refresh=False):
+        """ This function returns the SignalCatalog of an experiment. The catalog is cached on disk, keyed by project
+        path, experiment, modification time of the project file and content hash of the applications loaded with
+        load_application_from_file(); with project_path and experiment_name given, a cached catalog is returned
+        without any COM call. A catalog is not cached while no application was loaded through this ToolOneControl,
+        because its signals could not be attributed to a build.
+        :param project_path: ToolOne project path, defaults to the active project
+        :param experiment_name: experiment name, defaults to the active experiment
+        :param cache_dir: cache directory, defaults to $TOOLONE_CACHE_DIR or ~/.cache/ToolOne
+        :param refresh: enumerate the signals again even if a cached catalog exists
+        :return: SignalCatalog
+        """
+        logger.info("Getting the signal catalog...")
+        try:
+            if project_path is None:
+                project_path = self._instance.ActiveProject.FullPath
+            if experiment_name is None:
+                experiment_name = self._instance.ActiveExperiment.Name
+            applications = self._application_identities()
+            catalog = None
+            if applications and not refresh:
+                catalog = SignalCatalog.load_cached(project_path, experiment_name, cache_dir, applications)
+            if catalog is None:
+                catalog = SignalCatalog(self.available_signals())
+                if applications and len(catalog) and os.path.exists(project_path):
+                    catalog.save(project_path, experiment_name, cache_dir, applications)
+        except Exception:
+            logger.exception("Could not get the signal catalog")
+            raise
+        return catalog
+
+    def set_signals_to_record(self, incremental=False, remove_unlisted=True):
         """ This function checks which signals need to be recorded and adds them to the recording list.
-        :param : None
-        :return: None
+        In incremental mode the signals already held by the recorder are read once and only the difference to
+        self.signals is applied, so repeated scenarios with the same signal list cost a single enumeration.
+        :param incremental: only add (and remove) the signals which differ from the recorder's current signals
+        :param remove_unlisted: in incremental mode, remove recorder signals which are not in self.signals
+        :return: SignalRegistrationSummary with the added and removed signal names and the unchanged count
         """
         logger.info("Configuring signal recording...")
         try:
-            # store the recorder commandline in ToolOne
-            recorder = self._instance.MeasurementDataManagement.Recorders[self._recorder_index]
+            # store the recorder signal collection in ToolOne
+            recorder_signals = self._recorder_signals()
             # store signal configuration commandline in ToolOne
-            signal_configuration = self._instance.MeasurementDataManagement.MeasurementConfiguration.Signals
-            # for entry in signal_paths:
-            for signal in signals_to_record:
-                # add signal item to the Signals class with the signal's name
-                # signal.strip('\n') is needed for ToolOne to get correct naming of the signals
-                new_signal = signal_configuration.Add(signal.strip('\n'))
-                # insert the signal name to be recorded
-                recorder.Signals.Insert(new_signal)
+            signal_configuration = self._signal_configuration()
+            if not incremental:
+                # for entry in signal_paths:
+                for signal in self.signals:
+                    # add signal item to the Signals class with the signal's name
+                    new_signal = signal_configuration.Add(signal)
+                    # insert the signal name to be recorded
+                    recorder_signals.Insert(new_signal)
+                return SignalRegistrationSummary(list(self.signals), [], 0)
+
+            wanted = self.signals
+            current = {}
+            to_remove = []
+            removed_names = []
+            for recorded_signal in recorder_signals:
+                name = recorded_signal.Name
+                # earlier non-incremental runs may have inserted the same signal several times
+                if name in current or (remove_unlisted and name not in wanted):
+                    to_remove.append(recorded_signal)
+                    removed_names.append(name)
+                else:
+                    current[name] = recorded_signal
+            to_add = [name for name in wanted if name not in current]
+
+            for recorded_signal in to_remove:
+                recorder_signals.Remove(recorded_signal)
+            self._insert_recorder_signals(recorder_signals, signal_configuration, to_add)
+
+            summary = SignalRegistrationSummary(to_add, removed_names, len(current))
+            logger.info("Signal recording: %s added, %s removed, %s unchanged", len(summary.added),
+                        len(summary.removed), summary.unchanged)
+            return summary
         except Exception:
             logger.exception("Could not configure signal recording")
             raise
 
-    def start_running_test(self, enable_state, trigger_rules, with_trigger, overwrite_existing):
-        """ This function contains many basic functions in a sequence to start running online
-        calibration and recording the measurements.
+    @staticmethod
+    def _insert_recorder_signals(recorder_signals, signal_configuration, names):
+        """ Adds the signals to the measurement configuration and inserts them into the recorder, using the bulk
+        AddRange/InsertRange methods in one round-trip each when the ToolOne version provides them.
+        """
+        if not names:
+            return
+        add_range = getattr(signal_configuration, "AddRange", None)
+        insert_range = getattr(recorder_signals, "InsertRange", None)
+        if add_range is not None and insert_range is not None:
+            insert_range(add_range(names))
+            return
+        for name in names:
+            recorder_signals.Insert(signal_configuration.Add(name))
+
+    def arm_recorder(self, enable_state, trigger_rules, with_trigger, overwrite_existing):
+        """ This function configures the start condition and trigger rules of the recorder and starts recording.
         :return: None
         """
-        logger.info("Starting test run...")
+        logger.info("Arming the recorder...")
         try:
-            # stop the online calibration
-            self.stop_online_calibration()
-
-            self.start_application_on_platform()
-
-            self.start_online_calibration()
-
             self.enable_measurement_start_condition(enable_state)
 
             trigger = self.set_measurement_trigger_rules(trigger_rules)
@@ -522,7 +1834,68 @@ class ToolOneControl(object):
             self.link_trigger_rules_with_start_measurement(trigger)
 
             self.configure_start_conditions_for_measurement(with_trigger, overwrite_existing)
+            self._recorder_settings = RecorderSettings(enable_state, trigger_rules, with_trigger, overwrite_existing)
+        except Exception:
+            logger.exception("Could not arm the recorder")
+            raise
 
+    def plan_state(self, desired, costs=None):
+        """ This function reads the current tool state once and plans the minimal operations to reach desired
+        :param desired: ToolOne_planner.DesiredState
+        :param costs: dict overriding the estimated durations of ToolOne_planner.DEFAULT_STEP_COSTS
+        :return: ToolOne_planner.Plan
+        """
+        logger.info("Planning the transition to the desired state...")
+        try:
+            snapshot = self._cached_state()
+            if snapshot is not None:
+                state = ToolOneState(snapshot.project_path, snapshot.experiment_name, snapshot.application_name,
+                                     snapshot.application_state, snapshot.calibration_state, snapshot.is_measuring,
+                                     recorder_settings=self._recorder_settings)
+            else:
+                state = read_state(self, desired)
+            if desired.application is not None and state.application is not None:
+                state = state._replace(application_outdated=not self._is_loaded_build(desired.application))
+            return plan_transition(state, desired, costs)
+        except Exception:
+            logger.exception("Could not plan the transition to the desired state")
+            raise
+
+    def apply_state(self, desired, dry_run=False, costs=None):
+        """ This function brings ToolOne into the desired state (project, experiment, application, application
+        running, online calibration, recorder armed, signal set) with the minimal ordered set of operations.
+        :param desired: ToolOne_planner.DesiredState
+        :param dry_run: only print the plan and its estimated cost
+        :param costs: dict overriding the estimated durations of ToolOne_planner.DEFAULT_STEP_COSTS
+        :return: the executed (or planned) ToolOne_planner.Plan
+        """
+        plan = self.plan_state(desired, costs)
+        if dry_run:
+            print(plan)
+            return plan
+        logger.info("Applying the desired state in %s steps...", len(plan))
+        try:
+            if desired.signals is not None:
+                self.signals = desired.signals if isinstance(desired.signals, SignalSet) else \
+                    SignalSet(desired.signals)
+            for step in plan:
+                getattr(self, step.method)(*step.args, **step.kwargs)
+        except Exception:
+            logger.exception("Could not apply the desired state")
+            raise
+        return plan
+
+    def start_running_test(self, enable_state, trigger_rules, with_trigger, overwrite_existing):
+        """ This function starts the application, the online calibration and the recording of the measurements.
+        Only the missing steps are executed: calibration is toggled only if the application has to be started, and a
+        recording started with the same settings is kept.
+        :return: None
+        """
+        logger.info("Starting test run...")
+        try:
+            self.apply_state(DesiredState(application_running=True, calibration_online=True,
+                                          recorder_armed=RecorderSettings(enable_state, trigger_rules, with_trigger,
+                                                                          overwrite_existing)))
         except Exception:
             logger.exception("Could not start test run")
             raise
@@ -543,58 +1916,336 @@ class ToolOneControl(object):
             raise
 
     def get_recording_path(self):
-        """ This function gets the path for the signals which will be recorded during the test
+        """ This function gets the path for the signals which will be recorded during the test. For a rotated
+        recording (see start_recording_rotation()) this is the path of the chunk manifest.
         :return: recording path
         """
         logger.info("Getting recording path...")
         try:
+            rotation = self._checked_rotation()
+            if rotation is not None:
+                return rotation.indexer.manifest_path
             # return the signals going to be recorded during the test
-            return self._instance.MeasurementDataManagement.Recorders[self._recorder_index].LastRecordedFiles[0]
+            return self._recorder().LastRecordedFiles[0]
         except Exception:
             logger.exception("Could not get recording path")
             raise
 
+    def get_recording_paths(self):
+        """ This function gets the paths of all files of the last recording (LastRecordedFiles), which can be read
+        with ToolOne_recording.open_recordings(). For a rotated recording these are the chunks listed in the chunk
+        manifest, after all completed chunks were compressed and indexed.
+        :return: tuple of recording paths
+        """
+        logger.info("Getting recording paths...")
+        try:
+            rotation = self._checked_rotation()
+            if rotation is not None:
+                directory = os.path.dirname(os.path.abspath(rotation.indexer.manifest_path))
+                return tuple(os.path.normpath(os.path.join(directory, chunk["path"]))
+                             for chunk in rotation.indexer.manifest(wait=True)["chunks"])
+            return tuple(self._recorder().LastRecordedFiles)
+        except Exception:
+            logger.exception("Could not get recording paths")
+            raise
+
+    def start_recording_rotation(self, manifest_path, max_bytes=None, max_duration=None, compress=True,
+                                 overwrite_existing=None):
+        """ This function rolls the running recording to a new file at a maximum size or duration, so long runs
+        produce chunks which can be processed while the recording continues. Every completed chunk is compressed and
+        indexed in the background into the chunk manifest, see get_recording_manifest(). The rotation ends with
+        stop_recording_measurement() or stop_measuring(), which add the last chunk. The first chunk is opened right
+        away, so a recording format without reader (see ToolOne_recording.register_format()) ends the rotation at the
+        first roll and get_recording_path() raises its error.
+        :param manifest_path: path of the chunk manifest (.t1manifest), readable with
+            ToolOne_recording.open_recording()
+        :param max_bytes: maximum size of a chunk, estimated from the data rate of the previous chunk
+        :param max_duration: maximum duration of a chunk [s]
+        :param compress: gzip the chunks, see ToolOne_recording.ChunkIndexer
+        :param overwrite_existing: OverwriteExisting of the recorder start of every chunk, defaults to the one of the
+            running recording
+        :return: None
+        """
+        logger.info("Starting the recording rotation (max %s bytes, max %s s)...", max_bytes, max_duration)
+        if not max_bytes and not max_duration:
+            raise ValueError("The recording rotation requires max_bytes or max_duration")
+        if self._recording_rotation is not None and self._recording_rotation.running:
+            raise RuntimeError("The recording rotation is already running")
+        # imported here, the recording module loads numpy
+        from ToolOne_recording import ChunkIndexer
+        try:
+            if overwrite_existing is None:
+                overwrite_existing = self._recorder_start_arguments[1]
+            self._recording_rotation = _RecordingRotation(self._instance, self._recorder_index,
+                                                          ChunkIndexer(manifest_path, compress), max_bytes,
+                                                          max_duration, overwrite_existing)
+        except Exception:
+            logger.exception("Could not start the recording rotation")
+            raise
+
+    def get_recording_manifest(self, wait=True):
+        """ This function gets the chunk manifest of the current or last rotated recording, the companion of
+        get_recording_path() for recordings started with start_recording_rotation()
+        :param wait: wait until all completed chunks are compressed and indexed
+        :return: manifest dict {"signals": [...], "sample_count": N, "chunks": [...]} with the chunks in time order
+        """
+        logger.info("Getting the recording manifest...")
+        rotation = self._checked_rotation()
+        if rotation is None:
+            raise RuntimeError("No rotated recording, see start_recording_rotation()")
+        return rotation.indexer.manifest(wait)
+
+    def _checked_rotation(self):
+        """ _RecordingRotation of the current or last recording, raising the error of a failed rotation, e.g. a
+        recording format without reader detected at the first chunk """
+        rotation = self._recording_rotation
+        if rotation is not None and rotation.error is not None:
+            raise RuntimeError("The recording rotation failed: {}".format(rotation.error)) from rotation.error
+        return rotation
+
+    def _connect_events(self):
+        """ Subscribes to the COM connection-point events of the calibration and measurement management objects, so
+        waits wake up on state changes. Returns False when the backend provides no events (e.g. no type library or
+        the simulator); the waits then only poll.
+        """
+        if self._event_sinks is not None:
+            return bool(self._event_sinks)
+        self._event_sinks = []
+        try:
+            import pythoncom
+            from win32com.client import WithEvents
+        except ImportError:
+            return False
+        state_changed = self._state_changed
+
+        class _EventSink(object):
+            # every On<Event> handler of the source interface only wakes the waiting thread
+            def __getattr__(self, name):
+                if not name.startswith("On"):
+                    raise AttributeError(name)
+                return lambda *args: state_changed.set()
+
+        for source in (self._calibration_management, self._measurement_data_management):
+            try:
+                self._event_sinks.append(WithEvents(source(), _EventSink))
+            except Exception:
+                logger.debug("No connection-point events available for %s", source.__name__)
+        self._pump_messages = pythoncom.PumpWaitingMessages
+        return bool(self._event_sinks)
+
+    def _wait_until(self, read, accept, timeout, description):
+        """ Waits until accept(read()) is true. The state is polled with exponential backoff (WAIT_MIN_INTERVAL
+        doubling up to WAIT_MAX_INTERVAL); a ToolOne event triggers an immediate read.
+        :return: the accepted value of read()
+        """
+        events = self._connect_events()
+        deadline = time.monotonic() + timeout
+        interval = WAIT_MIN_INTERVAL
+        next_read = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= next_read or self._state_changed.is_set():
+                self._state_changed.clear()
+                value = read()
+                if accept(value):
+                    return value
+                next_read = now + interval
+                interval = min(interval * 2, WAIT_MAX_INTERVAL)
+            remaining = deadline - now
+            if remaining <= 0:
+                raise TimeoutError("Timed out after {} s waiting for {}".format(timeout, description))
+            if events:
+                # COM events of an apartment-threaded object are delivered while the thread pumps messages
+                self._pump_messages()
+                self._state_changed.wait(min(WAIT_MIN_INTERVAL, remaining))
+            else:
+                self._state_changed.wait(min(next_read - now, remaining))
+
+    def wait_for_calibration_state(self, state, timeout):
+        """ This function waits until the online calibration reaches a state
+        :param state: CalibrationManagement.State to wait for, e.g. CALIBRATION_STATE_ONLINE
+        :param timeout: maximum time to wait [s], TimeoutError is raised when it expires
+        :return: the reached state
+        """
+        logger.info("Waiting for online calibration state %s...", state)
+        try:
+            return self._wait_until(lambda: self._calibration_management().State, lambda value: value == state,
+                                    timeout, "online calibration state {}".format(state))
+        except Exception:
+            logger.exception("Online calibration did not reach state %s", state)
+            raise
+        finally:
+            self.invalidate_snapshot()
+
+    def wait_for_measurement_stopped(self, timeout):
+        """ This function waits until the measurement is not running anymore
+        :param timeout: maximum time to wait [s], TimeoutError is raised when it expires
+        :return: None
+        """
+        logger.info("Waiting for the measurement to stop...")
+        try:
+            self._wait_until(lambda: self._measurement_data_management().IsMeasuring, lambda value: not value,
+                             timeout, "the measurement to stop")
+        except Exception:
+            logger.exception("Measurement did not stop")
+            raise
+        finally:
+            self.invalidate_snapshot()
+
+    def wait_for_application_state(self, state, timeout):
+        """ This function waits until the application on the platform reaches a state
+        :param state: RealTimeApplication.State to wait for, APPLICATION_STATE_UNLOADED waits for the unload
+        :param timeout: maximum time to wait [s], TimeoutError is raised when it expires
+        :return: the reached state
+        """
+        logger.info("Waiting for application state %s...", state)
+
+        def read():
+            application = self._experiment_platform(0).RealTimeApplication
+            return application.State if application is not None else APPLICATION_STATE_UNLOADED
+        try:
+            return self._wait_until(read, lambda value: value == state, timeout, "application state {}".format(state))
+        except Exception:
+            logger.exception("Application did not reach state %s", state)
+            raise
+        finally:
+            self.invalidate_snapshot()
+
+    def wait_for_recording_file(self, timeout, previous=None):
+        """ This function waits until the recorder reports its recorded files
+        :param timeout: maximum time to wait [s], TimeoutError is raised when it expires
+        :param previous: files of an earlier recording (e.g. from before stop_recording_and_measuring), which do not
+            count as new recording
+        :return: tuple of the recorded file paths
+        """
+        logger.info("Waiting for the recording files...")
+        previous = tuple(previous) if previous is not None else None
+        try:
+            return self._wait_until(lambda: tuple(self._recorder().LastRecordedFiles),
+                                    lambda files: len(files) > 0 and files != previous, timeout, "recording files")
+        except Exception:
+            logger.exception("No recording files were reported")
+            raise
+
     def close_ToolOne(self, save_changes=False):
         """ This function quits ToolOne tool
         :return: None
         """
         logger.info("Closing ToolOne...")
         try:
-            # check if any application is loaded on the platform
-            # loaded_applications = self._instance.ActiveExperiment.Platforms[0].LoadableApplications.Count
-            applications_state = self.state_application_on_platform()
-            # if there is at least one uploaded application on the platform stop it
-            if applications_state > 0:
-                # stop all running applications on platforms before closing ToolOne tool
-                for platform in self._instance.ActiveExperiment.Platforms:
-                    # stop each platform
-                    platform.RealTimeApplication.Stop()
+            self.discard_standby()
+            # stop all running applications on platforms before closing ToolOne tool, all platforms at once
+            if self._instance.ActiveExperiment is not None:
+                self.stop_application_on_platform(ALL_PLATFORMS)
             # quit ToolOne tool
+            self.invalidate_handle_cache()
+            self._loaded_applications.clear()
+            self._recorder_settings = None
             self._instance.Quit(save_changes)
         except Exception:
             logger.exception("Could not close ToolOne Normally. Trying to kill the process...")
-            for process in psutil.process_iter():
-                if process.name() == "ToolOne.exe":
-                    process.kill()
+            self._kill_ToolOne()
             raise
 
 
-def logger_setup():
-    # logger = logging.getLogger(__name__)
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(funcName)s - %(message)s")
+# deadline of every public method (with COM calls), see ToolOneControl call_timeout
+for _name, _member in list(vars(ToolOneControl).items()):
+    if not _name.startswith("_") and callable(_member) and _name not in _UNGUARDED_METHODS:
+        setattr(ToolOneControl, _name, _guarded(_member))
+del _name, _member
+
+# time every public method while ToolOne_metrics is enabled
+metrics.instrument_class(ToolOneControl)
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
 
-    file_handler = logging.FileHandler("example.log")
-    file_handler.setFormatter(formatter)
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """ Queue handler leaving the formatting to the listener thread. Only the message is merged with its arguments
+    in the calling thread, so COM objects or mutable arguments are not touched after the call returned.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _worker_log_file(log_file, worker_id):
+    """ example.log -> example.worker3.log """
+    root, extension = os.path.splitext(log_file)
+    return "{}.worker{}{}".format(root, worker_id, extension)
+
+
+def logger_setup(log_file="example.log", asynchronous=False, max_bytes=0, backup_count=5, level=logging.INFO,
+                 console=True, worker_id=None):
+    """ This function configures the root logger with a console and a file handler. Calling it again replaces the
+    handlers of the previous call.
+    In asynchronous mode the logging calls only put the record into a queue; a background thread formats and writes
+    it, so file I/O does not delay the ToolOne calls. logger_shutdown() (also run at exit) flushes the queue.
+    :param log_file: path of the log file, None for console output only
+    :param asynchronous: write the log records from a background thread
+    :param max_bytes: rotate the log file when it reaches this size, 0 to never rotate
+    :param backup_count: number of rotated log files to keep
+    :param level: level of the root logger
+    :param console: also log to stderr
+    :param worker_id: id of the worker process; its records go to a separate file, e.g. example.worker3.log, so
+        several processes never write or rotate the same file
+    :return: None
+    """
+    global _log_listener
+
+    logger_shutdown()
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if console:
+        handlers.append(logging.StreamHandler())
+    if log_file is not None:
+        if worker_id is not None:
+            log_file = _worker_log_file(log_file, worker_id)
+        handlers.append(logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                                             delay=True))
+    for handler in handlers:
+        handler.setFormatter(formatter)
 
     root_logger = logging.getLogger("")
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    if asynchronous:
+        _log_listener = logging.handlers.QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+        _log_listener.start()
+        _log_handlers[:] = [_DeferredQueueHandler(_log_listener.queue)]
+        _log_closables[:] = handlers
+    else:
+        _log_handlers[:] = handlers
+        _log_closables[:] = handlers
+    for handler in _log_handlers:
+        root_logger.addHandler(handler)
+
+    root_logger.setLevel(level)
+
+
+def logger_shutdown():
+    """ This function writes the pending records of the asynchronous logging and removes the handlers added by
+    logger_setup()
+    :return: None
+    """
+    global _log_listener
+
+    root_logger = logging.getLogger("")
+    for handler in _log_handlers:
+        root_logger.removeHandler(handler)
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+    for handler in _log_closables:
+        handler.close()
+    del _log_handlers[:]
+    del _log_closables[:]
+
 
-    root_logger.setLevel(logging.INFO)
+atexit.register(logger_shutdown)
 
 
 if __name__ == '__main__':
-    pass
+    # run a scenario manifest, see ToolOne_batch
+    import sys
+    from ToolOne_batch import main
+    sys.exit(main())
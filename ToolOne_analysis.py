@@ -0,0 +1,245 @@
+import concurrent.futures
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import numpy as np
+except ImportError:  # checked by RecordingAnalyzer
+    np = None
+
+from ToolOne_recording import DEFAULT_CHUNK_SIZE, decompress_recording, open_recording
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# statistics computed by default for every signal
+DEFAULT_STATISTICS = ("min", "max", "mean", "std")
+# signals analyzed by one worker task; a task opens the recording once and streams its signals chunk by chunk
+_BATCH_SIZE = 256
+# signals of a batch read together, sharing one copy of the time column per chunk
+_SIGNALS_PER_PASS = 32
+
+
+class AnalysisConfig(object):
+    """
+    Statistics and event detections computed per signal by RecordingAnalyzer.
+
+    Thresholds are given per signal name; the key "*" is the default for all other signals. A threshold enables the
+    crossing count ("crossings": transitions across the level in both directions) and the rising-edge timings
+    ("rising_edges": time stamps where the signal reaches the level from below, at most max_edges).
+
+    Args:
+        statistics: subset of "min", "max", "mean", "std", "count"
+        thresholds: float for all signals or dict signal name -> level
+        max_edges: maximum number of rising-edge time stamps reported per signal
+        chunk_size: samples read from the recording at once
+    """
+
+    def __init__(self, statistics=DEFAULT_STATISTICS, thresholds=None, max_edges=100, chunk_size=DEFAULT_CHUNK_SIZE):
+        unknown = set(statistics) - {"min", "max", "mean", "std", "count"}
+        if unknown:
+            raise ValueError("Unknown statistics: {}".format(", ".join(sorted(unknown))))
+        self.statistics = tuple(statistics)
+        if thresholds is not None and not isinstance(thresholds, dict):
+            thresholds = {"*": thresholds}
+        self.thresholds = dict(thresholds or {})
+        self.max_edges = max_edges
+        self.chunk_size = chunk_size
+
+    def threshold(self, signal):
+        return self.thresholds.get(signal, self.thresholds.get("*"))
+
+    def to_dict(self):
+        return {"statistics": list(self.statistics), "thresholds": self.thresholds, "max_edges": self.max_edges}
+
+
+class _SignalStatistics(object):
+    """ statistics and events of one signal, updated chunk by chunk with vectorized operations """
+
+    def __init__(self, signal, config):
+        self.config = config
+        self.level = config.threshold(signal)
+        self.count = 0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        # running mean and sum of squared deviations, merged per chunk with the parallel formula of Chan et al.
+        self.mean = 0.0
+        self.squared_deviations = 0.0
+        self.crossings = 0
+        self.edges = []
+        self.previous_above = None
+
+    def add(self, time_chunk, values):
+        chunk_count = len(values)
+        if not chunk_count:
+            return
+        chunk_mean = float(values.mean())
+        deviations = values - chunk_mean
+        delta = chunk_mean - self.mean
+        self.count += chunk_count
+        self.mean += delta * chunk_count / self.count
+        self.squared_deviations += float(np.dot(deviations, deviations)) + delta * delta * \
+            (self.count - chunk_count) * chunk_count / self.count
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        if self.level is None:
+            return
+        max_edges = self.config.max_edges
+        above = values >= self.level
+        if self.previous_above is not None:
+            # transition between the last sample of the previous chunk and the first one of this chunk
+            self.crossings += int(self.previous_above != above[0])
+            if not self.previous_above and above[0] and len(self.edges) < max_edges:
+                self.edges.append(float(time_chunk[0]))
+        changes = above[1:] != above[:-1]
+        self.crossings += int(np.count_nonzero(changes))
+        if len(self.edges) < max_edges:
+            rising = np.flatnonzero(changes & above[1:]) + 1
+            self.edges.extend(time_chunk[rising[:max_edges - len(self.edges)]].tolist())
+        self.previous_above = bool(above[-1])
+
+    def result(self):
+        if not self.count:
+            return {}
+        values = {"min": self.minimum, "max": self.maximum, "mean": self.mean,
+                  "std": (self.squared_deviations / self.count) ** 0.5, "count": self.count}
+        result = {name: values[name] for name in self.config.statistics}
+        if self.level is not None:
+            result["threshold"] = self.level
+            result["crossings"] = self.crossings
+            result["rising_edges"] = self.edges
+        return result
+
+
+def analyze_signal(recording, signal, config, start=None, stop=None):
+    """ This function streams one signal of an open recording and computes its statistics and events with vectorized
+    operations per chunk, so memory use is bounded by the chunk size.
+    :return: dict of results, empty for a signal without samples in the range
+    """
+    statistics = _SignalStatistics(signal, config)
+    for time_chunk, values in recording.iter_signal(signal, start, stop, config.chunk_size):
+        statistics.add(time_chunk, values)
+    return statistics.result()
+
+
+def _analyze_batch(file_path, recording_path, signals, config, start, stop):
+    """ worker task: analyzes a batch of signals of one recording, reading _SIGNALS_PER_PASS signals per pass
+    :param file_path: path the results are reported for
+    :param recording_path: path to read, the recording decompressed by the parent process
+    """
+    results = {}
+    with open_recording(recording_path) as recording:
+        for pass_start in range(0, len(signals), _SIGNALS_PER_PASS):
+            statistics = {signal: _SignalStatistics(signal, config)
+                          for signal in signals[pass_start:pass_start + _SIGNALS_PER_PASS]}
+            for chunk in recording.iter_chunks(list(statistics), start, stop, config.chunk_size):
+                for signal, values in chunk.signals.items():
+                    statistics[signal].add(chunk.time, values)
+            results.update((signal, signal_statistics.result()) for signal, signal_statistics in statistics.items())
+    return file_path, results
+
+
+class RecordingAnalyzer(object):
+    """
+    Post-run analysis of recordings: computes the configured statistics and events for every recorded signal,
+    fanning the signals out over a process pool, and writes a compact JSON summary. The pool is kept between runs,
+    and submit() runs an analysis in the background while the next scenario starts.
+
+        analyzer = RecordingAnalyzer(AnalysisConfig(thresholds={"*": 0.5}))
+        future = analyzer.submit(control.get_recording_paths(), "scenario_01_summary.json")
+        ...
+        summary = future.result()
+
+    Args:
+        config: AnalysisConfig, default statistics without thresholds when omitted
+        workers: number of worker processes, defaults to the number of CPU cores
+    """
+
+    def __init__(self, config=None, workers=None):
+        if np is None:
+            raise ImportError("The recording analysis requires numpy")
+        self.config = config if config is not None else AnalysisConfig()
+        self._workers = workers or os.cpu_count() or 1
+        self._pool = None
+        # runs submitted analyses one after the other, so the process pool is not oversubscribed
+        self._background = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="ToolOneAnalysis")
+
+    def _process_pool(self):
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self._workers)
+        return self._pool
+
+    def analyze(self, file_paths, summary_path=None, signals=None, start=None, stop=None):
+        """ This function analyzes recordings and blocks until the summary is complete
+        :param file_paths: recording paths, e.g. ToolOneControl.get_recording_paths()
+        :param summary_path: write the summary as JSON to this file
+        :param signals: names of the signals to analyze, all recorded signals when omitted
+        :param start: first time stamp to analyze [s]
+        :param stop: time stamp to stop before [s]
+        :return: summary dict {"files": {path: {signal: results}}, "config": ..., "duration": seconds}
+        """
+        logger.info("Analyzing %s recordings...", len(file_paths))
+        started = time.perf_counter()
+        futures = []
+        # compressed recordings are decompressed once here and memory-mapped by all batches
+        directory = tempfile.mkdtemp(prefix="ToolOne_analysis_")
+        try:
+            pool = self._process_pool()
+            for file_path in file_paths:
+                recording_path = decompress_recording(file_path, directory)
+                with open_recording(recording_path) as recording:
+                    names = recording.signals if signals is None else [name for name in signals
+                                                                        if name in recording.signals]
+                batch_size = max(1, min(_BATCH_SIZE, -(-len(names) // self._workers)))
+                for batch_start in range(0, len(names), batch_size):
+                    futures.append(pool.submit(_analyze_batch, file_path, recording_path,
+                                               names[batch_start:batch_start + batch_size], self.config, start, stop))
+            files = {file_path: {} for file_path in file_paths}
+            for future in concurrent.futures.as_completed(futures):
+                file_path, results = future.result()
+                files[file_path].update(results)
+        except Exception:
+            for future in futures:
+                future.cancel()
+            # running batches still read the decompressed files
+            concurrent.futures.wait(futures)
+            logger.exception("Could not analyze the recordings")
+            raise
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        summary = {"files": files, "config": self.config.to_dict(), "duration": time.perf_counter() - started}
+        if summary_path is not None:
+            temporary_path = summary_path + ".tmp"
+            with open(temporary_path, "w") as summary_file:
+                json.dump(summary, summary_file, separators=(",", ":"))
+            os.replace(temporary_path, summary_path)
+        logger.info("Analyzed %s signals in %.2f s", sum(len(results) for results in files.values()),
+                    summary["duration"])
+        return summary
+
+    def submit(self, file_paths, summary_path=None, signals=None, start=None, stop=None):
+        """ This function starts analyze() in the background
+        :return: concurrent.futures.Future of the summary
+        """
+        return self._background.submit(self.analyze, list(file_paths), summary_path, signals, start, stop)
+
+    def close(self, wait=True):
+        """ This function stops the background thread and the worker processes
+        :param wait: wait for submitted analyses to complete
+        :return: None
+        """
+        self._background.shutdown(wait=wait)
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
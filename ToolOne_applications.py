@@ -0,0 +1,84 @@
+import concurrent.futures
+import hashlib
+import logging
+import os
+from collections import namedtuple
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# identity of an application build: size and modification time are the fast path, sha256 decides
+ApplicationFingerprint = namedtuple("ApplicationFingerprint", ["name", "size", "mtime_ns", "sha256"])
+
+# bytes read per hash update
+_HASH_BLOCK_SIZE = 1 << 20
+
+# real path -> ApplicationFingerprint of every hashed application. An unchanged file (same size and mtime) is only
+# hashed once.
+_fingerprints = {}
+
+# hashes applications in the background, see prefetch_application()
+_prefetch_executor = None
+
+
+def _hash_file(file_path, digest):
+    with open(file_path, "rb") as application_file:
+        for block in iter(lambda: application_file.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+
+
+def _stat(real_path):
+    """ (size, mtime_ns) of a file, or the total size and latest mtime of the files of an application directory """
+    if not os.path.isdir(real_path):
+        stat = os.stat(real_path)
+        return stat.st_size, stat.st_mtime_ns
+    size = mtime_ns = 0
+    for directory, _, file_names in os.walk(real_path):
+        for file_name in file_names:
+            stat = os.stat(os.path.join(directory, file_name))
+            size += stat.st_size
+            mtime_ns = max(mtime_ns, stat.st_mtime_ns)
+    return size, mtime_ns
+
+
+def application_fingerprint(file_path):
+    """ This function returns the fingerprint of an application file (or application directory), hashing the content
+    only when size or modification time changed since the last call
+    :param file_path: path of the application
+    :return: ApplicationFingerprint
+    """
+    real_path = os.path.realpath(file_path)
+    size, mtime_ns = _stat(real_path)
+    cached = _fingerprints.get(real_path)
+    if cached is not None and cached.size == size and cached.mtime_ns == mtime_ns:
+        return cached
+
+    logger.debug("Hashing application %s...", real_path)
+    digest = hashlib.sha256()
+    if os.path.isdir(real_path):
+        for directory, directory_names, file_names in os.walk(real_path):
+            directory_names.sort()
+            for file_name in sorted(file_names):
+                path = os.path.join(directory, file_name)
+                digest.update(os.path.relpath(path, real_path).replace(os.sep, "/").encode("utf-8") + b"\0")
+                _hash_file(path, digest)
+    else:
+        _hash_file(real_path, digest)
+    fingerprint = ApplicationFingerprint(os.path.basename(os.path.normpath(file_path)), size, mtime_ns,
+                                         digest.hexdigest())
+    _fingerprints[real_path] = fingerprint
+    return fingerprint
+
+
+def prefetch_application(file_path):
+    """ This function validates and hashes an application in the background, e.g. the application of the next
+    scenario while the current one runs. Reading the file also brings it into the OS file cache for the load.
+    :param file_path: path of the application
+    :return: concurrent.futures.Future of the ApplicationFingerprint, failing for a missing or unreadable application
+    """
+    global _prefetch_executor
+
+    if _prefetch_executor is None:
+        _prefetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                                   thread_name_prefix="ToolOneApplicationPrefetch")
+    return _prefetch_executor.submit(application_fingerprint, file_path)
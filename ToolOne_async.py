@@ -0,0 +1,119 @@
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import logging
+
+from ToolOne_API_control_module import ToolOneControl, _com_initialize, _com_uninitialize
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+
+class AsyncToolOneControl(object):
+    """
+    asyncio facade of ToolOneControl. Every public ToolOneControl method is available as a coroutine with the same
+    arguments, e.g. ``await control.load_application_from_file(path)``.
+
+    All COM calls run on one apartment-threaded worker thread which creates and owns the ToolOne COM object, so
+    concurrent awaits are queued and executed one after the other in call order. Every call accepts the extra keyword
+    call_timeout (seconds, defaults to default_timeout). Cancelling (or timing out) an await removes a queued call;
+    a call already running inside ToolOne cannot be interrupted, it completes on the worker and its result is dropped.
+
+    Create instances with ``control = await AsyncToolOneControl.create(window_visible=False)``.
+
+    Args:
+        default_timeout: timeout of every call in seconds, None waits forever
+    """
+
+    def __init__(self, default_timeout=None):
+        self.default_timeout = default_timeout
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="ToolOne-STA",
+                                                               initializer=_com_initialize)
+        self._control = None
+
+    @classmethod
+    async def create(cls, *args, default_timeout=None, connect_timeout=None, **kwargs):
+        """ This function connects to ToolOne on a new worker thread
+        :param args: arguments of ToolOneControl
+        :param default_timeout: timeout of every following call in seconds
+        :param connect_timeout: timeout of the connection in seconds, defaults to default_timeout
+        :param kwargs: keyword arguments of ToolOneControl, e.g. call_timeout for its hang watchdog
+        :return: AsyncToolOneControl
+        """
+        async_control = cls(default_timeout)
+        try:
+            async_control._control = await async_control._submit(
+                functools.partial(ToolOneControl, *args, **kwargs),
+                connect_timeout if connect_timeout is not None else default_timeout)
+        except BaseException:
+            async_control._executor.shutdown(wait=False)
+            raise
+        return async_control
+
+    async def _submit(self, function, timeout):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, function)
+        # cancelling the asyncio future cancels the pending executor job as well
+        return await asyncio.wait_for(future, timeout)
+
+    async def call(self, method_name, *args, call_timeout=None, **kwargs):
+        """ This function runs a ToolOneControl method on the worker thread
+        :param method_name: name of the ToolOneControl method
+        :param call_timeout: timeout in seconds, defaults to default_timeout
+        :return: result of the method
+        """
+        if self._control is None:
+            raise RuntimeError("AsyncToolOneControl is not connected, use AsyncToolOneControl.create()")
+        method = getattr(self._control, method_name)
+        timeout = call_timeout if call_timeout is not None else self.default_timeout
+        try:
+            return await self._submit(functools.partial(method, *args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            logger.error("%s did not complete within %s s", method_name, timeout)
+            raise
+
+    async def run(self, function, *args, call_timeout=None):
+        """ This function runs function(control, *args) on the worker thread, for code which needs the underlying
+        ToolOneControl (e.g. to modify control.signals) without racing with queued calls.
+        :param function: callable taking the ToolOneControl as first argument
+        :param call_timeout: timeout in seconds, defaults to default_timeout
+        :return: result of function
+        """
+        timeout = call_timeout if call_timeout is not None else self.default_timeout
+        return await self._submit(functools.partial(function, self._control, *args), timeout)
+
+    async def aclose(self, close_ToolOne=False, save_changes=False):
+        """ This function stops the worker thread after all queued calls completed
+        :param close_ToolOne: quit ToolOne before stopping the worker
+        :param save_changes: save the project when quitting ToolOne
+        :return: None
+        """
+        try:
+            if close_ToolOne and self._control is not None:
+                await self.call("close_ToolOne", save_changes)
+        finally:
+            self._control = None
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, _com_uninitialize)
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+
+def _async_method(name, method):
+    @functools.wraps(method)
+    async def async_method(self, *args, call_timeout=None, **kwargs):
+        return await self.call(name, *args, call_timeout=call_timeout, **kwargs)
+    return async_method
+
+
+# mirror every public ToolOneControl method as coroutine
+for _name, _method in inspect.getmembers(ToolOneControl, inspect.isfunction):
+    if not _name.startswith("_"):
+        setattr(AsyncToolOneControl, _name, _async_method(_name, _method))
+del _name, _method
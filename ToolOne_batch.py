@@ -0,0 +1,380 @@
+"""
+Batch runner of scenario manifests.
+
+A manifest is a JSON (or, with PyYAML installed, YAML) file listing the scenarios, optionally with defaults shared by
+all of them. Relative paths are relative to the manifest:
+
+    {
+        "defaults": {"project": "Projects/Vehicle.CDP", "experiment": "Nightly", "trigger_rules": "Trigger",
+                     "duration": 30.0},
+        "scenarios": [
+            {"name": "brake_01", "application": "Apps/Brake.osa", "signal_file": "Signals/brake.signals"},
+            {"name": "steer_01", "application": "Apps/Steer.osa", "signal_file": "Signals/steer.signals"}
+        ]
+    }
+
+The scenarios are reordered so that project, experiment, application and signal set change as rarely as possible,
+then run one after the other (or on a ToolOneWorkerPool with --workers). Every result is appended to a checkpoint
+file as soon as it is known; when a batch is interrupted, running the same manifest again resumes with the
+scenarios which did not pass. At the end the results index is written as JSON and the checkpoint is removed, so the
+next run of the manifest runs all scenarios again.
+
+With --cache-dir, a scenario whose inputs (application content, signals, trigger rules, calibration parameters and
+run settings) match an earlier passing run is not run again; its recording is taken from the result cache. --force
+reruns it and replaces the cached result. --analyze adds the statistics of every recording to the results and to the
+cache, so a cached scenario is not analyzed again.
+
+    python ToolOne_batch.py nightly.json --results nightly_results.json --workers 4
+"""
+import argparse
+import collections
+import functools
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+
+from ToolOne_API_control_module import ToolOneControl, dispatch_new_ToolOne, logger_setup
+from ToolOne_pool import ToolOneWorkerPool
+from ToolOne_result_cache import ResultCache, scenario_key
+from ToolOne_scenario import Scenario, ScenarioResult, run_scenario
+from ToolOne_signals import SignalFileError
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# the checkpoint of a running batch is written next to the results index
+CHECKPOINT_SUFFIX = ".checkpoint.jsonl"
+# scenario fields holding paths, resolved relative to the manifest
+_PATH_FIELDS = ("project", "application", "signal_file")
+# scenario fields whose change between two consecutive scenarios costs a transition, most expensive first
+TRANSITION_FIELDS = ("project", "experiment", "application", "signal_file")
+
+
+def load_manifest(file_path):
+    """ This function reads the scenarios of a manifest
+    :param file_path: path of the JSON or YAML manifest
+    :return: list of Scenario in manifest order
+    """
+    with open(file_path, "r") as manifest_file:
+        if os.path.splitext(file_path)[1].lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML manifests require PyYAML")
+            manifest = yaml.safe_load(manifest_file)
+        else:
+            manifest = json.load(manifest_file)
+    if isinstance(manifest, list):
+        manifest = {"scenarios": manifest}
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    defaults = manifest.get("defaults", {})
+    scenarios = []
+    for entry in manifest["scenarios"]:
+        values = dict(defaults, **entry)
+        for field in _PATH_FIELDS:
+            if values.get(field) is not None:
+                values[field] = os.path.normpath(os.path.join(directory, values[field]))
+        scenarios.append(Scenario.from_dict(values))
+
+    counts = collections.Counter(scenario.name for scenario in scenarios)
+    duplicates = sorted(name for name, count in counts.items() if count > 1)
+    if duplicates:
+        raise ValueError("Duplicate scenario names in {}: {}".format(file_path, ", ".join(duplicates)))
+    return scenarios
+
+
+def order_scenarios(scenarios):
+    """ This function groups the scenarios by project, then experiment, application and signal set, so every
+    expensive transition happens once per group. Groups keep the order of their first scenario in the manifest and
+    scenarios keep their manifest order within a group.
+    :param scenarios: list of Scenario
+    :return: reordered list of Scenario
+    """
+    ranks = {}
+
+    def rank(key):
+        # position of the first appearance of a group key
+        return ranks.setdefault(key, len(ranks))
+
+    keys = []
+    for position, scenario in enumerate(scenarios):
+        values = tuple(getattr(scenario, field) for field in TRANSITION_FIELDS)
+        keys.append((tuple(rank(values[:depth]) for depth in range(1, len(values) + 1)), position))
+    return [scenarios[position] for _, position in sorted(keys)]
+
+
+def count_transitions(scenarios):
+    """ This function counts how often each transition field changes between consecutive scenarios
+    :param scenarios: list of Scenario in execution order
+    :return: dict field -> number of changes, the first scenario counting as a change
+    """
+    transitions = dict.fromkeys(TRANSITION_FIELDS, 0)
+    previous = None
+    for scenario in scenarios:
+        changed = previous is None
+        for field in TRANSITION_FIELDS:
+            # a change of a field also invalidates every field below it
+            changed = changed or getattr(scenario, field) != getattr(previous, field)
+            transitions[field] += changed
+        previous = scenario
+    return transitions
+
+
+def _result_entry(result):
+    return {"name": result.name, "recording_path": result.recording_path, "error": result.error,
+            "duration": result.duration, "worker": result.worker, "cached": result.cached}
+
+
+def load_results(results_path):
+    """ This function reads the results of an interrupted run of a batch from its checkpoint. The results index of a
+    completed run is not read, a completed batch has no checkpoint.
+    :param results_path: path of the results index
+    :return: dict scenario name -> result entry, the latest entry of every scenario
+    """
+    results = {}
+    checkpoint_path = results_path + CHECKPOINT_SUFFIX
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r") as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # last line of a batch that was killed while writing it
+                    break
+                results[entry["name"]] = entry
+    return results
+
+
+def _run_sequential(scenarios, dispatch, window_visible, standby, call_timeout):
+    """ Runs the scenarios one after the other on one ToolOneControl, prefetching the next application """
+    control = ToolOneControl(window_visible=window_visible, dispatch=dispatch, standby=standby,
+                             call_timeout=call_timeout)
+    try:
+        for position, scenario in enumerate(scenarios):
+            if position + 1 < len(scenarios) and scenarios[position + 1].application != scenario.application:
+                control.prefetch_application(scenarios[position + 1].application)
+            start = time.perf_counter()
+            try:
+                recording_path = run_scenario(control, scenario)
+                error = None
+            except Exception:
+                recording_path = None
+                error = traceback.format_exc()
+                try:
+                    control.restart_ToolOne(window_visible=window_visible)
+                except Exception:
+                    logger.exception("Could not restart ToolOne after scenario %s", scenario.name)
+            yield ScenarioResult(scenario.name, recording_path, error, time.perf_counter() - start, 0)
+    finally:
+        try:
+            control.close_ToolOne()
+        except Exception:
+            logger.exception("Could not close ToolOne after the batch")
+
+
+def _cache_lookup(cache, scenarios, force):
+    """ Splits the scenarios into the results found in the cache and the scenarios to run, with their cache keys and
+    the cached analysis summaries """
+    cached = []
+    keys = {}
+    summaries = {}
+    to_run = []
+    for scenario in scenarios:
+        try:
+            keys[scenario.name] = scenario_key(scenario)
+        except (OSError, SignalFileError):
+            # e.g. a missing application, the run reports it
+            logger.warning("No cache key for scenario %s, its inputs are not readable", scenario.name)
+            to_run.append(scenario)
+            continue
+        hit = None if force else cache.get(keys[scenario.name])
+        if hit is None:
+            to_run.append(scenario)
+        else:
+            cached.append(ScenarioResult(scenario.name, hit.recording_paths[0], None, 0.0, None, True))
+            if hit.summary is not None:
+                summaries[scenario.name] = hit.summary
+    return cached, keys, summaries, to_run
+
+
+def run_batch(scenarios, results_path, workers=1, resume=True, dispatch=None, window_visible=False, standby=False,
+              log_file=None, call_timeout=None, cache=None, force=False, analysis=None):
+    """ This function orders and runs a batch of scenarios, checkpointing every result, and writes the results index
+    :param scenarios: list of Scenario, e.g. load_manifest()
+    :param results_path: path of the results index (JSON)
+    :param workers: number of ToolOne processes, more than one runs the scenarios on a ToolOneWorkerPool
+    :param resume: skip the scenarios which passed in an interrupted earlier run with the same results path
+    :param dispatch: ToolOne backend, defaults to dispatch_ToolOne (dispatch_new_ToolOne for several workers)
+    :param window_visible: show the ToolOne windows
+    :param standby: keep a warm standby ToolOne for the restart after a failed scenario
+    :param log_file: log file of the pool workers
+    :param call_timeout: deadline of every ToolOneControl call [s], a hung ToolOne is killed and reconnected
+    :param cache: ResultCache; scenarios with a cached result are not run and passing results are stored
+    :param force: run the scenarios also when the cache has their result, and replace it
+    :param analysis: AnalysisConfig; the recording of every passing scenario is analyzed in the background and the
+        summary is added to its result entry ("analysis") and to the cache, cached summaries are reused
+    :return: results index dict {"summary": ..., "order": [...], "results": [...]}
+    """
+    started = time.time()
+    ordered = order_scenarios(scenarios)
+    logger.info("Transitions in manifest order: %s, after ordering: %s", count_transitions(scenarios),
+                count_transitions(ordered))
+
+    previous = load_results(results_path) if resume else {}
+    pending = [scenario for scenario in ordered
+               if scenario.name not in previous or previous[scenario.name]["error"] is not None]
+    logger.info("Running %s of %s scenarios (%s passed earlier)...", len(pending), len(ordered),
+                len(ordered) - len(pending))
+    cached, keys, summaries, to_run = _cache_lookup(cache, pending, force) if cache is not None else \
+        ([], {}, {}, pending)
+    analyzer = None
+    if analysis is not None:
+        # imported here, the analysis requires numpy
+        from ToolOne_analysis import RecordingAnalyzer
+        analyzer = RecordingAnalyzer(analysis)
+    # scenario name -> Future of the analysis summary
+    analyses = {}
+    if cache is not None:
+        logger.info("%s scenarios have a cached result", len(cached))
+
+    results = dict(previous)
+    checkpoint_path = results_path + CHECKPOINT_SUFFIX
+    with open(checkpoint_path, "a" if resume else "w") as checkpoint_file:
+        if not to_run:
+            # nothing to run, ToolOne is not started
+            pool = None
+            outcomes = ()
+        elif workers > 1:
+            pool = ToolOneWorkerPool(workers, dispatch=dispatch if dispatch is not None else dispatch_new_ToolOne,
+                                     window_visible=window_visible, standby=standby, log_file=log_file,
+                                     call_timeout=call_timeout)
+            outcomes = pool.run(to_run)
+        else:
+            pool = None
+            outcomes = _run_sequential(to_run, dispatch, window_visible, standby, call_timeout)
+        try:
+            for number, result in enumerate(itertools.chain(cached, outcomes), 1):
+                if not result.cached and result.error is None and result.name in keys:
+                    try:
+                        cache.put(keys[result.name], [result.recording_path])
+                    except Exception:
+                        logger.exception("Could not cache the result of scenario %s", result.name)
+                entry = _result_entry(result)
+                if analyzer is not None and result.error is None:
+                    if result.name in summaries:
+                        entry["analysis"] = summaries[result.name]
+                    else:
+                        analyses[result.name] = analyzer.submit([result.recording_path])
+                results[result.name] = entry
+                checkpoint_file.write(json.dumps(entry) + "\n")
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+                logger.info("[%s/%s] %s %s in %.1f s", number, len(pending), result.name,
+                            "cached" if result.cached else "passed" if result.error is None else "FAILED",
+                            result.duration)
+        finally:
+            if pool is not None:
+                pool.close()
+
+    try:
+        for name, future in analyses.items():
+            try:
+                summary = future.result()
+            except Exception:
+                logger.exception("Could not analyze the recording of scenario %s", name)
+                continue
+            results[name]["analysis"] = summary
+            if name in keys:
+                cache.set_summary(keys[name], summary)
+    finally:
+        if analyzer is not None:
+            analyzer.close()
+
+    index_entries = [results[scenario.name] for scenario in ordered if scenario.name in results]
+    failed = sum(entry["error"] is not None for entry in index_entries)
+    index = {"summary": {"total": len(ordered), "passed": len(index_entries) - failed, "failed": failed,
+                         "not_run": len(ordered) - len(index_entries), "cached": len(cached), "started": started,
+                         "duration": time.time() - started},
+             "order": [scenario.name for scenario in ordered],
+             "results": index_entries}
+    temporary_path = results_path + ".tmp"
+    with open(temporary_path, "w") as results_file:
+        json.dump(index, results_file, indent=2)
+    os.replace(temporary_path, results_path)
+    os.remove(checkpoint_path)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest", help="JSON or YAML scenario manifest")
+    parser.add_argument("--results", help="results index to write, defaults to <manifest>.results.json")
+    parser.add_argument("--workers", type=int, default=1, help="number of ToolOne processes running scenarios")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="rerun all scenarios of an interrupted batch, also those which passed")
+    parser.add_argument("--standby", action="store_true", help="keep a warm standby ToolOne for fast restarts")
+    parser.add_argument("--window-visible", action="store_true", help="show the ToolOne windows")
+    parser.add_argument("--call-timeout", type=float,
+                        help="deadline of every ToolOne call [s], a hung ToolOne is killed and reconnected")
+    parser.add_argument("--log-file", help="log file, every worker writes its own file next to it")
+    parser.add_argument("--cache-dir", help="result cache, scenarios with unchanged inputs are taken from it")
+    parser.add_argument("--cache-max-size", type=float, help="maximum size of the result cache [GiB]")
+    parser.add_argument("--cache-max-age", type=float, help="maximum age of a cached result [days]")
+    parser.add_argument("--force", action="store_true", help="rerun the scenarios which have a cached result")
+    parser.add_argument("--analyze", action="store_true",
+                        help="add the statistics of every recording to the results (and the result cache)")
+    parser.add_argument("--simulator", action="store_true",
+                        help="run against the ToolOne simulator, which writes its recordings next to the results")
+    parser.add_argument("--simulator-samples", type=int, default=1000,
+                        help="samples per signal of a simulated recording")
+    parser.add_argument("--dry-run", action="store_true", help="only print the execution order")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.simulator_samples < 1:
+        parser.error("--simulator-samples must be at least 1")
+
+    logger_setup(args.log_file, asynchronous=True)
+    scenarios = load_manifest(args.manifest)
+    if args.dry_run:
+        ordered = order_scenarios(scenarios)
+        for scenario in ordered:
+            print(scenario.name)
+        print("transitions: manifest order {}, execution order {}".format(count_transitions(scenarios),
+                                                                          count_transitions(ordered)))
+        return 0
+
+    results_path = args.results or os.path.splitext(args.manifest)[0] + ".results.json"
+    dispatch = None
+    if args.simulator:
+        from ToolOne_simulator import SimulatedToolOne, SimulatorConfig
+        # the simulator writes real recordings, so the result cache and the analysis have files to work on
+        recording_dir = os.path.splitext(results_path)[0] + "_recordings"
+        os.makedirs(recording_dir, exist_ok=True)
+        dispatch = functools.partial(SimulatedToolOne, SimulatorConfig(recording_dir=recording_dir,
+                                                                       recording_samples=args.simulator_samples))
+    cache = None
+    if args.cache_dir:
+        cache = ResultCache(args.cache_dir,
+                            max_bytes=int(args.cache_max_size * 2 ** 30) if args.cache_max_size else None,
+                            max_age=args.cache_max_age * 86400 if args.cache_max_age else None)
+    analysis = None
+    if args.analyze:
+        from ToolOne_analysis import AnalysisConfig
+        analysis = AnalysisConfig()
+    index = run_batch(scenarios, results_path, workers=args.workers, resume=not args.no_resume, dispatch=dispatch,
+                      window_visible=args.window_visible, standby=args.standby, log_file=args.log_file,
+                      call_timeout=args.call_timeout, cache=cache, force=args.force, analysis=analysis)
+    summary = index["summary"]
+    print("{} scenarios: {} passed ({} cached), {} failed, {} not run. Results: {}".format(
+        summary["total"], summary["passed"], summary["cached"], summary["failed"], summary["not_run"], results_path))
+    return 1 if summary["failed"] or summary["not_run"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
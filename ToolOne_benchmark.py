@@ -0,0 +1,253 @@
+"""
+Benchmark suite of ToolOne_API_control_module, running against the in-process ToolOne simulator so it can be used in
+CI on any platform.
+
+Every benchmark reports the wall-clock time and the number of simulated COM round-trips. The round-trip count does not
+depend on the machine, so it is the stable regression signal; the timing uses the configured per-call latency.
+
+    python ToolOne_benchmark.py --latency 0.0005 --json results.json
+    python ToolOne_benchmark.py --baseline results.json --tolerance 0.25
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import ToolOne_API_control_module
+from ToolOne_API_control_module import ToolOneControl
+from ToolOne_signals import SignalSet
+from ToolOne_simulator import SimulatedToolOne, SimulatorConfig
+
+PROJECT_PATH = r"C:\Projects\Benchmark\Benchmark.CDP"
+EXPERIMENT_NAME = "Experiment"
+# applications are hashed when they are loaded, so the benchmark needs a real file of a typical size
+APPLICATION_PATH = os.path.join(tempfile.gettempdir(), "ToolOne_benchmark", "Application.osa")
+APPLICATION_SIZE = 16 << 20
+TRIGGER_RULE = "Trigger"
+
+
+def _signal_names(count):
+    return ["Model/Subsystem{}/Block{}/Signal{}".format(index // 1000, index // 50, index) for index in range(count)]
+
+
+def _write_application():
+    if os.path.isfile(APPLICATION_PATH) and os.path.getsize(APPLICATION_PATH) == APPLICATION_SIZE:
+        return
+    os.makedirs(os.path.dirname(APPLICATION_PATH), exist_ok=True)
+    with open(APPLICATION_PATH, "wb") as application_file:
+        application_file.write(bytes(range(256)) * (APPLICATION_SIZE // 256))
+
+
+def _prepared_control(config):
+    control = ToolOneControl(dispatch=lambda: SimulatedToolOne(config))
+    control.open_project(PROJECT_PATH)
+    control.activate_experiment(EXPERIMENT_NAME)
+    control.load_application_from_file(APPLICATION_PATH)
+    return control
+
+
+def _set_signals(control, signal_count):
+    control.signals = SignalSet(_signal_names(signal_count))
+
+
+def bench_connect(config, args):
+    def setup():
+        return None
+
+    def run(_):
+        return ToolOneControl(dispatch=lambda: SimulatedToolOne(config))
+    return setup, run
+
+
+def bench_open_session(config, args):
+    def setup():
+        return ToolOneControl(dispatch=lambda: SimulatedToolOne(config))
+
+    def run(control):
+        control.open_project(PROJECT_PATH)
+        control.activate_experiment(EXPERIMENT_NAME)
+        control.load_application_from_file(APPLICATION_PATH)
+    return setup, run
+
+
+def bench_start_running_test(config, args):
+    def setup():
+        return _prepared_control(config)
+
+    def run(control):
+        control.start_running_test(True, TRIGGER_RULE, True, True)
+    return setup, run
+
+
+def bench_set_signals_to_record(config, args):
+    def setup():
+        control = _prepared_control(config)
+        _set_signals(control, args.signals)
+        return control
+
+    def run(control):
+        control.set_signals_to_record()
+    return setup, run
+
+
+def bench_set_signals_to_record_incremental(config, args):
+    def setup():
+        control = _prepared_control(config)
+        _set_signals(control, args.signals)
+        control.set_signals_to_record(incremental=True)
+        # a repeated scenario changing one percent of its signals
+        changed = max(1, args.signals // 100)
+        control.signals = SignalSet(_signal_names(args.signals + changed)[2 * changed:])
+        return control
+
+    def run(control):
+        control.set_signals_to_record(incremental=True)
+    return setup, run
+
+
+def bench_stop_recording_and_measuring(config, args):
+    def setup():
+        control = _prepared_control(config)
+        control.start_running_test(True, TRIGGER_RULE, True, True)
+        return control
+
+    def run(control):
+        control.stop_recording_and_measuring()
+        control.get_recording_path()
+    return setup, run
+
+
+def bench_close_ToolOne(config, args):
+    def setup():
+        control = _prepared_control(config)
+        control.start_application_on_platform()
+        return control
+
+    def run(control):
+        control.close_ToolOne()
+    return setup, run
+
+
+def bench_full_scenario(config, args):
+    def setup():
+        control = ToolOneControl(dispatch=lambda: SimulatedToolOne(config))
+        _set_signals(control, args.signals)
+        return control
+
+    def run(control):
+        control.open_project(PROJECT_PATH)
+        control.activate_experiment(EXPERIMENT_NAME)
+        control.load_application_from_file(APPLICATION_PATH)
+        control.set_signals_to_record()
+        control.start_running_test(True, TRIGGER_RULE, True, True)
+        control.stop_recording_and_measuring()
+        control.get_recording_path()
+        control.close_ToolOne()
+    return setup, run
+
+
+BENCHMARKS = {
+    "connect": bench_connect,
+    "open_session": bench_open_session,
+    "start_running_test": bench_start_running_test,
+    "set_signals_to_record": bench_set_signals_to_record,
+    "set_signals_to_record_incremental": bench_set_signals_to_record_incremental,
+    "stop_recording_and_measuring": bench_stop_recording_and_measuring,
+    "close_ToolOne": bench_close_ToolOne,
+    "full_scenario": bench_full_scenario,
+}
+
+
+def _com_calls(control):
+    if control is None or control._instance is None:
+        return 0
+    return control._instance.call_count()
+
+
+def run_benchmark(name, config, args):
+    """ This function runs one benchmark args.repeat times, each time on a fresh simulated ToolOne
+    :return: dict with the timings in seconds and the COM round-trips of one run
+    """
+    setup, run = BENCHMARKS[name](config, args)
+    timings = []
+    com_calls = 0
+    for _ in range(args.repeat):
+        control = setup()
+        calls_before = _com_calls(control)
+        start = time.perf_counter()
+        result = run(control)
+        timings.append(time.perf_counter() - start)
+        # a benchmark without setup object creates its control in run()
+        com_calls = _com_calls(control if control is not None else result) - calls_before
+    return {"min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.mean(timings),
+            "repeat": args.repeat,
+            "com_calls": com_calls}
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """ This function compares benchmark results with a baseline run
+    :return: list of regression messages, empty when there is no regression
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["com_calls"] > reference["com_calls"]:
+            regressions.append("{}: {} COM round-trips, baseline {}".format(name, result["com_calls"],
+                                                                           reference["com_calls"]))
+        if result["median"] > reference["median"] * (1 + tolerance):
+            regressions.append("{}: median {:.4f}s, baseline {:.4f}s".format(name, result["median"],
+                                                                            reference["median"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks to run, all when omitted: {}".format(
+        ", ".join(BENCHMARKS)))
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated latency of one COM round-trip [s]")
+    parser.add_argument("--signals", type=int, default=10000, help="number of signals to record")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument("--bulk-signal-api", action="store_true",
+                        help="simulate a ToolOne providing the bulk AddRange/InsertRange signal methods")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown of the median")
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmarks: {}".format(", ".join(sorted(unknown))))
+
+    # the control module logs every call, which would dominate the timings
+    logging.getLogger(ToolOne_API_control_module.__name__).setLevel(logging.WARNING)
+
+    _write_application()
+    config = SimulatorConfig(latency=args.latency, bulk_signal_api=args.bulk_signal_api)
+    results = {}
+    for name in args.benchmarks or list(BENCHMARKS):
+        results[name] = result = run_benchmark(name, config, args)
+        print("{:<36} median {:9.4f}s  min {:9.4f}s  {:7d} COM calls".format(name, result["median"], result["min"],
+                                                                           result["com_calls"]))
+
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_with_baseline(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
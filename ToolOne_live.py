@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # checked by SignalRingBuffer
+    np = None
+
+from ToolOne_API_control_module import _SignalReader, _com_initialize, _com_uninitialize, _marshal, _unmarshal
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# interval of the IsMeasuring check of a running acquisition [s]
+_MEASURING_CHECK_INTERVAL = 1.0
+
+
+class SignalRingBuffer(object):
+    """
+    Preallocated ring buffer of the latest samples of a fixed set of signals. Appending overwrites the oldest sample
+    once capacity samples were written, so memory use does not grow with the measurement duration.
+
+    Args:
+        signals: signal names, one buffer column per signal
+        capacity: number of samples kept per signal
+        dtype: numpy dtype of the values
+    """
+
+    def __init__(self, signals, capacity, dtype="float64"):
+        if np is None:
+            raise ImportError("The live signal buffer requires numpy")
+        if capacity < 1:
+            raise ValueError("The capacity must be at least 1")
+        self.signals = tuple(signals)
+        self.capacity = capacity
+        self._columns = {signal: column for column, signal in enumerate(self.signals)}
+        self._times = np.zeros(capacity)
+        self._values = np.zeros((capacity, len(self.signals)), dtype=dtype)
+        # number of samples appended since creation, the next sample goes to row _count % capacity
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def total(self):
+        """ number of samples appended since creation, including the overwritten ones """
+        return self._count
+
+    def append(self, timestamp, values):
+        """ This function stores one sample of every signal
+        :param timestamp: time of the sample [s]
+        :param values: values in the order of signals
+        :return: None
+        """
+        with self._lock:
+            row = self._count % self.capacity
+            self._times[row] = timestamp
+            self._values[row] = values
+            self._count += 1
+
+    def latest(self, count=None, signal=None):
+        """ This function returns copies of the latest samples in chronological order
+        :param count: number of samples, all buffered samples when omitted
+        :param signal: name of one signal, all signals when omitted
+        :return: (times, values), values has one column per signal or is 1-D for one signal
+        """
+        with self._lock:
+            available = min(self._count, self.capacity)
+            count = available if count is None else min(count, available)
+            rows = np.arange(self._count - count, self._count) % self.capacity
+            values = self._values[rows] if signal is None else self._values[rows, self._columns[signal]]
+            return self._times[rows], values
+
+
+class LiveAcquisition(object):
+    """
+    Reads a subset of the measured signals at a fixed rate while the measurement is running, on a background thread
+    with its own COM apartment. Every sample (all signals read in one batched read per platform) is appended to a
+    SignalRingBuffer and passed to the subscribers, which can evaluate conditions online and abort() a failing
+    scenario instead of waiting for the end of the recording.
+
+        with LiveAcquisition(control, ["Model/Speed", "Model/Torque"], rate=50.0) as acquisition:
+            acquisition.subscribe(lambda timestamp, values: values[0] > 250.0 and acquisition.abort("overspeed"))
+            if acquisition.wait(duration):
+                ...  # aborted, see acquisition.abort_reason
+
+    Callbacks run on the acquisition thread and must return quickly; a sample period missed because reads or
+    callbacks took too long is skipped and counted in overruns. The acquisition stops by itself when the measurement
+    stops. Use stream() to consume the samples from a coroutine instead.
+
+    Args:
+        control: ToolOneControl with a running measurement
+        signals: paths of the signals to read
+        rate: samples per second
+        capacity: samples kept per signal in buffer, defaults to 60 s of samples
+    """
+
+    def __init__(self, control, signals, rate=10.0, capacity=None):
+        if rate <= 0:
+            raise ValueError("The rate must be positive")
+        self._control = control
+        self.rate = rate
+        self.buffer = SignalRingBuffer(signals, capacity or int(60 * rate) or 1)
+        self.overruns = 0
+        self.abort_reason = None
+        self.error = None
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._finished = threading.Event()
+        self._thread = None
+
+    @property
+    def signals(self):
+        return self.buffer.signals
+
+    @property
+    def aborted(self):
+        return self.abort_reason is not None
+
+    def subscribe(self, callback):
+        """ This function registers callback(timestamp, values) called with every sample
+        :param callback: callable, values are in the order of signals
+        :return: callback, for unsubscribe()
+        """
+        with self._subscribers_lock:
+            self._subscribers = self._subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._subscribers_lock:
+            self._subscribers = [subscriber for subscriber in self._subscribers if subscriber is not callback]
+
+    def start(self):
+        """ This function starts reading the signals, the measurement must be running
+        :return: self
+        """
+        if self._thread is not None:
+            raise RuntimeError("The acquisition was already started")
+        logger.info("Starting live acquisition of %s signals at %s Hz...", len(self.signals), self.rate)
+        # the COM object is marshaled here, in the apartment of the control, and unmarshaled by the acquisition thread
+        self._thread = threading.Thread(target=self._run, args=(_marshal(self._control._instance),),
+                                        name="ToolOne-live", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self, marshaled):
+        _com_initialize()
+        try:
+            instance = _unmarshal(marshaled)
+            reader = _SignalReader(instance)
+            measurement_data_management = instance.MeasurementDataManagement
+            period = 1.0 / self.rate
+            started = time.perf_counter()
+            next_check = started + _MEASURING_CHECK_INTERVAL
+            deadline = started
+            while not self._stopping.is_set():
+                values = reader.read(self.signals)
+                now = time.perf_counter()
+                timestamp = now - started
+                self.buffer.append(timestamp, values)
+                for callback in self._subscribers:
+                    callback(timestamp, values)
+                if now >= next_check:
+                    next_check = now + _MEASURING_CHECK_INTERVAL
+                    if not measurement_data_management.IsMeasuring:
+                        logger.info("Measurement stopped, ending live acquisition")
+                        break
+                deadline += period
+                now = time.perf_counter()
+                if deadline < now:
+                    missed = int((now - deadline) / period) + 1
+                    self.overruns += missed
+                    deadline += missed * period
+                self._stopping.wait(deadline - now)
+        except Exception as error:
+            self.error = error
+            logger.exception("Live acquisition failed")
+            self.abort("acquisition failed: {}".format(error))
+        finally:
+            self._finished.set()
+            _com_uninitialize()
+            logger.info("Live acquisition ended after %s samples (%s overruns)", self.buffer.total, self.overruns)
+
+    def abort(self, reason):
+        """ This function stops the acquisition and marks it as aborted, e.g. from a subscriber detecting a failure.
+        Only the first reason is kept.
+        :param reason: description of the failure
+        :return: None
+        """
+        if self.abort_reason is None:
+            self.abort_reason = reason
+            logger.warning("Live acquisition aborted: %s", reason)
+        self._stopping.set()
+
+    def wait(self, timeout=None):
+        """ This function waits until the timeout elapsed or the acquisition ended early
+        :param timeout: time to wait [s], None waits until the acquisition ends
+        :return: True if the acquisition was aborted
+        """
+        self._finished.wait(timeout)
+        return self.aborted
+
+    def stop(self):
+        """ This function stops the acquisition and waits for the thread to end
+        :return: None
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    async def stream(self):
+        """ This function yields every following sample as (timestamp, values) until the acquisition ends
+        :return: async iterator
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def forward(timestamp, values):
+            loop.call_soon_threadsafe(queue.put_nowait, (timestamp, values))
+
+        self.subscribe(forward)
+        # wakes the iterator when the acquisition ends
+        finished = loop.run_in_executor(None, self._finished.wait)
+        finished.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                sample = await queue.get()
+                if sample is None:
+                    break
+                yield sample
+        finally:
+            self.unsubscribe(forward)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,376 @@
+"""
+Latency instrumentation of ToolOneControl.
+
+When enabled, every public method of the instrumented classes and every COM invocation made through an
+InstrumentedComObject is timed. The registry keeps call counts, error counts and latency histograms per name and
+exports them as JSON or in the Prometheus text format; trace() additionally records a timeline of one scenario.
+
+Disabled instrumentation costs nothing: the method wrappers are only installed while the registry is enabled, and
+ToolOneControl only wraps its COM object when the registry is enabled at connect time.
+
+    from ToolOne_metrics import metrics
+    metrics.enable()
+    control = ToolOneControl()
+    with metrics.trace("scenario_01") as trace:
+        control.start_running_test(True, "Trigger", True, True)
+    trace.write_chrome_trace("scenario_01_trace.json")
+    metrics.write_prometheus("toolone.prom")
+"""
+import bisect
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import types
+from collections import namedtuple
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# upper bounds of the latency histogram buckets [s]: 10 us to ~1700 s in steps of 2^(1/4)
+BUCKET_BOUNDS = tuple(1e-5 * 2 ** (index / 4.0) for index in range(110))
+
+# one timed call of a trace; start is relative to the beginning of the trace [s]
+TraceEvent = namedtuple("TraceEvent", ["kind", "name", "start", "duration", "error", "thread"])
+
+# values returned by COM calls which are passed through without wrapping
+_PLAIN_TYPES = (type(None), bool, int, float, complex, str, bytes, tuple, list)
+_METHOD_TYPES = (types.MethodType, types.FunctionType, types.BuiltinFunctionType, types.BuiltinMethodType,
+                 functools.partial)
+
+
+class LatencyHistogram(object):
+    """
+    Count, error count, total time and log-bucketed latency distribution of one method or COM member.
+    """
+    __slots__ = ("count", "errors", "total", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        # one extra bucket for latencies above the last bound
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, seconds, error):
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def percentile(self, fraction):
+        """ upper bound of the bucket containing the given fraction of the calls [s] """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.buckets):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(BUCKET_BOUNDS[index], self.maximum) if index < len(BUCKET_BOUNDS) else self.maximum
+        return self.maximum
+
+    def to_dict(self):
+        return {"count": self.count,
+                "errors": self.errors,
+                "error_rate": self.errors / self.count if self.count else 0.0,
+                "total": self.total,
+                "mean": self.total / self.count if self.count else 0.0,
+                "max": self.maximum,
+                "p50": self.percentile(0.50),
+                "p95": self.percentile(0.95),
+                "p99": self.percentile(0.99)}
+
+
+class Trace(object):
+    """
+    Timeline of the calls made while a trace is active, see MetricsRegistry.trace().
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.events = []
+        self._origin = time.perf_counter()
+
+    def add(self, kind, name, start, duration, error):
+        self.events.append(TraceEvent(kind, name, start - self._origin, duration, error, threading.get_ident()))
+
+    def to_chrome_trace(self):
+        """ This function converts the timeline to the Chrome trace event format (chrome://tracing, Perfetto)
+        :return: dict
+        """
+        return {"displayTimeUnit": "ms",
+                "otherData": {"trace": self.name},
+                "traceEvents": [{"name": event.name, "cat": event.kind, "ph": "X", "pid": os.getpid(),
+                                 "tid": event.thread, "ts": event.start * 1e6, "dur": event.duration * 1e6,
+                                 "args": {"error": event.error}} for event in self.events]}
+
+    def write_chrome_trace(self, file_path):
+        with open(file_path, "w") as trace_file:
+            json.dump(self.to_chrome_trace(), trace_file)
+
+
+class MetricsRegistry(object):
+    """
+    Collects the latency histograms of instrumented methods ("method") and COM invocations ("com").
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._trace = None
+        # instrumented class -> {method name: original function}
+        self._classes = {}
+
+    def enable(self):
+        """ This function starts collecting metrics and installs the method wrappers of the instrumented classes
+        :return: None
+        """
+        with self._lock:
+            self.enabled = True
+            for cls, originals in self._classes.items():
+                for name, function in originals.items():
+                    setattr(cls, name, _timed_method(self, "{}.{}".format(cls.__name__, name), function))
+
+    def disable(self):
+        """ This function stops collecting metrics and restores the original methods
+        :return: None
+        """
+        with self._lock:
+            self.enabled = False
+            for cls, originals in self._classes.items():
+                for name, function in originals.items():
+                    setattr(cls, name, function)
+
+    def instrument_class(self, cls):
+        """ This function registers the public methods of a class for instrumentation
+        :param cls: class, e.g. ToolOneControl
+        :return: cls
+        """
+        originals = {name: member for name, member in vars(cls).items()
+                     if not name.startswith("_") and isinstance(member, types.FunctionType)}
+        with self._lock:
+            self._classes[cls] = originals
+        if self.enabled:
+            self.enable()
+        return cls
+
+    def record(self, kind, name, start, duration, error=False):
+        """ This function adds one timed call
+        :param kind: "method" or "com"
+        :param name: method or COM member name
+        :param start: time.perf_counter() at the start of the call
+        :param duration: duration of the call [s]
+        :param error: the call raised an exception
+        :return: None
+        """
+        key = (kind, name)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.add(duration, error)
+            if self._trace is not None:
+                self._trace.add(kind, name, start, duration, error)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def trace(self, name):
+        """ This function records a timeline of all calls until the returned context manager exits
+        :param name: name of the trace, e.g. the scenario name
+        :return: context manager returning a Trace
+        """
+        return _TraceContext(self, name)
+
+    def to_dict(self):
+        """ This function returns the collected metrics
+        :return: {"method": {name: statistics}, "com": {name: statistics}}
+        """
+        with self._lock:
+            items = [(key, histogram.to_dict()) for key, histogram in self._histograms.items()]
+        result = {"method": {}, "com": {}}
+        for (kind, name), statistics in sorted(items):
+            result.setdefault(kind, {})[name] = statistics
+        return result
+
+    def write_json(self, file_path):
+        with open(file_path, "w") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=1, sort_keys=True)
+
+    def to_prometheus(self, prefix="toolone"):
+        """ This function exports the metrics in the Prometheus text exposition format, as one histogram per kind
+        with labels for the method/member name and a counter of the errors
+        :return: str
+        """
+        with self._lock:
+            items = sorted((key, histogram.count, histogram.errors, histogram.total, list(histogram.buckets))
+                           for key, histogram in self._histograms.items())
+        lines = []
+        for kind in ("method", "com"):
+            metric = "{}_{}_call_seconds".format(prefix, kind)
+            lines.append("# HELP {} Latency of ToolOne {} calls.".format(metric, kind))
+            lines.append("# TYPE {} histogram".format(metric))
+            errors = []
+            for (item_kind, name), count, error_count, total, buckets in items:
+                if item_kind != kind:
+                    continue
+                label = 'name="{}"'.format(_escape_label(name))
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKET_BOUNDS, buckets):
+                    cumulative += bucket_count
+                    if bucket_count:
+                        lines.append('{}_bucket{{{},le="{:.6g}"}} {}'.format(metric, label, bound, cumulative))
+                lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(metric, label, count))
+                lines.append("{}_sum{{{}}} {!r}".format(metric, label, total))
+                lines.append("{}_count{{{}}} {}".format(metric, label, count))
+                errors.append((label, error_count))
+            error_metric = "{}_{}_errors_total".format(prefix, kind)
+            lines.append("# HELP {} Failed ToolOne {} calls.".format(error_metric, kind))
+            lines.append("# TYPE {} counter".format(error_metric))
+            lines.extend("{}{{{}}} {}".format(error_metric, label, error_count) for label, error_count in errors)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, file_path, prefix="toolone"):
+        """ This function writes the metrics for the Prometheus node exporter textfile collector; the file is
+        replaced atomically so the collector never reads a partial file
+        :return: None
+        """
+        temporary_path = file_path + ".tmp"
+        with open(temporary_path, "w") as metrics_file:
+            metrics_file.write(self.to_prometheus(prefix))
+        os.replace(temporary_path, file_path)
+
+
+class _TraceContext(object):
+
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._trace = Trace(name)
+
+    def __enter__(self):
+        self._registry._trace = self._trace
+        return self._trace
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._registry._trace = None
+
+
+def _escape_label(value):
+    return re.sub(r'(["\\])', r"\\\1", value).replace("\n", "\\n")
+
+
+def _timed_method(registry, name, function):
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            registry.record("method", name, start, time.perf_counter() - start, True)
+            raise
+        registry.record("method", name, start, time.perf_counter() - start)
+        return result
+    return timed
+
+
+def _unwrap(value):
+    if isinstance(value, InstrumentedComObject):
+        return object.__getattribute__(value, "_target")
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+class InstrumentedComObject(object):
+    """
+    Proxy of a COM object timing every property read/write, method call, item lookup and enumeration. Sub-objects
+    returned by the calls are proxied as well; the name of a call is its path below the root object, e.g.
+    "Application.MeasurementDataManagement.Recorders[].Start".
+
+    Args:
+        target: COM object
+        registry: MetricsRegistry
+        path: name of the object in the metrics
+    """
+    __slots__ = ("_target", "_registry", "_path")
+
+    def __init__(self, target, registry, path):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_path", path)
+
+    def _wrap(self, value, path):
+        if isinstance(value, _PLAIN_TYPES):
+            return value
+        return InstrumentedComObject(value, self._registry, path)
+
+    def _timed(self, name, function, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except BaseException:
+            self._registry.record("com", name, start, time.perf_counter() - start, True)
+            raise
+        self._registry.record("com", name, start, time.perf_counter() - start)
+        return result
+
+    def __getattr__(self, name):
+        path = self._path + "." + name
+        value = self._timed(path, getattr, self._target, name)
+        if isinstance(value, _METHOD_TYPES):
+            return functools.partial(self._call_method, path, value)
+        return self._wrap(value, path)
+
+    def _call_method(self, path, method, *args, **kwargs):
+        args = [_unwrap(arg) for arg in args]
+        kwargs = {key: _unwrap(value) for key, value in kwargs.items()}
+        return self._wrap(self._timed(path, method, *args, **kwargs), path)
+
+    def __setattr__(self, name, value):
+        self._timed(self._path + "." + name, setattr, self._target, name, _unwrap(value))
+
+    def __getitem__(self, key):
+        path = self._path + "[]"
+        return self._wrap(self._timed(path, lambda: self._target[key]), path)
+
+    def __iter__(self):
+        path = self._path + "[]"
+        for item in self._timed(self._path + "._NewEnum", lambda: list(self._target)):
+            yield self._wrap(item, path)
+
+    def __len__(self):
+        return len(self._target)
+
+    def __bool__(self):
+        return True
+
+    def __call__(self, *args, **kwargs):
+        return self._call_method(self._path + "()", self._target, *args, **kwargs)
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __ne__(self, other):
+        return self._target != _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return "InstrumentedComObject({!r})".format(self._target)
+
+
+# registry used by ToolOneControl
+metrics = MetricsRegistry()
+
+if os.environ.get("TOOLONE_METRICS", "").lower() in ("1", "true", "yes"):
+    metrics.enable()
@@ -0,0 +1,219 @@
+import logging
+import os
+from collections import namedtuple
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# values of RealTimeApplication.State
+APPLICATION_STATE_UNLOADED = 0
+APPLICATION_STATE_LOADED = 1
+APPLICATION_STATE_RUNNING = 2
+APPLICATION_STATE_PAUSED = 3
+
+# values of CalibrationManagement.State
+CALIBRATION_STATE_OFFLINE = 0
+CALIBRATION_STATE_ONLINE = 1
+
+# recorder settings used by DesiredState.recorder_armed, the arguments of start_running_test
+RecorderSettings = namedtuple("RecorderSettings", ["enable_state", "trigger_rules", "with_trigger",
+                                                   "overwrite_existing"])
+
+# state of a ToolOne instance as read by read_state(); application is the name of the application on platform 0,
+# application_outdated is set when it has the desired name but another build is loaded, recorder_settings are the
+# RecorderSettings of the running recording (None while the recorder is stopped)
+ToolOneState = namedtuple("ToolOneState", ["project_path", "experiment", "application", "application_state",
+                                           "calibration_state", "is_measuring", "application_outdated",
+                                           "recorder_settings"],
+                          defaults=(False, None))
+
+# one operation of a plan: ToolOneControl method with its arguments and the estimated duration in seconds
+PlanStep = namedtuple("PlanStep", ["method", "args", "kwargs", "cost", "reason"])
+
+# rough duration of the ToolOneControl operations in seconds, used for the plan estimate
+DEFAULT_STEP_COSTS = {
+    "open_project": 20.0,
+    "activate_experiment": 5.0,
+    "unload_application_from_platform": 5.0,
+    "load_application_from_file": 30.0,
+    "set_signals_to_record": 0.0005,  # per signal
+    "stop_online_calibration": 2.0,
+    "start_online_calibration": 5.0,
+    "start_application_on_platform": 2.0,
+    "stop_application_on_platform": 1.0,
+    "arm_recorder": 0.5,
+    "stop_recording_measurement": 0.2,
+    "stop_recording_and_measuring": 0.5,
+}
+
+
+class DesiredState(object):
+    """
+    Target state of a ToolOne instance for ToolOneControl.apply_state. Fields left at None are not changed.
+
+    Args:
+        project: ToolOne project path
+        experiment: experiment name
+        application: path of the application to have loaded on platform 0
+        application_running: True to have the application running, False to have it stopped
+        calibration_online: True for online calibration, False for offline
+        recorder_armed: RecorderSettings to start the recorder with, False to stop recording and measuring
+        signals: SignalSet (or iterable of names) the recorder should record
+    """
+
+    def __init__(self, project=None, experiment=None, application=None, application_running=None,
+                 calibration_online=None, recorder_armed=None, signals=None):
+        self.project = project
+        self.experiment = experiment
+        self.application = application
+        self.application_running = application_running
+        self.calibration_online = calibration_online
+        self.recorder_armed = recorder_armed
+        self.signals = signals
+
+
+class Plan(object):
+    """
+    Ordered ToolOneControl operations leading from the current to the desired state.
+    """
+
+    def __init__(self, steps, state):
+        self.steps = steps
+        self.state = state
+
+    @property
+    def estimated_cost(self):
+        return sum(step.cost for step in self.steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __str__(self):
+        if not self.steps:
+            return "Plan: ToolOne is already in the desired state"
+        lines = ["Plan: {} steps, estimated {:.1f} s".format(len(self.steps), self.estimated_cost)]
+        for number, step in enumerate(self.steps, 1):
+            lines.append("  {}. {}  (~{:.1f} s, {})".format(number, step.method, step.cost, step.reason))
+        return "\n".join(lines)
+
+
+def read_state(control, desired=None):
+    """ This function reads the state relevant for planning in one pass over the COM object model. With a desired
+    state, only the parts it constrains are read (the others are None), which keeps e.g. start_running_test cheap.
+    :param control: ToolOneControl
+    :param desired: DesiredState, everything is read when omitted
+    :return: ToolOneState
+    """
+    def needed(*fields):
+        return desired is None or any(getattr(desired, field) is not None for field in fields)
+
+    instance = control._instance
+    project_path = experiment_name = application_name = is_measuring = recorder_settings = None
+    application_state = APPLICATION_STATE_UNLOADED
+    has_experiment = True
+    if needed("project"):
+        project = instance.ActiveProject
+        project_path = project.FullPath if project is not None else None
+        has_experiment = project is not None
+    if has_experiment and needed("project", "experiment"):
+        experiment = instance.ActiveExperiment
+        experiment_name = experiment.Name if experiment is not None else None
+        has_experiment = experiment is not None
+    if has_experiment and needed("application", "application_running"):
+        application = control._real_time_application(0)
+        if application is not None:
+            application_name = application.Name if needed("application") else None
+            application_state = application.State
+    if needed("recorder_armed"):
+        is_measuring = control._measurement_data_management().IsMeasuring
+        # the recorder has no COM state, the control tracks the recordings it started
+        recorder_settings = control._recorder_settings
+    return ToolOneState(project_path=project_path, experiment=experiment_name, application=application_name,
+                        application_state=application_state,
+                        calibration_state=control._calibration_management().State, is_measuring=is_measuring,
+                        recorder_settings=recorder_settings)
+
+
+def plan_transition(state, desired, costs=None):
+    """ This function computes the minimal ordered operations leading from state to desired.
+    Opening another project or experiment resets everything below it, and the application is only started or
+    unloaded with online calibration stopped, so calibration is only toggled when one of these steps needs it.
+    :param state: ToolOneState, see read_state()
+    :param desired: DesiredState
+    :param costs: dict overriding DEFAULT_STEP_COSTS
+    :return: Plan
+    """
+    step_costs = dict(DEFAULT_STEP_COSTS, **(costs or {}))
+    steps = []
+
+    def add(method, reason, *args, **kwargs):
+        cost = step_costs.get(method, 0.0)
+        if method == "set_signals_to_record":
+            cost *= len(desired.signals)
+        steps.append(PlanStep(method, args, kwargs, cost, reason))
+
+    project_path, experiment = state.project_path, state.experiment
+    application, application_state = state.application, state.application_state
+    calibration_online = state.calibration_state == CALIBRATION_STATE_ONLINE
+    is_measuring, recorder_settings = state.is_measuring, state.recorder_settings
+
+    if desired.project is not None and desired.project != project_path:
+        add("open_project", "project is {}".format(project_path), desired.project)
+        experiment, application, application_state = None, None, APPLICATION_STATE_UNLOADED
+        calibration_online = is_measuring = False
+        recorder_settings = None
+    if desired.experiment is not None and desired.experiment != experiment:
+        add("activate_experiment", "experiment is {}".format(experiment), desired.experiment)
+        application, application_state = None, APPLICATION_STATE_UNLOADED
+        calibration_online = is_measuring = False
+        recorder_settings = None
+
+    if desired.application is not None:
+        application_name = os.path.basename(os.path.normpath(desired.application))
+        if application_name != application or state.application_outdated:
+            if application is not None:
+                if calibration_online:
+                    add("stop_online_calibration", "required to unload {}".format(application), check_state=False)
+                    calibration_online = False
+                add("unload_application_from_platform", "{} is loaded{}".format(
+                    application, " from another build" if application_name == application else ""),
+                    stop_calibration=False)
+            add("load_application_from_file", "{} is not loaded".format(application_name), desired.application)
+            application, application_state = application_name, APPLICATION_STATE_LOADED
+
+    if desired.recorder_armed is False and (is_measuring or recorder_settings is not None):
+        add("stop_recording_and_measuring", "measurement is running")
+        is_measuring = False
+        recorder_settings = None
+
+    if desired.signals is not None:
+        add("set_signals_to_record", "recorder signals may differ", incremental=True)
+
+    if desired.application_running is True and application_state != APPLICATION_STATE_RUNNING:
+        if calibration_online:
+            add("stop_online_calibration", "required to start the application", check_state=False)
+            calibration_online = False
+        add("start_application_on_platform", "application state is {}".format(application_state))
+        application_state = APPLICATION_STATE_RUNNING
+    elif desired.application_running is False and application_state in (APPLICATION_STATE_RUNNING,
+                                                                         APPLICATION_STATE_PAUSED):
+        add("stop_application_on_platform", "application state is {}".format(application_state))
+        application_state = APPLICATION_STATE_LOADED
+
+    if desired.calibration_online is True and not calibration_online:
+        add("start_online_calibration", "calibration is offline", check_state=False)
+    elif desired.calibration_online is False and calibration_online:
+        add("stop_online_calibration", "calibration is online", check_state=False)
+
+    # a measurement started without the recorder (start_measuring) does not count as armed
+    if desired.recorder_armed and desired.recorder_armed != recorder_settings:
+        if recorder_settings is not None:
+            add("stop_recording_measurement", "recorder is armed with other settings")
+            add("arm_recorder", "recorder settings changed", *desired.recorder_armed)
+        else:
+            add("arm_recorder", "recorder is not recording", *desired.recorder_armed)
+
+    return Plan(steps, state)
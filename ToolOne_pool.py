@@ -0,0 +1,223 @@
+import logging
+import multiprocessing
+import queue
+import time
+import traceback
+
+from ToolOne_API_control_module import ToolOneControl, dispatch_new_ToolOne, logger_setup, logger_shutdown
+from ToolOne_scenario import ScenarioResult, run_scenario
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# how often the scheduler checks that busy workers are still alive while it waits for results [s]
+_LIVENESS_INTERVAL = 1.0
+
+
+def _worker_main(worker_id, tasks, results, dispatch, window_visible, standby=False, log_file=None,
+                 call_timeout=None):
+    """ Entry point of a worker process: owns one ToolOneControl and runs the scenarios sent to it until it receives
+    None. A failed scenario restarts ToolOne, so the next scenario starts from a clean process.
+    """
+    if log_file is not None:
+        logger_setup(log_file, asynchronous=True, console=False, worker_id=worker_id)
+    control = None
+    try:
+        control = ToolOneControl(window_visible=window_visible, dispatch=dispatch, standby=standby,
+                                 call_timeout=call_timeout)
+    except Exception:
+        results.put((worker_id, None, None, traceback.format_exc(), 0.0))
+        return
+    results.put((worker_id, None, None, None, 0.0))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        index, scenario = task
+        start = time.perf_counter()
+        try:
+            recording_path = run_scenario(control, scenario)
+            error = None
+        except Exception:
+            recording_path = None
+            error = traceback.format_exc()
+            try:
+                control.restart_ToolOne(window_visible=window_visible)
+            except Exception:
+                logger.exception("Worker %s could not restart ToolOne", worker_id)
+        results.put((worker_id, index, recording_path, error, time.perf_counter() - start))
+
+    try:
+        control.close_ToolOne()
+    except Exception:
+        logger.exception("Worker %s could not close ToolOne", worker_id)
+    logger_shutdown()
+
+
+class _Worker(object):
+    """ scheduler-side state of one worker process """
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.process = None
+        self.tasks = None
+        # index of the scenario the worker is running, None when idle
+        self.current = None
+        # affinity key of the last scenario, i.e. the project/application which is currently open in its ToolOne
+        self.affinity_key = None
+
+
+class ToolOneWorkerPool(object):
+    """
+    Pool of worker processes, each driving its own ToolOne process through a ToolOneControl. Scenarios are
+    dispatched to idle workers, preferring the worker whose ToolOne already has the scenario's project and
+    application open, so open_project/load_application_from_file are not repeated.
+
+        with ToolOneWorkerPool(workers=4) as pool:
+            for result in pool.run(scenarios):
+                print(result.name, result.recording_path, result.error)
+
+    Args:
+        workers: number of worker processes
+        dispatch: ToolOne backend of the workers, must be picklable; defaults to dispatch_new_ToolOne, which starts a
+            separate ToolOne process per worker
+        window_visible: show the ToolOne windows
+        standby: keep a warm standby ToolOne per worker, so the restart after a failed scenario is only a swap, see
+            ToolOneControl.prepare_standby()
+        log_file: log file of the workers, each worker writes asynchronously to its own file, e.g. example.worker0.log;
+            the workers do not log when omitted
+        call_timeout: deadline of every ToolOneControl call of the workers [s], a hung ToolOne is killed
+    """
+
+    def __init__(self, workers=2, dispatch=dispatch_new_ToolOne, window_visible=False, standby=False, log_file=None,
+                 call_timeout=None):
+        self._context = multiprocessing.get_context("spawn")
+        self._dispatch = dispatch
+        self._window_visible = window_visible
+        self._standby = standby
+        self._call_timeout = call_timeout
+        self._log_file = log_file
+        self._results = self._context.Queue()
+        self._workers = [_Worker(worker_id) for worker_id in range(workers)]
+        self._started = False
+
+    def start(self):
+        """ This function starts the worker processes and waits until every worker is connected to its ToolOne
+        :return: None
+        """
+        if self._started:
+            return
+        logger.info("Starting %s ToolOne workers...", len(self._workers))
+        for worker in self._workers:
+            self._spawn(worker)
+        pending = {worker.worker_id for worker in self._workers}
+        while pending:
+            worker_id, _, _, error, _ = self._results.get()
+            pending.discard(worker_id)
+            if error is not None:
+                self.close()
+                raise RuntimeError("ToolOne worker {} could not connect:\n{}".format(worker_id, error))
+        self._started = True
+
+    def _spawn(self, worker):
+        worker.tasks = self._context.Queue()
+        worker.current = None
+        worker.affinity_key = None
+        worker.process = self._context.Process(target=_worker_main, name="ToolOneWorker-{}".format(worker.worker_id),
+                                               args=(worker.worker_id, worker.tasks, self._results, self._dispatch,
+                                                     self._window_visible, self._standby, self._log_file,
+                                                     self._call_timeout),
+                                               daemon=True)
+        worker.process.start()
+
+    @staticmethod
+    def _pick(worker, pending, scenarios, claimed_keys):
+        """ Picks the position in pending of the next scenario for an idle worker: a scenario with the worker's
+        affinity key, else the first scenario whose project/application is not open on another worker, else the
+        first pending scenario.
+        """
+        fallback = None
+        for position, index in enumerate(pending):
+            key = scenarios[index].affinity_key
+            if key == worker.affinity_key:
+                return position
+            if fallback is None and key not in claimed_keys:
+                fallback = position
+        return fallback if fallback is not None else 0
+
+    def run(self, scenarios):
+        """ This function runs the scenarios on the workers and yields their results as they complete
+        :param scenarios: list of Scenario
+        :return: generator of ScenarioResult in completion order
+        """
+        self.start()
+        scenarios = list(scenarios)
+        pending = list(range(len(scenarios)))
+        running = 0
+        while pending or running:
+            for worker in self._workers:
+                if not pending:
+                    break
+                if worker.current is not None:
+                    continue
+                claimed_keys = {other.affinity_key for other in self._workers if other is not worker}
+                index = pending.pop(self._pick(worker, pending, scenarios, claimed_keys))
+                worker.current = index
+                worker.affinity_key = scenarios[index].affinity_key
+                worker.tasks.put((index, scenarios[index]))
+                running += 1
+
+            try:
+                worker_id, index, recording_path, error, duration = self._results.get(timeout=_LIVENESS_INTERVAL)
+            except queue.Empty:
+                for result in self._reap_dead_workers(scenarios):
+                    running -= 1
+                    yield result
+                continue
+            worker = self._workers[worker_id]
+            if index is None or worker.current != index:
+                # connect message of a respawned worker
+                continue
+            worker.current = None
+            if error is not None:
+                # the worker restarted ToolOne, nothing is open anymore
+                worker.affinity_key = None
+            running -= 1
+            yield ScenarioResult(scenarios[index].name, recording_path, error, duration, worker_id)
+
+    def _reap_dead_workers(self, scenarios):
+        """ Reports the scenario of every crashed worker as failed and starts a replacement process """
+        for worker in self._workers:
+            if worker.current is None or worker.process.is_alive():
+                continue
+            index = worker.current
+            logger.error("ToolOne worker %s died (exit code %s) while running scenario %s", worker.worker_id,
+                         worker.process.exitcode, scenarios[index].name)
+            self._spawn(worker)
+            yield ScenarioResult(scenarios[index].name, None, "worker process died", 0.0, worker.worker_id)
+
+    def close(self, timeout=60.0):
+        """ This function stops the workers after their current scenario and closes their ToolOne processes
+        :param timeout: time to wait for every worker before it is terminated [s]
+        :return: None
+        """
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.tasks.put(None)
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                logger.warning("ToolOne worker %s did not stop, terminating it", worker.worker_id)
+                worker.process.terminate()
+            worker.process = None
+        self._started = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
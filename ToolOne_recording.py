@@ -0,0 +1,690 @@
+"""
+Streaming access to recorded measurement files.
+
+Recordings are opened through memory mapping and read column by column, so only the byte ranges of the requested
+signals and time range are paged in, independent of the file size. Readers are looked up by file extension; the
+built-in reader handles the columnar ToolOne recording container (.t1rec):
+
+    offset 0    magic b"T1REC001"
+    offset 8    header length H (uint64, little endian)
+    offset 16   header, H bytes of UTF-8 JSON: {"sample_count": N, "signals": [...], "dtype": "<f8",
+                "data_offset": D}
+    offset D    time column (N values), followed by one column of N values per signal in header order
+
+The ToolOne recorder itself writes ASAM MDF files (.mf4, .mdf), read by MdfRecording with the optional asammdf
+package.
+
+Rotated recordings are split into chunks, compressed with gzip (.t1rec.gz) by a ChunkIndexer and listed in a chunk
+manifest (.t1manifest, JSON) in time order:
+
+    {"signals": [...], "sample_count": N, "chunks": [{"path": "Recorder0_0001.t1rec.gz", "start": 0.0, "end": 59.99,
+     "sample_offset": 0, "samples": 60000, "bytes": 1920256}, ...]}
+
+open_recording() of a manifest returns a ChunkedRecording, which only opens the chunks overlapping the requested time
+range.
+
+Other formats can be plugged in with register_format().
+"""
+import bisect
+import concurrent.futures
+import gzip
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # write_recording works without numpy, reading needs it
+    np = None
+
+try:
+    import asammdf
+except ImportError:  # checked by MdfRecording
+    asammdf = None
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+MAGIC = b"T1REC001"
+EXTENSION = ".t1rec"
+# gzip-compressed recording container
+COMPRESSED_EXTENSION = ".gz"
+# chunk manifest of a rotated recording
+MANIFEST_EXTENSION = ".t1manifest"
+# columns start at multiples of this, so numpy views on the memory map are aligned
+_ALIGNMENT = 64
+# default number of samples per chunk of iter_chunks()/iter_signal()
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# time-aligned block of a recording: time array and dict signal name -> value array
+RecordingChunk = namedtuple("RecordingChunk", ["time", "signals"])
+
+# extension -> callable(path) returning a recording reader
+_formats = {}
+
+
+def register_format(extension, opener):
+    """ This function registers a reader for recordings with the given file extension
+    :param extension: file extension including the dot, e.g. ".mf4"
+    :param opener: callable(path) returning an object with the Recording interface
+    :return: None
+    """
+    _formats[extension.lower()] = opener
+
+
+def write_recording(file_path, time, signals):
+    """ This function writes a recording container (.t1rec)
+    :param file_path: path of the file
+    :param time: sequence of N time stamps [s], ascending
+    :param signals: list of (name, sequence of N values) or dict name -> values
+    :return: None
+    """
+    if isinstance(signals, dict):
+        signals = list(signals.items())
+    sample_count = len(time)
+    header = {"sample_count": sample_count, "signals": [name for name, _ in signals], "dtype": "<f8"}
+    header_bytes = json.dumps(header).encode("utf-8")
+    # the data offset is part of the header, so reserve space for its digits before aligning
+    data_offset = _align(16 + len(header_bytes) + len(', "data_offset": ') + 20)
+    header["data_offset"] = data_offset
+    header_bytes = json.dumps(header).encode("utf-8")
+    with open(file_path, "wb") as recording_file:
+        recording_file.write(MAGIC)
+        recording_file.write(struct.pack("<Q", len(header_bytes)))
+        recording_file.write(header_bytes)
+        recording_file.write(b"\0" * (data_offset - 16 - len(header_bytes)))
+        for name, values in [(None, time)] + list(signals):
+            if len(values) != sample_count:
+                raise ValueError("Signal {} has {} samples, expected {}".format(name, len(values), sample_count))
+            column = array("d", values)
+            if struct.pack("=d", 1.0) != struct.pack("<d", 1.0):
+                column.byteswap()
+            column.tofile(recording_file)
+
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class Recording(object):
+    """
+    Memory-mapped reader of a recording container (.t1rec). Arrays returned by the read methods are copies, so they
+    stay valid after close().
+
+    Args:
+        file_path: path of the recording
+    """
+
+    def __init__(self, file_path):
+        if np is None:
+            raise ImportError("Reading recordings requires numpy")
+        self.file_path = file_path
+        self._file = None
+        self._map = None
+        try:
+            self._map = self._open_buffer(file_path)
+            if self._map[:8] != MAGIC:
+                raise ValueError("{} is not a ToolOne recording container".format(file_path))
+            header_length = struct.unpack_from("<Q", self._map, 8)[0]
+            header = json.loads(self._map[16:16 + header_length].decode("utf-8"))
+        except Exception:
+            self.close()
+            raise
+        self.sample_count = header["sample_count"]
+        self.signals = header["signals"]
+        self._dtype = np.dtype(header["dtype"])
+        self._data_offset = header["data_offset"]
+        self._column_index = {name: index for index, name in enumerate(self.signals)}
+
+    def _open_buffer(self, file_path):
+        """ returns the buffer holding the container, a read-only memory map of the file """
+        self._file = open(file_path, "rb")
+        return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _column(self, index):
+        """ zero-copy view on column index (-1 is the time column); pages are only read when accessed """
+        offset = self._data_offset + (index + 1) * self.sample_count * self._dtype.itemsize
+        return np.frombuffer(self._map, dtype=self._dtype, count=self.sample_count, offset=offset)
+
+    @property
+    def time_range(self):
+        """ (first, last) time stamp of the recording, None for an empty recording """
+        if not self.sample_count:
+            return None
+        time = self._column(-1)
+        return float(time[0]), float(time[-1])
+
+    def sample_range(self, start=None, stop=None):
+        """ This function converts a time range into sample indices with a binary search on the time column
+        :param start: first time stamp to include [s], None for the beginning
+        :param stop: time stamp to stop before [s], None for the end
+        :return: (first index, end index)
+        """
+        time = self._column(-1)
+        first = 0 if start is None else int(np.searchsorted(time, start, side="left"))
+        end = self.sample_count if stop is None else int(np.searchsorted(time, stop, side="left"))
+        return first, max(first, end)
+
+    def _indices(self, signals):
+        if signals is None:
+            return list(range(len(self.signals)))
+        try:
+            return [self._column_index[name] for name in signals]
+        except KeyError as error:
+            raise KeyError("Signal {} is not in recording {}".format(error.args[0], self.file_path))
+
+    def read(self, signal, start=None, stop=None):
+        """ This function reads one signal in a time range
+        :return: (time array, value array)
+        """
+        index = self._indices([signal])[0]
+        first, end = self.sample_range(start, stop)
+        return np.array(self._column(-1)[first:end]), np.array(self._column(index)[first:end])
+
+    def iter_signal(self, signal, start=None, stop=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ This function yields one signal in chunks of chunk_size samples
+        :return: generator of (time array, value array)
+        """
+        index = self._indices([signal])[0]
+        first, end = self.sample_range(start, stop)
+        time, values = self._column(-1), self._column(index)
+        for chunk_start in range(first, end, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, end)
+            yield np.array(time[chunk_start:chunk_end]), np.array(values[chunk_start:chunk_end])
+
+    def iter_chunks(self, signals=None, start=None, stop=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ This function yields time-aligned chunks of several signals
+        :param signals: names of the signals to read, all signals when omitted
+        :param start: first time stamp to include [s]
+        :param stop: time stamp to stop before [s]
+        :param chunk_size: samples per chunk
+        :return: generator of RecordingChunk
+        """
+        indices = self._indices(signals)
+        first, end = self.sample_range(start, stop)
+        time = self._column(-1)
+        columns = [(self.signals[index], self._column(index)) for index in indices]
+        for chunk_start in range(first, end, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, end)
+            yield RecordingChunk(np.array(time[chunk_start:chunk_end]),
+                                 {name: np.array(column[chunk_start:chunk_end]) for name, column in columns})
+
+    def close(self):
+        if isinstance(getattr(self, "_map", None), mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                # an unfinished iter_* generator still holds a view, the map is closed when it is collected
+                pass
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "Recording({!r}, {} signals, {} samples)".format(self.file_path, len(self.signals), self.sample_count)
+
+
+class CompressedRecording(Recording):
+    """
+    Reader of a gzip-compressed recording container (.t1rec.gz), e.g. a chunk of a rotated recording. The container is
+    decompressed into memory when it is opened, which the rotation keeps affordable by bounding the chunk size.
+
+    Args:
+        file_path: path of the compressed recording
+    """
+
+    def _open_buffer(self, file_path):
+        with gzip.open(file_path, "rb") as compressed_file:
+            return compressed_file.read()
+
+
+class MdfRecording(object):
+    """
+    Reader of an ASAM MDF recording (.mf4, .mdf) as written by the ToolOne recorder, with the interface of Recording.
+    Requires asammdf. MDF stores every channel group with its own time base: the time axis of the recording is the one
+    of the first group with samples, read() and iter_signal() return the time stamps of the signal itself and
+    iter_chunks() interpolates signals of other groups onto the time axis. Only the time stamps of a group are kept in
+    memory to find record ranges, signal values are read record range by record range.
+
+    Args:
+        file_path: path of the recording
+    """
+
+    def __init__(self, file_path):
+        if np is None:
+            raise ImportError("Reading recordings requires numpy")
+        if asammdf is None:
+            raise ImportError("Reading MDF recordings requires asammdf")
+        self.file_path = file_path
+        self._mdf = asammdf.MDF(file_path)
+        # signal name -> (group index, channel index), the first channel of a name wins like in the recorder GUI
+        self._locations = {}
+        # group index -> time stamps of the group, read on first use
+        self._masters = {}
+        self._time_group = None
+        self._time = np.empty(0)
+        try:
+            for group_index, group in enumerate(self._mdf.groups):
+                master_index = self._mdf.masters_db.get(group_index)
+                channels = [(channel_index, channel.name) for channel_index, channel in enumerate(group.channels)
+                            if channel_index != master_index and channel.name not in self._locations]
+                for channel_index, name in channels:
+                    self._locations[name] = (group_index, channel_index)
+                if channels and self._time_group is None and group.channel_group.cycles_nr:
+                    self._time_group, self._time = group_index, self._master(group_index)
+        except Exception:
+            self.close()
+            raise
+        self.signals = list(self._locations)
+        self.sample_count = len(self._time)
+
+    def _master(self, group_index):
+        if group_index not in self._masters:
+            self._masters[group_index] = np.asarray(self._mdf.get_master(group_index), dtype="float64")
+        return self._masters[group_index]
+
+    def _location(self, name):
+        try:
+            return self._locations[name]
+        except KeyError:
+            raise KeyError("Signal {} is not in recording {}".format(name, self.file_path))
+
+    def _records(self, locations, first, end):
+        """ reads the records first to end of channels of one group, returns a list of value arrays """
+        signals = self._mdf.select([(None, group_index, channel_index) for group_index, channel_index in locations],
+                                   record_offset=first, record_count=end - first, copy_master=False)
+        return [np.asarray(signal.samples) for signal in signals]
+
+    @property
+    def time_range(self):
+        """ (first, last) time stamp of the recording, None for an empty recording """
+        if not self.sample_count:
+            return None
+        return float(self._time[0]), float(self._time[-1])
+
+    def sample_range(self, start=None, stop=None):
+        """ This function converts a time range into sample indices of the time axis
+        :return: (first index, end index)
+        """
+        return self._range(self._time, start, stop)
+
+    @staticmethod
+    def _range(time, start, stop):
+        first = 0 if start is None else int(np.searchsorted(time, start, side="left"))
+        end = len(time) if stop is None else int(np.searchsorted(time, stop, side="left"))
+        return first, max(first, end)
+
+    def read(self, signal, start=None, stop=None):
+        """ This function reads one signal in a time range
+        :return: (time array, value array)
+        """
+        location = self._location(signal)
+        time = self._master(location[0])
+        first, end = self._range(time, start, stop)
+        if first == end:
+            return np.array(time[first:end]), np.empty(0)
+        return np.array(time[first:end]), self._records([location], first, end)[0]
+
+    def iter_signal(self, signal, start=None, stop=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ This function yields one signal in chunks of chunk_size samples
+        :return: generator of (time array, value array)
+        """
+        location = self._location(signal)
+        time = self._master(location[0])
+        first, end = self._range(time, start, stop)
+        for chunk_start in range(first, end, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, end)
+            yield np.array(time[chunk_start:chunk_end]), self._records([location], chunk_start, chunk_end)[0]
+
+    def iter_chunks(self, signals=None, start=None, stop=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ This function yields chunks of several signals aligned to the time axis of the recording
+        :param signals: names of the signals to read, all signals when omitted
+        :param start: first time stamp to include [s]
+        :param stop: time stamp to stop before [s]
+        :param chunk_size: samples per chunk
+        :return: generator of RecordingChunk
+        """
+        names = self.signals if signals is None else list(signals)
+        # group index -> names of the requested signals in the group, read with one select() per group and chunk
+        groups = {}
+        for name in names:
+            groups.setdefault(self._location(name)[0], []).append(name)
+        first, end = self.sample_range(start, stop)
+        for chunk_start in range(first, end, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, end)
+            time = np.array(self._time[chunk_start:chunk_end])
+            values = {}
+            for group_index, group_names in groups.items():
+                locations = [self._locations[name] for name in group_names]
+                if group_index == self._time_group:
+                    values.update(zip(group_names, self._records(locations, chunk_start, chunk_end)))
+                    continue
+                # records of the group around the chunk, including one neighbour on each side for the interpolation
+                group_time = self._master(group_index)
+                group_first = max(0, int(np.searchsorted(group_time, time[0], side="right")) - 1)
+                group_end = min(len(group_time), int(np.searchsorted(group_time, time[-1], side="left")) + 1)
+                if group_first >= group_end:
+                    values.update((name, np.full(len(time), np.nan)) for name in group_names)
+                    continue
+                records = self._records(locations, group_first, group_end)
+                values.update((name, np.interp(time, group_time[group_first:group_end], group_values))
+                              for name, group_values in zip(group_names, records))
+            yield RecordingChunk(time, {name: values[name] for name in names})
+
+    def close(self):
+        mdf, self._mdf = getattr(self, "_mdf", None), None
+        if mdf is not None:
+            mdf.close()
+        self._masters = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "MdfRecording({!r}, {} signals, {} samples)".format(self.file_path, len(self.signals),
+                                                                   self.sample_count)
+
+
+def read_manifest(manifest_path):
+    """ This function reads the chunk manifest of a rotated recording
+    :param manifest_path: path of the manifest
+    :return: manifest dict, chunk paths resolved relative to the manifest
+    """
+    with open(manifest_path, "r") as manifest_file:
+        manifest = json.load(manifest_file)
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    for chunk in manifest["chunks"]:
+        chunk["path"] = os.path.normpath(os.path.join(directory, chunk["path"]))
+    return manifest
+
+
+class ChunkedRecording(object):
+    """
+    Reader of a rotated recording through its chunk manifest, with the interface of Recording. The chunks overlapping
+    a time range are found with a binary search on the manifest; only one chunk is open at a time. A compressed chunk
+    is decompressed once into a temporary file, which is memory-mapped like an uncompressed chunk whenever it is
+    opened again, and removed by close().
+
+    Args:
+        manifest_path: path of the chunk manifest
+    """
+
+    def __init__(self, manifest_path):
+        if np is None:
+            raise ImportError("Reading recordings requires numpy")
+        self.file_path = manifest_path
+        manifest = read_manifest(manifest_path)
+        self.signals = manifest["signals"]
+        self.sample_count = manifest["sample_count"]
+        self.chunks = manifest["chunks"]
+        self._starts = [chunk["start"] for chunk in self.chunks]
+        # (chunk index, Recording) of the open chunk
+        self._open_chunk = None
+        # directory of the decompressed chunks and chunk index -> decompressed file
+        self._temporary_directory = None
+        self._decompressed = {}
+
+    @property
+    def time_range(self):
+        """ (first, last) time stamp of the recording, None for an empty recording """
+        if not self.chunks:
+            return None
+        return self.chunks[0]["start"], self.chunks[-1]["end"]
+
+    def _chunk_indices(self, start, stop):
+        """ indices of the chunks overlapping [start, stop) """
+        first = 0 if start is None else max(bisect.bisect_right(self._starts, start) - 1, 0)
+        end = len(self.chunks) if stop is None else bisect.bisect_left(self._starts, stop)
+        return range(first, end)
+
+    def _chunk_path(self, index):
+        """ path of the uncompressed container of a chunk, decompressing it on first use """
+        path = self.chunks[index]["path"]
+        if not path.lower().endswith(COMPRESSED_EXTENSION):
+            return path
+        if index not in self._decompressed:
+            if self._temporary_directory is None:
+                self._temporary_directory = tempfile.mkdtemp(prefix="ToolOne_chunks_")
+            self._decompressed[index] = decompress_recording(path, self._temporary_directory)
+        return self._decompressed[index]
+
+    def _chunk(self, index):
+        if self._open_chunk is None or self._open_chunk[0] != index:
+            self._close_chunk()
+            self._open_chunk = index, open_recording(self._chunk_path(index))
+        return self._open_chunk[1]
+
+    def _close_chunk(self):
+        if self._open_chunk is not None:
+            self._open_chunk[1].close()
+            self._open_chunk = None
+
+    def sample_range(self, start=None, stop=None):
+        """ This function converts a time range into sample indices of the whole recording
+        :return: (first index, end index)
+        """
+        indices = self._chunk_indices(start, stop)
+        if not indices:
+            offset = self.chunks[indices.start]["sample_offset"] if indices.start < len(self.chunks) else \
+                self.sample_count
+            return offset, offset
+        first = self._chunk(indices[0]).sample_range(start, stop)[0] + self.chunks[indices[0]]["sample_offset"]
+        end = self._chunk(indices[-1]).sample_range(start, stop)[1] + self.chunks[indices[-1]]["sample_offset"]
+        return first, max(first, end)
+
+    def read(self, signal, start=None, stop=None):
+        """ This function reads one signal in a time range
+        :return: (time array, value array)
+        """
+        if signal not in self.signals:
+            raise KeyError("Signal {} is not in recording {}".format(signal, self.file_path))
+        parts = [self._chunk(index).read(signal, start, stop) for index in self._chunk_indices(start, stop)]
+        if not parts:
+            return np.empty(0), np.empty(0)
+        return np.concatenate([time for time, _ in parts]), np.concatenate([values for _, values in parts])
+
+    def iter_signal(self, signal, start=None, stop=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ This function yields one signal in chunks of at most chunk_size samples, never spanning two files
+        :return: generator of (time array, value array)
+        """
+        for index in self._chunk_indices(start, stop):
+            yield from self._chunk(index).iter_signal(signal, start, stop, chunk_size)
+
+    def iter_chunks(self, signals=None, start=None, stop=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ This function yields time-aligned chunks of several signals, never spanning two files
+        :return: generator of RecordingChunk
+        """
+        for index in self._chunk_indices(start, stop):
+            yield from self._chunk(index).iter_chunks(signals, start, stop, chunk_size)
+
+    def close(self):
+        self._close_chunk()
+        if self._temporary_directory is not None:
+            shutil.rmtree(self._temporary_directory, ignore_errors=True)
+            self._temporary_directory = None
+            self._decompressed = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "ChunkedRecording({!r}, {} chunks, {} samples)".format(self.file_path, len(self.chunks),
+                                                                      self.sample_count)
+
+
+class ChunkIndexer(object):
+    """
+    Compresses and indexes the completed chunks of a rotated recording on a background thread while the recording
+    continues, and rewrites the chunk manifest after every chunk, so readers can use the chunks completed so far.
+    Chunks are indexed in the order they were added.
+
+    Args:
+        manifest_path: path of the chunk manifest to write
+        compress: replace every recording container chunk (.t1rec) by its gzip-compressed copy, MDF chunks are kept
+            as written because their reader needs the file
+        compress_level: gzip compression level, 1 (fastest) to 9
+    """
+
+    def __init__(self, manifest_path, compress=True, compress_level=6):
+        self.manifest_path = manifest_path
+        self.compress = compress
+        self.compress_level = compress_level
+        self._manifest = {"signals": [], "sample_count": 0, "chunks": []}
+        self._lock = threading.Lock()
+        self._futures = []
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="ToolOneChunkIndexer")
+        self._write_manifest()
+
+    def add(self, chunk_path):
+        """ This function queues a completed chunk
+        :param chunk_path: path of the chunk recording
+        :return: concurrent.futures.Future of the manifest entry, None for an empty chunk
+        """
+        future = self._executor.submit(self._index, chunk_path)
+        self._futures.append(future)
+        return future
+
+    def _index(self, chunk_path):
+        try:
+            with open_recording(chunk_path) as chunk:
+                signals, samples, time_range = chunk.signals, chunk.sample_count, chunk.time_range
+            size = os.path.getsize(chunk_path)
+            if self.compress and chunk_path.lower().endswith(EXTENSION):
+                compressed_path = chunk_path + COMPRESSED_EXTENSION
+                temporary_path = compressed_path + ".tmp"
+                with open(chunk_path, "rb") as source, \
+                        gzip.open(temporary_path, "wb", compresslevel=self.compress_level) as target:
+                    shutil.copyfileobj(source, target, 1 << 20)
+                os.replace(temporary_path, compressed_path)
+                os.remove(chunk_path)
+                chunk_path = compressed_path
+        except Exception:
+            logger.exception("Could not index recording chunk %s", chunk_path)
+            raise
+        if time_range is None:
+            logger.warning("Recording chunk %s is empty", chunk_path)
+            return None
+
+        try:
+            path = os.path.relpath(chunk_path, os.path.dirname(os.path.abspath(self.manifest_path)))
+        except ValueError:
+            # on another drive
+            path = os.path.abspath(chunk_path)
+        with self._lock:
+            entry = {"path": path, "start": time_range[0], "end": time_range[1],
+                     "sample_offset": self._manifest["sample_count"], "samples": samples, "bytes": size}
+            if not self._manifest["signals"]:
+                self._manifest["signals"] = signals
+            elif signals != self._manifest["signals"]:
+                logger.warning("Recording chunk %s has other signals than the first chunk", chunk_path)
+            self._manifest["chunks"].append(entry)
+            self._manifest["sample_count"] += samples
+            self._write_manifest()
+        logger.debug("Indexed recording chunk %s (%.3f s to %.3f s)", chunk_path, time_range[0], time_range[1])
+        return entry
+
+    def _write_manifest(self):
+        temporary_path = self.manifest_path + ".tmp"
+        with open(temporary_path, "w") as manifest_file:
+            json.dump(self._manifest, manifest_file, indent=1)
+        os.replace(temporary_path, self.manifest_path)
+
+    def manifest(self, wait=False):
+        """ This function returns the chunk manifest
+        :param wait: wait until all added chunks are indexed
+        :return: manifest dict with the ordered chunks
+        """
+        if wait:
+            concurrent.futures.wait(self._futures)
+        with self._lock:
+            return json.loads(json.dumps(self._manifest))
+
+    def close(self, wait=True):
+        """ This function stops the background thread
+        :param wait: wait until all added chunks are indexed
+        :return: None
+        """
+        self._executor.shutdown(wait=wait)
+
+
+register_format(EXTENSION, Recording)
+register_format(COMPRESSED_EXTENSION, CompressedRecording)
+register_format(MANIFEST_EXTENSION, ChunkedRecording)
+# recordings written by the ToolOne recorder
+register_format(".mf4", MdfRecording)
+register_format(".mdf", MdfRecording)
+
+
+def decompress_recording(file_path, directory):
+    """ This function decompresses a compressed recording, or the compressed chunks of a chunk manifest, into files
+    that several readers can memory-map instead of each one decompressing the recording again
+    :param file_path: path of the recording
+    :param directory: directory of the decompressed files, removed by the caller
+    :return: path of the uncompressed recording, file_path itself when nothing is compressed
+    """
+    if file_path.lower().endswith(MANIFEST_EXTENSION):
+        manifest = read_manifest(file_path)
+        compressed = [chunk for chunk in manifest["chunks"] if chunk["path"].lower().endswith(COMPRESSED_EXTENSION)]
+        if not compressed:
+            return file_path
+        for chunk in compressed:
+            chunk["path"] = decompress_recording(chunk["path"], directory)
+        handle, manifest_path = tempfile.mkstemp(suffix=MANIFEST_EXTENSION, dir=directory)
+        with os.fdopen(handle, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        return manifest_path
+    if not file_path.lower().endswith(COMPRESSED_EXTENSION):
+        return file_path
+    handle, decompressed_path = tempfile.mkstemp(suffix=EXTENSION, dir=directory)
+    with gzip.open(file_path, "rb") as source, os.fdopen(handle, "wb") as target:
+        shutil.copyfileobj(source, target, 1 << 20)
+    return decompressed_path
+
+
+def open_recording(file_path):
+    """ This function opens a recording with the reader registered for its file extension
+    :param file_path: path of the recording
+    :return: Recording
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    try:
+        opener = _formats[extension]
+    except KeyError:
+        raise ValueError("No reader registered for {} recordings ({})".format(extension, file_path))
+    return opener(file_path)
+
+
+def open_recordings(file_paths):
+    """ This function opens all files of a recording, e.g. ToolOneControl.get_recording_paths()
+    :param file_paths: iterable of paths
+    :return: list of Recording
+    """
+    recordings = []
+    try:
+        for file_path in file_paths:
+            recordings.append(open_recording(file_path))
+    except Exception:
+        for recording in recordings:
+            recording.close()
+        raise
+    return recordings
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from collections import namedtuple
+
+from ToolOne_applications import application_fingerprint
+from ToolOne_signals import SignalSet
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# result of a scenario taken from the cache; recording_paths point into the cache entry
+CachedResult = namedtuple("CachedResult", ["key", "recording_paths", "summary", "created"])
+
+# changes whenever the key material changes, so older entries are not mistaken for current ones
+_KEY_VERSION = 2
+# metadata file of a cache entry; its modification time is the time of the last use of the entry
+_ENTRY_FILE = "result.json"
+
+
+def _content_hash(file_path):
+    """ sha256 of a file or directory, hashed once per size and modification time (see application_fingerprint) """
+    return application_fingerprint(file_path).sha256
+
+
+def scenario_key(scenario):
+    """ This function computes the cache key of a scenario from all its inputs: the content of the application, the
+    signals of the signal file (after following its includes), the trigger rules, the calibration parameters and the
+    other run settings. run_scenario() resets the parameters of earlier scenarios, so the parameters of the scenario
+    are all parameters differing from the application defaults. The scenario name is not part of the key, so
+    identical scenarios of different batches share their result.
+    :param scenario: Scenario
+    :return: hex digest
+    """
+    material = scenario.to_dict()
+    del material["name"]
+    material["version"] = _KEY_VERSION
+    material["application"] = _content_hash(scenario.application)
+    if scenario.signal_file is not None:
+        material["signal_file"] = list(SignalSet.from_file(scenario.signal_file))
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(directory, file_name))
+               for directory, _, file_names in os.walk(path) for file_name in file_names)
+
+
+class ResultCache(object):
+    """
+    Local store of scenario results keyed by scenario_key(). An entry holds copies of the recordings, so it stays
+    valid when later runs overwrite the originals, and optionally the analysis summary of the recordings.
+
+        cache = ResultCache("D:/ToolOneCache", max_bytes=50 * 2**30, max_age=7 * 86400)
+        cached = cache.get(scenario_key(scenario))
+        if cached is None:
+            recording_path = run_scenario(control, scenario)
+            cached = cache.put(scenario_key(scenario), [recording_path])
+
+    Entries older than max_age are never returned. After every put() the least recently used entries are evicted
+    until the cache is smaller than max_bytes.
+
+    Args:
+        directory: cache directory, created if missing
+        max_bytes: maximum total size of the entries, unlimited when omitted
+        max_age: maximum age of an entry [s], unlimited when omitted
+    """
+
+    def __init__(self, directory, max_bytes=None, max_age=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _read_entry(self, key):
+        try:
+            with open(os.path.join(self._entry_path(key), _ENTRY_FILE), "r") as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key):
+        """ This function returns the cached result of a scenario
+        :param key: scenario_key() of the scenario
+        :return: CachedResult, None when the scenario has no valid entry
+        """
+        entry = self._read_entry(key)
+        if entry is not None and self.max_age is not None and time.time() - entry["created"] > self.max_age:
+            logger.info("Cached result %s expired", key)
+            self.remove(key)
+            entry = None
+        if entry is not None:
+            entry_path = self._entry_path(key)
+            recording_paths = [os.path.join(entry_path, name) for name in entry["recordings"]]
+            if all(os.path.exists(path) for path in recording_paths):
+                self.hits += 1
+                os.utime(os.path.join(entry_path, _ENTRY_FILE))
+                return CachedResult(key, recording_paths, entry["summary"], entry["created"])
+            logger.warning("Cached result %s is incomplete, removing it", key)
+            self.remove(key)
+        self.misses += 1
+        return None
+
+    def put(self, key, recording_paths, summary=None):
+        """ This function stores the result of a scenario, replacing an existing entry with the same key
+        :param key: scenario_key() of the scenario
+        :param recording_paths: files (or directories) of the recording, copied into the cache
+        :param summary: JSON-serializable analysis summary of the recordings, e.g. RecordingAnalyzer.analyze()
+        :return: CachedResult of the new entry
+        """
+        entry_path = self._entry_path(key)
+        # the entry is assembled next to its final place and renamed, so readers never see half an entry
+        temporary_path = "{}.{}.tmp".format(entry_path, uuid.uuid4().hex)
+        os.makedirs(temporary_path)
+        try:
+            names = []
+            for position, recording_path in enumerate(recording_paths):
+                name = "{}_{}".format(position, os.path.basename(os.path.normpath(recording_path)))
+                if os.path.isdir(recording_path):
+                    shutil.copytree(recording_path, os.path.join(temporary_path, name))
+                else:
+                    shutil.copy2(recording_path, os.path.join(temporary_path, name))
+                names.append(name)
+            entry = {"key": key, "created": time.time(), "recordings": names, "summary": summary}
+            with open(os.path.join(temporary_path, _ENTRY_FILE), "w") as entry_file:
+                json.dump(entry, entry_file)
+            self.remove(key)
+            os.replace(temporary_path, entry_path)
+        except Exception:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+            logger.exception("Could not cache the result %s", key)
+            raise
+        self.evict()
+        return CachedResult(key, [os.path.join(entry_path, name) for name in names], summary, entry["created"])
+
+    def set_summary(self, key, summary):
+        """ This function adds the analysis summary to an existing entry
+        :param key: scenario_key() of the scenario
+        :param summary: JSON-serializable analysis summary
+        :return: False when the cache has no entry for the key
+        """
+        entry = self._read_entry(key)
+        if entry is None:
+            return False
+        entry["summary"] = summary
+        entry_file_path = os.path.join(self._entry_path(key), _ENTRY_FILE)
+        temporary_path = entry_file_path + ".tmp"
+        with open(temporary_path, "w") as entry_file:
+            json.dump(entry, entry_file)
+        os.replace(temporary_path, entry_file_path)
+        return True
+
+    def remove(self, key):
+        """ This function removes the entry of a key, if any
+        :return: None
+        """
+        shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+    def evict(self):
+        """ This function removes the expired entries, then the least recently used ones until the cache is smaller
+        than max_bytes
+        :return: list of the removed keys
+        """
+        now = time.time()
+        entries = []
+        removed = []
+        for key in os.listdir(self.directory):
+            entry_path = self._entry_path(key)
+            entry = self._read_entry(key)
+            if entry is None:
+                # leftover of an interrupted put(), unless it is still being written
+                if key.endswith(".tmp") and now - os.path.getmtime(entry_path) > 86400:
+                    shutil.rmtree(entry_path, ignore_errors=True)
+                continue
+            if self.max_age is not None and now - entry["created"] > self.max_age:
+                self.remove(key)
+                removed.append(key)
+                continue
+            entries.append((os.path.getmtime(os.path.join(entry_path, _ENTRY_FILE)), key, _size(entry_path)))
+
+        if self.max_bytes is not None:
+            total = sum(size for _, _, size in entries)
+            for _, key, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self.remove(key)
+                removed.append(key)
+                total -= size
+        if removed:
+            logger.info("Evicted %s cached results", len(removed))
+        return removed
+
+    def clear(self):
+        """ This function removes all entries
+        :return: None
+        """
+        for key in os.listdir(self.directory):
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
@@ -0,0 +1,137 @@
+import logging
+import time
+from collections import namedtuple
+
+from ToolOne_live import LiveAcquisition
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+
+class ScenarioAbortedError(RuntimeError):
+    """ Raised when the live acquisition of a scenario detected a failure before the scenario duration elapsed """
+
+
+# outcome of one scenario run, cached is set when the result was taken from a ResultCache instead of running it
+ScenarioResult = namedtuple("ScenarioResult", ["name", "recording_path", "error", "duration", "worker", "cached"],
+                            defaults=(False,))
+
+
+class Scenario(object):
+    """
+    One scenario test: the ToolOne project, experiment and application to run, the signals to record and the
+    measurement trigger settings.
+
+    Args:
+        name: unique name of the scenario
+        project: ToolOne project path
+        experiment: experiment name
+        application: path of the real-time application
+        trigger_rules: name of the trigger rules starting the recording
+        signal_file: signal file with the signals to record, the recorder keeps its signals when omitted
+        duration: time in seconds to measure before the recording is stopped
+        enable_state: enable the recorder start condition
+        with_trigger: start the recording with the trigger
+        overwrite_existing: overwrite existing recording files
+        live_limits: dict signal path -> [low, high] (either may be None), checked while measuring; the scenario is
+            aborted as soon as a signal leaves its range
+        live_rate: samples per second of the live limit check
+        parameters: dict calibration parameter path -> value, written before the measurement starts; parameters set
+            by an earlier scenario and not listed here are reset to their defaults
+    """
+    FIELDS = ("name", "project", "experiment", "application", "trigger_rules", "signal_file", "duration",
+              "enable_state", "with_trigger", "overwrite_existing", "live_limits", "live_rate", "parameters")
+
+    def __init__(self, name, project, experiment, application, trigger_rules, signal_file=None, duration=0.0,
+                 enable_state=True, with_trigger=True, overwrite_existing=True, live_limits=None, live_rate=10.0,
+                 parameters=None):
+        self.name = name
+        self.project = project
+        self.experiment = experiment
+        self.application = application
+        self.trigger_rules = trigger_rules
+        self.signal_file = signal_file
+        self.duration = duration
+        self.enable_state = enable_state
+        self.with_trigger = with_trigger
+        self.overwrite_existing = overwrite_existing
+        self.live_limits = live_limits
+        self.live_rate = live_rate
+        self.parameters = parameters
+
+    @property
+    def affinity_key(self):
+        """ scenarios with the same key can run one after the other without reopening project or application """
+        return self.project, self.application
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, values):
+        unknown = set(values) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError("Unknown scenario fields: {}".format(", ".join(sorted(unknown))))
+        return cls(**values)
+
+    def __repr__(self):
+        return "Scenario({!r})".format(self.name)
+
+
+def _limit_check(acquisition, limits):
+    """ subscriber aborting the acquisition when a signal leaves its [low, high] range """
+    ranges = [(signal, limits[signal][0], limits[signal][1]) for signal in acquisition.signals]
+
+    def check(timestamp, values):
+        for (signal, low, high), value in zip(ranges, values):
+            if (low is not None and value < low) or (high is not None and value > high):
+                acquisition.abort("{} = {} outside [{}, {}] at {:.3f} s".format(signal, value, low, high, timestamp))
+                return
+    return check
+
+
+def run_scenario(control, scenario, monitor=None):
+    """ This function runs one scenario on a ToolOneControl and returns the recording it produced. Project,
+    experiment and application are only (re)opened when they differ from the current ones. With live limits or a
+    monitor, the signals are checked while measuring and a failing scenario is stopped early.
+    :param control: ToolOneControl
+    :param scenario: Scenario
+    :param monitor: callable(acquisition) subscribing its own checks to the LiveAcquisition of the scenario, which
+        reads the signals of scenario.live_limits; a check calls acquisition.abort(reason) on a failure
+    :return: recording path
+    """
+    logger.info("Running scenario %s...", scenario.name)
+    try:
+        control.open_project(scenario.project)
+        control.activate_experiment(scenario.experiment)
+        control.load_application_from_file(scenario.application)
+        if scenario.signal_file is not None:
+            control.read_signals_from_file(scenario.signal_file)
+            control.set_signals_to_record(incremental=True)
+        # parameters of earlier scenarios on the same application are reset to their defaults
+        control.set_parameters(scenario.parameters or {}, reset_unlisted=True)
+        control.start_running_test(scenario.enable_state, scenario.trigger_rules, scenario.with_trigger,
+                                   scenario.overwrite_existing)
+        acquisition = None
+        if scenario.live_limits or monitor is not None:
+            acquisition = LiveAcquisition(control, list(scenario.live_limits or ()), rate=scenario.live_rate)
+            if scenario.live_limits:
+                acquisition.subscribe(_limit_check(acquisition, scenario.live_limits))
+            if monitor is not None:
+                monitor(acquisition)
+            acquisition.start()
+        try:
+            if acquisition is not None:
+                acquisition.wait(scenario.duration)
+            elif scenario.duration:
+                time.sleep(scenario.duration)
+        finally:
+            if acquisition is not None:
+                acquisition.stop()
+        control.stop_recording_and_measuring()
+        if acquisition is not None and acquisition.aborted:
+            raise ScenarioAbortedError("Scenario {} aborted: {}".format(scenario.name, acquisition.abort_reason))
+        return control.get_recording_path()
+    except Exception:
+        logger.exception("Could not run scenario %s", scenario.name)
+        raise
@@ -0,0 +1,340 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+# directive composing signal files from shared files, e.g. "#include common/chassis.signals".
+# It starts with "#" so older readers of signal files skip it as a comment.
+INCLUDE_DIRECTIVE = "#include"
+
+# signal file entries starting with this prefix are regular expressions over the signal catalog
+REGEX_PREFIX = "re:"
+GLOB_CHARACTERS = "*?["
+
+
+class SignalFileError(Exception):
+    """
+    Raised for unreadable signal files and include cycles.
+    """
+
+
+class _Include(object):
+    """ include directive of a parsed signal file, resolved when the file is flattened """
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+
+# real path -> (mtime_ns, size, tuple of signal names and _Include entries) of every parsed signal file.
+# Shared signal files included by many lists are only parsed once per modification.
+_parsed_files = {}
+
+
+def normalize_signal_name(line):
+    """ This function normalizes one line of a signal file
+    :param line: raw line
+    :return: signal name without surrounding whitespace, None for blank and comment lines
+    """
+    name = line.strip()
+    if not name or name.startswith("#"):
+        return None
+    return sys.intern(name)
+
+
+def _parse_signal_file(real_path):
+    """ Parses a signal file line by line, using the cached result while the file is unchanged """
+    stat = os.stat(real_path)
+    cached = _parsed_files.get(real_path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    entries = []
+    directory = os.path.dirname(real_path)
+    with open(real_path, "r") as signals_file:
+        for line in signals_file:
+            stripped = line.strip()
+            if stripped.startswith(INCLUDE_DIRECTIVE) and stripped[len(INCLUDE_DIRECTIVE):][:1].isspace():
+                include_path = stripped[len(INCLUDE_DIRECTIVE):].strip().strip('"')
+                entries.append(_Include(os.path.realpath(os.path.join(directory, include_path))))
+                continue
+            name = normalize_signal_name(stripped)
+            if name is not None:
+                entries.append(name)
+    entries = tuple(entries)
+    _parsed_files[real_path] = (stat.st_mtime_ns, stat.st_size, entries)
+    return entries
+
+
+def iter_signal_file(file_path, _including=()):
+    """ This function yields the normalized signal names of a signal file, following its include directives.
+    Include paths are relative to the including file.
+    :param file_path: path of the signal file
+    :return: generator of signal names, possibly with duplicates
+    """
+    real_path = os.path.realpath(file_path)
+    if real_path in _including:
+        raise SignalFileError("Include cycle: {}".format(" -> ".join(_including + (real_path,))))
+    try:
+        entries = _parse_signal_file(real_path)
+    except OSError as error:
+        raise SignalFileError("Could not read signal file {}: {}".format(file_path, error))
+    for entry in entries:
+        if entry.__class__ is _Include:
+            for name in iter_signal_file(entry.path, _including + (real_path,)):
+                yield name
+        else:
+            yield entry
+
+
+class SignalSet(object):
+    """
+    Ordered set of signal names: keeps the first insertion order, drops duplicates and checks membership in O(1).
+    Names are normalized (stripped) once when they are added.
+
+    Args:
+        names: initial signal names
+    """
+
+    def __init__(self, names=()):
+        # dict keys keep the insertion order, the values are unused
+        self._names = {}
+        self.update(names)
+
+    def add(self, name):
+        """ This function adds one signal name
+        :param name: signal name, surrounding whitespace is removed
+        :return: True if the signal was not in the set before
+        """
+        name = normalize_signal_name(name)
+        if name is None or name in self._names:
+            return False
+        self._names[name] = None
+        return True
+
+    def update(self, names):
+        """ This function adds several signal names
+        :param names: iterable of signal names
+        :return: number of new signals
+        """
+        size = len(self._names)
+        for name in names:
+            self.add(name)
+        return len(self._names) - size
+
+    def discard(self, name):
+        self._names.pop(name.strip(), None)
+
+    def clear(self):
+        self._names.clear()
+
+    def load(self, file_path):
+        """ This function adds the signals of a signal file, including the files referenced by #include directives
+        :param file_path: path of the signal file
+        :return: number of new signals
+        """
+        size = len(self._names)
+        names = self._names
+        for name in iter_signal_file(file_path):
+            if name not in names:
+                names[name] = None
+        logger.debug("Loaded %s new signals from %s", len(names) - size, file_path)
+        return len(names) - size
+
+    @classmethod
+    def from_file(cls, file_path):
+        signal_set = cls()
+        signal_set.load(file_path)
+        return signal_set
+
+    def copy(self):
+        signal_set = SignalSet()
+        signal_set._names = self._names.copy()
+        return signal_set
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __eq__(self, other):
+        if not isinstance(other, SignalSet):
+            return NotImplemented
+        return list(self._names) == list(other._names)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return "SignalSet({} signals)".format(len(self._names))
+
+
+def _glob_to_regex(pattern):
+    """ Translates a signal glob into a regex: "*" and "?" stay inside one path level, "**" spans levels """
+    parts = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and "]" in pattern[index + 2:]:
+            end = pattern.index("]", index + 2)
+            content = pattern[index + 1:end]
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            parts.append("[" + content.replace("\\", "\\\\") + "]")
+            index = end
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return re.compile("".join(parts) + r"\Z")
+
+
+def is_signal_pattern(name):
+    """ This function checks if a signal file entry is a pattern: a glob ("Model/*/Speed*") or a regex ("re:...") """
+    return name.startswith(REGEX_PREFIX) or any(char in name for char in GLOB_CHARACTERS)
+
+
+class SignalCatalog(object):
+    """
+    Sorted index of all signals available in an experiment, used to expand signal patterns and to validate signal
+    lists before they reach ToolOne. Lookups are binary searches on the sorted names; glob patterns only scan the
+    range of their literal prefix.
+
+    Args:
+        names: available signal names
+    """
+
+    def __init__(self, names):
+        self._names = sorted(set(names))
+        self._index = frozenset(self._names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return "SignalCatalog({} signals)".format(len(self._names))
+
+    def with_prefix(self, prefix):
+        """ This function returns the signals starting with prefix, in sorted order
+        :param prefix: path prefix
+        :return: list of signal names
+        """
+        start = bisect.bisect_left(self._names, prefix)
+        # every name with the prefix sorts before prefix + the highest code point
+        stop = bisect.bisect_left(self._names, prefix + "\U0010ffff", start)
+        return self._names[start:stop]
+
+    def expand(self, pattern):
+        """ This function expands a signal pattern to the matching available signals
+        :param pattern: glob (e.g. "Model/Subsystem/*/Speed*", "**" spans path levels), "re:<regex>" or a plain name
+        :return: sorted list of matching signal names
+        """
+        if pattern.startswith(REGEX_PREFIX):
+            regex = re.compile(pattern[len(REGEX_PREFIX):])
+            return [name for name in self._names if regex.fullmatch(name)]
+        if pattern in self._index or not is_signal_pattern(pattern):
+            return [pattern] if pattern in self._index else []
+        literal_prefix = re.split(r"[*?\[]", pattern, 1)[0]
+        regex = _glob_to_regex(pattern)
+        return [name for name in self.with_prefix(literal_prefix) if regex.match(name)]
+
+    def resolve(self, signal_set):
+        """ This function expands the patterns of a signal set and checks its names against the catalog
+        :param signal_set: SignalSet or iterable of signal names and patterns
+        :return: (SignalSet of available signals, list of unknown names and patterns matching nothing)
+        """
+        resolved = SignalSet()
+        unknown = []
+        for entry in signal_set:
+            # a signal name may contain glob characters, e.g. "Model/Gain[0]", the exact name wins
+            if entry in self._index:
+                resolved.add(entry)
+            elif is_signal_pattern(entry):
+                matches = self.expand(entry)
+                if not matches:
+                    unknown.append(entry)
+                resolved.update(matches)
+            else:
+                unknown.append(entry)
+        return resolved, unknown
+
+    def validate(self, names):
+        """ This function returns the names (or patterns) which do not match any available signal
+        :param names: iterable of signal names
+        :return: list of unknown names
+        """
+        return self.resolve(names)[1]
+
+    @staticmethod
+    def cache_path(project_path, experiment_name, cache_dir=None, applications=()):
+        """ This function returns the cache file of the catalog of an experiment
+        :param applications: identities of the loaded applications, e.g. "<platform index>:<sha256>"
+        :return: path of the cache file
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get("TOOLONE_CACHE_DIR",
+                                       os.path.join(os.path.expanduser("~"), ".cache", "ToolOne"))
+        key = hashlib.sha1("{}|{}|{}".format(os.path.normcase(os.path.abspath(project_path)), experiment_name,
+                                             "|".join(applications)).encode("utf-8")).hexdigest()
+        return os.path.join(cache_dir, "signal_catalog_{}.json".format(key))
+
+    @classmethod
+    def load_cached(cls, project_path, experiment_name, cache_dir=None, applications=()):
+        """ This function loads the cached catalog of an experiment with the given applications loaded
+        :param applications: identities of the loaded applications, see cache_path()
+        :return: SignalCatalog, None when there is no cache or the project file was modified since it was written
+        """
+        cache_path = cls.cache_path(project_path, experiment_name, cache_dir, applications)
+        try:
+            mtime_ns = os.stat(project_path).st_mtime_ns
+            with open(cache_path, "r") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if cached.get("project_mtime_ns") != mtime_ns or cached.get("experiment") != experiment_name or \
+                cached.get("applications") != list(applications):
+            return None
+        return cls(cached["signals"])
+
+    def save(self, project_path, experiment_name, cache_dir=None, applications=()):
+        """ This function writes the catalog to the cache, keyed by project path, experiment, project mtime and the
+        loaded applications
+        :param applications: identities of the loaded applications, see cache_path()
+        :return: path of the cache file
+        """
+        cache_path = self.cache_path(project_path, experiment_name, cache_dir, applications)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temporary_path = "{}.{}.tmp".format(cache_path, os.getpid())
+        with open(temporary_path, "w") as cache_file:
+            json.dump({"project_path": project_path,
+                       "project_mtime_ns": os.stat(project_path).st_mtime_ns,
+                       "experiment": experiment_name,
+                       "applications": list(applications),
+                       "signals": self._names}, cache_file)
+        # replace atomically, concurrent readers see the old or the new catalog
+        os.replace(temporary_path, cache_path)
+        return cache_path
@@ -0,0 +1,651 @@
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+import ToolOne_recording as recording
+
+# this variable is used for local module only.
+logger = logging.getLogger(__name__)
+
+
+class SimulatedComError(Exception):
+    """
+    Raised by the simulator for injected failures, the counterpart of pywintypes.com_error of a real ToolOne.
+    """
+
+
+class SimulatorConfig(object):
+    """
+    Latency and failure injection settings of a SimulatedToolOne.
+
+    Every attribute access, property write, method call and collection lookup on a simulated object counts as one
+    COM round-trip named "<Object>.<member>", e.g. "Recorder.Start" or "Platform.LoadRealtimeApplication".
+
+    Args:
+        latency: default delay in seconds of every COM round-trip
+        latencies: dict overriding the delay per round-trip name (or per member name, e.g. "Insert")
+        failure_rate: probability of any round-trip raising SimulatedComError
+        seed: seed of the random generator used for failure_rate
+        experiments: names of the experiments of every opened project
+        platform_count: number of platforms of every experiment
+        trigger_rules: names of the trigger rules of the measurement data management
+        recording_dir: directory of the recordings reported in Recorder.LastRecordedFiles
+        bulk_signal_api: provide the bulk MeasurementSignals.AddRange, RecorderSignals.InsertRange,
+            VariableDescription.ReadValues and VariableDescription.WriteValues methods
+        variables: signal paths of every loaded application, listed in Platform.ActiveVariableDescription
+        recording_samples: samples per signal written to a recording container (ToolOne_recording) when a recorder
+            stops; 0 only reports the file name without writing it
+        sample_time: time between two recorded samples [s]
+    """
+
+    def __init__(self, latency=0.0, latencies=None, failure_rate=0.0, seed=None, experiments=("Experiment",),
+                 platform_count=1, trigger_rules=("Trigger",), recording_dir=None,
+                 bulk_signal_api=False, variables=(), recording_samples=0, sample_time=0.001):
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.experiments = tuple(experiments)
+        self.platform_count = platform_count
+        self.trigger_rules = tuple(trigger_rules)
+        self.recording_dir = recording_dir if recording_dir is not None else tempfile.gettempdir()
+        self.bulk_signal_api = bulk_signal_api
+        self.variables = tuple(variables)
+        self.recording_samples = recording_samples
+        self.sample_time = sample_time
+        # round-trip name -> number of upcoming calls that fail
+        self.failures = {}
+
+    def fail(self, name, count=1):
+        """ This function makes the next count round-trips with the given name raise SimulatedComError
+        :param name: round-trip name ("Recorder.Start") or member name ("Start")
+        :param count: number of failing calls
+        :return: None
+        """
+        self.failures[name] = self.failures.get(name, 0) + count
+
+
+class _Simulator(object):
+    """
+    Shared state of one simulated ToolOne process: applies the latency/failure settings and counts round-trips.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.calls = {}
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def call(self, name):
+        config = self.config
+        member = name.rpartition(".")[2]
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            failure_key = name if config.failures.get(name) else member if config.failures.get(member) else None
+            if failure_key is not None:
+                config.failures[failure_key] -= 1
+            elif config.failure_rate and self._random.random() < config.failure_rate:
+                failure_key = name
+        delay = config.latencies.get(name, config.latencies.get(member, config.latency))
+        if delay:
+            time.sleep(delay)
+        if failure_key is not None:
+            raise SimulatedComError("Injected failure in {}".format(name))
+
+    def call_count(self, name=None):
+        if name is None:
+            return sum(self.calls.values())
+        return self.calls.get(name, 0)
+
+    def signal_value(self, index):
+        """ live value of variable index, the same ramp as in the recordings """
+        sample = int((time.monotonic() - self.started) / self.config.sample_time)
+        return float((sample * (index + 1)) % 100)
+
+
+class _SimObject(object):
+    """
+    Base class of the simulated COM objects. Every access to a COM member (the PascalCase attributes) is a simulated
+    round-trip.
+    """
+    _com_name = "Object"
+    # members which only exist when SimulatorConfig.bulk_signal_api is set
+    _bulk_members = ()
+
+    def __init__(self, sim):
+        object.__setattr__(self, "_sim", sim)
+
+    def __getattribute__(self, name):
+        if name[:1].isupper():
+            sim = object.__getattribute__(self, "_sim")
+            if name in object.__getattribute__(self, "_bulk_members") and not sim.config.bulk_signal_api:
+                raise AttributeError(name)
+            sim.call(object.__getattribute__(self, "_com_name") + "." + name)
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        if name[:1].isupper():
+            self._sim.call(self._com_name + "." + name)
+        object.__setattr__(self, name, value)
+
+
+class _SimCollection(_SimObject):
+    """
+    COM collection which can be indexed by position or by the Name of its items.
+    """
+    _com_name = "Collection"
+
+    def __init__(self, sim, items=(), com_name="Collection"):
+        _SimObject.__init__(self, sim)
+        self._com_name = com_name
+        self._items = list(items)
+
+    def _find(self, name):
+        for item in self._items:
+            if item._name == name:
+                return item
+        return None
+
+    def __getitem__(self, key):
+        self._sim.call(self._com_name + ".Item")
+        if isinstance(key, int):
+            return self._items[key]
+        item = self._find(key)
+        if item is None:
+            raise SimulatedComError("{} has no item {}".format(self._com_name, key))
+        return item
+
+    def __iter__(self):
+        self._sim.call(self._com_name + "._NewEnum")
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def Count(self):
+        return len(self._items)
+
+    def Contains(self, name):
+        return self._find(name) is not None
+
+
+class SimulatedSignal(_SimObject):
+    _com_name = "Signal"
+
+    def __init__(self, sim, name):
+        _SimObject.__init__(self, sim)
+        self._name = name
+
+    @property
+    def Name(self):
+        return self._name
+
+
+class _SignalConfiguration(_SimCollection):
+    """ MeasurementConfiguration.Signals: creates the signal items which are inserted into recorders """
+    _bulk_members = ("AddRange",)
+
+    def __init__(self, sim):
+        _SimCollection.__init__(self, sim, com_name="MeasurementSignals")
+        self._by_name = {}
+
+    def _find(self, name):
+        return self._by_name.get(name)
+
+    def _add(self, name):
+        signal = self._by_name.get(name)
+        if signal is None:
+            signal = self._by_name[name] = SimulatedSignal(self._sim, name)
+            self._items.append(signal)
+        return signal
+
+    def Add(self, name):
+        return self._add(name)
+
+    def AddRange(self, names):
+        return [self._add(name) for name in names]
+
+
+class _RecorderSignals(_SimCollection):
+    """ Recorder.Signals: the signals recorded by one recorder, duplicates are kept like in ToolOne """
+    _bulk_members = ("InsertRange",)
+
+    def __init__(self, sim):
+        _SimCollection.__init__(self, sim, com_name="RecorderSignals")
+
+    def Insert(self, signal):
+        self._items.append(signal)
+
+    def InsertRange(self, signals):
+        self._items.extend(signals)
+
+    def Remove(self, signal):
+        self._items.remove(signal)
+
+
+class _MeasurementConfiguration(_SimObject):
+    _com_name = "MeasurementConfiguration"
+
+    def __init__(self, sim):
+        _SimObject.__init__(self, sim)
+        self._signals = _SignalConfiguration(sim)
+
+    @property
+    def Signals(self):
+        return self._signals
+
+
+class _StartCondition(_SimObject):
+    _com_name = "StartCondition"
+
+    def __init__(self, sim):
+        _SimObject.__init__(self, sim)
+        self.__dict__["Enabled"] = False
+        self.__dict__["Trigger"] = None
+
+
+class _TriggerRule(_SimObject):
+    _com_name = "TriggerRule"
+
+    def __init__(self, sim, name):
+        _SimObject.__init__(self, sim)
+        self._name = name
+
+    @property
+    def Name(self):
+        return self._name
+
+
+class _Recorder(_SimObject):
+    _com_name = "Recorder"
+
+    def __init__(self, sim, measurement, index):
+        _SimObject.__init__(self, sim)
+        self._measurement = measurement
+        self._index = index
+        self._signals = _RecorderSignals(sim)
+        self._start_condition = _StartCondition(sim)
+        self._recording = False
+        self._recorded_files = []
+        self._counter = 0
+        # measurement time of the Start() of the current recording [s]
+        self._start_time = 0.0
+
+    @property
+    def Signals(self):
+        return self._signals
+
+    @property
+    def StartCondition(self):
+        return self._start_condition
+
+    @property
+    def LastRecordedFiles(self):
+        return tuple(self._recorded_files)
+
+    def Start(self, with_trigger, overwrite_existing):
+        if self._recording:
+            raise SimulatedComError("Recorder {} is already recording".format(self._index))
+        self._recording = True
+        self._start_time = time.monotonic() - self._sim.started
+        # starting a recorder starts the measurement of the experiment
+        self._measurement._measuring = True
+
+    def Stop(self):
+        self._stop()
+
+    def _stop(self):
+        if not self._recording:
+            return
+        self._recording = False
+        self._counter += 1
+        file_name = "Recorder{}_{}_{:04d}{}".format(self._index, os.getpid(), self._counter, recording.EXTENSION)
+        file_path = os.path.join(self._sim.config.recording_dir, file_name)
+        if self._sim.config.recording_samples:
+            self._write_recording(file_path)
+        self._recorded_files = [file_path]
+
+    def _write_recording(self, file_path):
+        """ writes deterministic test data: signal i is a ramp with slope i + 1, wrapped to [0, 100), sampled from the
+        measurement time of Start() on """
+        config = self._sim.config
+        samples = range(config.recording_samples)
+        time_stamps = [self._start_time + sample * config.sample_time for sample in samples]
+        signals = []
+        for index, signal in enumerate(dict.fromkeys(signal._name for signal in self._signals._items)):
+            signals.append((signal, [(sample * (index + 1)) % 100.0 for sample in samples]))
+        recording.write_recording(file_path, time_stamps, signals)
+
+
+class _MeasurementDataManagement(_SimObject):
+    _com_name = "MeasurementDataManagement"
+
+    def __init__(self, sim):
+        _SimObject.__init__(self, sim)
+        self._measuring = False
+        self._configuration = _MeasurementConfiguration(sim)
+        self._recorders = _SimCollection(sim, [_Recorder(sim, self, 0)], com_name="Recorders")
+        self._trigger_rules = _SimCollection(sim, [_TriggerRule(sim, name) for name in sim.config.trigger_rules],
+                                             com_name="TriggerRules")
+
+    @property
+    def IsMeasuring(self):
+        return self._measuring
+
+    @property
+    def MeasurementConfiguration(self):
+        return self._configuration
+
+    @property
+    def Recorders(self):
+        return self._recorders
+
+    @property
+    def TriggerRules(self):
+        return self._trigger_rules
+
+    def Start(self):
+        self._measuring = True
+
+    def Stop(self):
+        # stopping the measurement completes the recordings
+        for recorder in self._recorders._items:
+            recorder._stop()
+        self._measuring = False
+
+
+class _CalibrationManagement(_SimObject):
+    _com_name = "CalibrationManagement"
+
+    def __init__(self, sim):
+        _SimObject.__init__(self, sim)
+        self._state = 0
+
+    @property
+    def State(self):
+        return self._state
+
+    def StartOnlineCalibration(self):
+        self._state = 1
+
+    def StopOnlineCalibration(self):
+        self._state = 0
+
+
+class _RealTimeApplication(_SimObject):
+    """ Application loaded on a platform. State: 1 loaded (stopped), 2 running, 3 paused """
+    _com_name = "RealTimeApplication"
+
+    def __init__(self, sim, platform, file_path):
+        _SimObject.__init__(self, sim)
+        self._platform = platform
+        self._name = os.path.basename(os.path.normpath(file_path))
+        self._file_path = file_path
+        self._state = 1
+        self._variable_description = _VariableDescription(sim)
+
+    @property
+    def Name(self):
+        return self._name
+
+    @property
+    def State(self):
+        return self._state
+
+    def Start(self):
+        self._state = 2
+
+    def Stop(self):
+        self._state = 1
+
+    def Pause(self):
+        self._state = 3
+
+    def Unload(self):
+        if self._platform._tool._calibration._state == 1:
+            raise SimulatedComError("Cannot unload {} while online calibration is running".format(self._name))
+        self._platform._applications._items.remove(self)
+        self._platform._application = None
+
+
+class _Variable(_SimObject):
+    _com_name = "Variable"
+
+    def __init__(self, sim, path, index):
+        _SimObject.__init__(self, sim)
+        self._name = path
+        self._index = index
+        # value written by a calibration, replaces the live value
+        self._value = None
+
+    def _read(self):
+        return self._sim.signal_value(self._index) if self._value is None else self._value
+
+    @property
+    def Path(self):
+        return self._name
+
+    @property
+    def Value(self):
+        return self._read()
+
+    @Value.setter
+    def Value(self, value):
+        self._value = value
+
+
+class _VariableDescription(_SimObject):
+    _com_name = "VariableDescription"
+    _bulk_members = ("ReadValues", "WriteValues")
+
+    def __init__(self, sim):
+        _SimObject.__init__(self, sim)
+        self._variables = _SimCollection(sim, [_Variable(sim, path, index)
+                                               for index, path in enumerate(sim.config.variables)],
+                                         com_name="Variables")
+
+    @property
+    def Variables(self):
+        return self._variables
+
+    def ReadValues(self, paths):
+        return tuple(self._variables._find(path)._read() for path in paths)
+
+    def WriteValues(self, paths, values):
+        variables = [self._variables._find(path) for path in paths]
+        for variable, value in zip(variables, values):
+            variable._value = value
+
+
+class _Platform(_SimObject):
+    _com_name = "Platform"
+
+    def __init__(self, sim, tool, index):
+        _SimObject.__init__(self, sim)
+        self._tool = tool
+        self._name = "Platform{}".format(index + 1)
+        self._applications = _SimCollection(sim, com_name="RealTimeApplications")
+        self._application = None
+
+    @property
+    def Name(self):
+        return self._name
+
+    @property
+    def RealTimeApplications(self):
+        return self._applications
+
+    @property
+    def RealTimeApplication(self):
+        return self._application
+
+    @property
+    def ActiveVariableDescription(self):
+        if self._application is None:
+            return None
+        return self._application._variable_description
+
+    def LoadRealtimeApplication(self, file_path):
+        application = _RealTimeApplication(self._sim, self, file_path)
+        # a platform runs one application, loading replaces the previous one
+        self._applications._items[:] = [application]
+        self._application = application
+
+
+class _Experiment(_SimObject):
+    _com_name = "Experiment"
+
+    def __init__(self, sim, tool, name):
+        _SimObject.__init__(self, sim)
+        self._tool = tool
+        self._name = name
+
+    @property
+    def Name(self):
+        return self._name
+
+    @property
+    def Platforms(self):
+        return self._tool._platform_management._platforms
+
+    def Activate(self):
+        self._tool._active_experiment = self
+
+
+class _Project(_SimObject):
+    _com_name = "Project"
+
+    def __init__(self, sim, tool, file_path):
+        _SimObject.__init__(self, sim)
+        self._tool = tool
+        self._full_path = file_path
+        self._name = os.path.splitext(os.path.basename(file_path))[0]
+        self._experiments = _SimCollection(sim, [_Experiment(sim, tool, name) for name in sim.config.experiments],
+                                           com_name="Experiments")
+
+    @property
+    def Name(self):
+        return self._name
+
+    @property
+    def FullPath(self):
+        return self._full_path
+
+    @property
+    def Experiments(self):
+        return self._experiments
+
+    def Save(self):
+        pass
+
+    def Close(self, SaveChanges=True):
+        self._tool._close_project()
+
+
+class _PlatformManagement(_SimObject):
+    _com_name = "PlatformManagement"
+
+    def __init__(self, sim, tool):
+        _SimObject.__init__(self, sim)
+        self._platforms = _SimCollection(sim, [_Platform(sim, tool, index)
+                                               for index in range(sim.config.platform_count)], com_name="Platforms")
+
+    @property
+    def Platforms(self):
+        return self._platforms
+
+
+class _MainWindow(_SimObject):
+    _com_name = "MainWindow"
+
+    def __init__(self, sim):
+        _SimObject.__init__(self, sim)
+        self.__dict__["Visible"] = False
+
+
+class SimulatedToolOne(_SimObject):
+    """
+    In-process fake of the ToolOneNG.Application object model, usable as ToolOneControl backend:
+
+        control = ToolOneControl(dispatch=lambda: SimulatedToolOne(SimulatorConfig(latency=0.001)))
+
+    The simulator keeps the state transitions of ToolOne (project/experiment activation, application loading,
+    online calibration, measuring and recording) and counts every COM round-trip in call_count().
+
+    Args:
+        config: SimulatorConfig, a default configuration without latency is used when omitted
+    """
+    _com_name = "Application"
+    version = "Simulator 1.0"
+
+    def __init__(self, config=None):
+        sim = _Simulator(config if config is not None else SimulatorConfig())
+        _SimObject.__init__(self, sim)
+        self._main_window = _MainWindow(sim)
+        self._calibration = _CalibrationManagement(sim)
+        self._measurement = _MeasurementDataManagement(sim)
+        self._platform_management = _PlatformManagement(sim, self)
+        self._active_project = None
+        self._active_experiment = None
+        self._running = True
+
+    def call_count(self, name=None):
+        """ This function returns the number of simulated COM round-trips
+        :param name: round-trip name, e.g. "Recorder.Start"; all round-trips when omitted
+        :return: number of calls
+        """
+        return self._sim.call_count(name)
+
+    def reset_call_counts(self):
+        self._sim.calls.clear()
+
+    def _close_project(self):
+        self._active_project = None
+        self._active_experiment = None
+        self._calibration._state = 0
+        self._measurement.Stop()
+        for platform in self._platform_management._platforms._items:
+            platform._applications._items[:] = []
+            platform._application = None
+
+    @property
+    def Version(self):
+        return self.version
+
+    @property
+    def MainWindow(self):
+        return self._main_window
+
+    @property
+    def ActiveProject(self):
+        return self._active_project
+
+    @property
+    def ActiveExperiment(self):
+        return self._active_experiment
+
+    @property
+    def PlatformManagement(self):
+        return self._platform_management
+
+    @property
+    def CalibrationManagement(self):
+        return self._calibration
+
+    @property
+    def MeasurementDataManagement(self):
+        return self._measurement
+
+    def OpenProject(self, file_path):
+        if self._active_project is not None:
+            self._close_project()
+        self._active_project = _Project(self._sim, self, file_path)
+
+    def Quit(self, save_changes=False):
+        self._close_project()
+        self._running = False
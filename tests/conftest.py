@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# the ToolOne modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ToolOne_simulator import SimulatedToolOne, SimulatorConfig  # noqa: E402
+
+
+@pytest.fixture
+def bench(tmp_path):
+    """ project, application and recording directory of a simulated ToolOne bench """
+    project = tmp_path / "Bench.CDP"
+    project.write_text("project")
+    application = tmp_path / "Model.osa"
+    application.write_bytes(b"build 1")
+    recording_dir = tmp_path / "recordings"
+    recording_dir.mkdir()
+    return {"project": str(project), "application": str(application), "recording_dir": str(recording_dir),
+            "directory": tmp_path}
+
+
+@pytest.fixture
+def simulator_config(bench):
+    return SimulatorConfig(variables=("Model/Speed", "Model/Torque", "Model/Gain[0]"),
+                           recording_dir=bench["recording_dir"])
+
+
+@pytest.fixture
+def dispatch(simulator_config):
+    """ SimulatedToolOne backend counting the started ToolOne instances in dispatch.count """
+    def dispatch():
+        dispatch.count += 1
+        return SimulatedToolOne(simulator_config)
+    dispatch.count = 0
+    return dispatch
@@ -0,0 +1,74 @@
+import gzip
+import json
+import os
+import shutil
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import ToolOne_analysis  # noqa: E402
+from ToolOne_analysis import AnalysisConfig, RecordingAnalyzer, analyze_signal  # noqa: E402
+from ToolOne_recording import open_recording, write_recording  # noqa: E402
+
+SIGNALS = ["Model/Signal{}".format(index) for index in range(40)]
+
+
+@pytest.fixture
+def recording_path(tmp_path):
+    time = np.arange(1000) * 0.01
+    signals = [(name, np.sin(time * (index + 1))) for index, name in enumerate(SIGNALS)]
+    path = str(tmp_path / "Recorder0.t1rec")
+    write_recording(path, time, signals)
+    return path
+
+
+@pytest.fixture
+def compressed_path(recording_path):
+    path = recording_path + ".gz"
+    with open(recording_path, "rb") as source, gzip.open(path, "wb") as target:
+        shutil.copyfileobj(source, target)
+    return path
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = RecordingAnalyzer(AnalysisConfig(statistics=("min", "max", "mean", "std", "count"), thresholds=0.5,
+                                                chunk_size=64), workers=2)
+    yield analyzer
+    analyzer.close()
+
+
+def test_batches_match_the_single_signal_analysis(recording_path, analyzer, tmp_path, monkeypatch):
+    summary_path = str(tmp_path / "summary.json")
+    # every batch of 20 signals is read in three passes
+    monkeypatch.setattr(ToolOne_analysis, "_SIGNALS_PER_PASS", 8)
+
+    summary = analyzer.analyze([recording_path], summary_path)
+
+    with open_recording(recording_path) as recording:
+        expected = {signal: analyze_signal(recording, signal, analyzer.config) for signal in SIGNALS}
+    results = summary["files"][recording_path]
+    assert results.keys() == expected.keys()
+    for signal in SIGNALS:
+        assert results[signal] == expected[signal]
+    with open(summary_path) as summary_file:
+        assert json.load(summary_file)["files"][recording_path].keys() == expected.keys()
+
+
+def test_compressed_recordings_are_decompressed_once(recording_path, compressed_path, analyzer, monkeypatch):
+    decompressed = []
+    decompress_recording = ToolOne_analysis.decompress_recording
+
+    def counting_decompress_recording(file_path, directory):
+        decompressed.append((file_path, directory))
+        return decompress_recording(file_path, directory)
+
+    monkeypatch.setattr(ToolOne_analysis, "decompress_recording", counting_decompress_recording)
+    # two batches of 15 signals read the same recording
+    summary = analyzer.analyze([compressed_path], signals=SIGNALS[:30])
+
+    assert [file_path for file_path, _ in decompressed] == [compressed_path]
+    assert not os.path.exists(decompressed[0][1])
+    expected = analyzer.analyze([recording_path], signals=SIGNALS[:30])["files"][recording_path]
+    assert summary["files"][compressed_path] == expected
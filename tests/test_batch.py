@@ -0,0 +1,85 @@
+import json
+import os
+
+from ToolOne_batch import CHECKPOINT_SUFFIX, load_results, run_batch
+from ToolOne_scenario import Scenario
+
+
+def _scenarios(bench, count=3):
+    return [Scenario("scenario{}".format(index), bench["project"], "Experiment", bench["application"], "Trigger")
+            for index in range(count)]
+
+
+def _write_checkpoint(results_path, entries):
+    with open(results_path + CHECKPOINT_SUFFIX, "w") as checkpoint_file:
+        for entry in entries:
+            checkpoint_file.write(json.dumps(entry) + "\n")
+
+
+def _entry(name, recording_path, error=None):
+    return {"name": name, "recording_path": recording_path, "error": error, "duration": 0.0, "worker": 0}
+
+
+def test_batch_runs_all_scenarios_and_removes_the_checkpoint(bench, dispatch):
+    results_path = str(bench["directory"] / "results.json")
+
+    index = run_batch(_scenarios(bench), results_path, dispatch=dispatch)
+
+    assert index["summary"]["passed"] == 3
+    assert dispatch.count == 1
+    assert not os.path.exists(results_path + CHECKPOINT_SUFFIX)
+    assert load_results(results_path) == {}
+
+
+def test_rerun_of_a_completed_batch_runs_every_scenario_again(bench, dispatch):
+    results_path = str(bench["directory"] / "results.json")
+    run_batch(_scenarios(bench), results_path, dispatch=dispatch)
+
+    index = run_batch(_scenarios(bench), results_path, dispatch=dispatch)
+
+    assert dispatch.count == 2
+    assert index["summary"]["passed"] == 3
+
+
+def test_resume_skips_the_scenarios_passed_before_the_interruption(bench, dispatch):
+    results_path = str(bench["directory"] / "results.json")
+    _write_checkpoint(results_path, [_entry("scenario0", "earlier.t1rec"),
+                                     _entry("scenario1", None, error="Traceback ...")])
+
+    index = run_batch(_scenarios(bench), results_path, dispatch=dispatch)
+
+    recording_paths = {entry["name"]: entry["recording_path"] for entry in index["results"]}
+    assert recording_paths["scenario0"] == "earlier.t1rec"
+    assert recording_paths["scenario1"] is not None
+    assert all(entry["error"] is None for entry in index["results"])
+    assert not os.path.exists(results_path + CHECKPOINT_SUFFIX)
+
+
+def test_resume_of_a_fully_checkpointed_batch_does_not_start_ToolOne(bench, dispatch):
+    results_path = str(bench["directory"] / "results.json")
+    _write_checkpoint(results_path, [_entry(scenario.name, scenario.name + ".t1rec")
+                                     for scenario in _scenarios(bench)])
+
+    index = run_batch(_scenarios(bench), results_path, dispatch=dispatch)
+
+    assert dispatch.count == 0
+    assert index["summary"]["passed"] == 3
+
+
+def test_no_resume_ignores_the_checkpoint(bench, dispatch):
+    results_path = str(bench["directory"] / "results.json")
+    _write_checkpoint(results_path, [_entry("scenario0", "earlier.t1rec")])
+
+    index = run_batch(_scenarios(bench), results_path, resume=False, dispatch=dispatch)
+
+    assert dispatch.count == 1
+    assert all(entry["recording_path"] != "earlier.t1rec" for entry in index["results"])
+
+
+def test_truncated_last_checkpoint_line_is_ignored(bench):
+    results_path = str(bench["directory"] / "results.json")
+    _write_checkpoint(results_path, [_entry("scenario0", "earlier.t1rec")])
+    with open(results_path + CHECKPOINT_SUFFIX, "a") as checkpoint_file:
+        checkpoint_file.write('{"name": "scenario1", "recor')
+
+    assert list(load_results(results_path)) == ["scenario0"]
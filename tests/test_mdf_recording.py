@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+asammdf = pytest.importorskip("asammdf")
+
+from ToolOne_recording import open_recording  # noqa: E402
+
+
+@pytest.fixture
+def mdf_path(tmp_path):
+    """ MDF file with two channel groups: Model/Speed, Model/Torque at 10 ms and Model/Gain at 100 ms """
+    fast = np.arange(100) * 0.01
+    slow = np.arange(10) * 0.1
+    mdf = asammdf.MDF(version="4.10")
+    mdf.append([asammdf.Signal(fast * 2.0, fast, name="Model/Speed"),
+                asammdf.Signal(fast * 3.0, fast, name="Model/Torque")])
+    mdf.append([asammdf.Signal(slow * 5.0, slow, name="Model/Gain")])
+    path = str(tmp_path / "Recorder0.mf4")
+    mdf.save(path)
+    mdf.close()
+    return path
+
+
+def test_read_returns_the_time_stamps_of_the_signal(mdf_path):
+    with open_recording(mdf_path) as recording:
+        time, values = recording.read("Model/Gain", 0.2, 0.5)
+
+    assert recording.signals == ["Model/Speed", "Model/Torque", "Model/Gain"]
+    np.testing.assert_allclose(time, [0.2, 0.3, 0.4])
+    np.testing.assert_allclose(values, [1.0, 1.5, 2.0])
+
+
+def test_iter_chunks_reads_record_ranges_and_interpolates_other_groups(mdf_path):
+    with open_recording(mdf_path) as recording:
+        chunks = list(recording.iter_chunks(start=0.1, chunk_size=40))
+
+    assert [len(chunk.time) for chunk in chunks] == [40, 40, 10]
+    time = np.concatenate([chunk.time for chunk in chunks])
+    np.testing.assert_allclose(np.concatenate([chunk.signals["Model/Torque"] for chunk in chunks]), time * 3.0)
+    np.testing.assert_allclose(np.concatenate([chunk.signals["Model/Gain"] for chunk in chunks]),
+                               np.minimum(time, 0.9) * 5.0)
@@ -0,0 +1,49 @@
+import pytest
+
+import ToolOne_simulator
+from ToolOne_API_control_module import ToolOneControl
+from ToolOne_simulator import SimulatedComError
+
+
+@pytest.fixture
+def failing_torque(monkeypatch):
+    """ makes writing Model/Torque fail, after the parameters before it in the write were written """
+    value = ToolOne_simulator._Variable.Value
+
+    def write(variable, new_value):
+        if variable._name == "Model/Torque":
+            raise SimulatedComError("Variable {} is read-only".format(variable._name))
+        value.fset(variable, new_value)
+
+    monkeypatch.setattr(ToolOne_simulator._Variable, "Value", property(value.fget, write))
+
+
+@pytest.fixture(params=[False, True], ids=["single", "bulk"])
+def control(request, bench, dispatch, simulator_config):
+    simulator_config.bulk_signal_api = request.param
+    control = ToolOneControl(window_visible=False, dispatch=dispatch)
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+    control.load_application_from_file(bench["application"])
+    return control
+
+
+def test_failed_atomic_write_restores_the_previous_values(control, simulator_config, failing_torque):
+    control.set_parameters({"Model/Speed": 1.0, "Model/Gain[0]": 2.0})
+    if simulator_config.bulk_signal_api:
+        simulator_config.fail("WriteValues")
+
+    with pytest.raises(SimulatedComError):
+        control.set_parameters({"Model/Speed": 5.0, "Model/Gain[0]": 6.0, "Model/Torque": 3.0})
+
+    assert control.read_signal_values(["Model/Speed", "Model/Gain[0]"]) == [1.0, 2.0]
+
+
+def test_rollback_restores_the_values_before_the_last_parameter_set(control):
+    control.set_parameters({"Model/Speed": 1.0, "Model/Gain[0]": 2.0})
+    control.set_parameters({"Model/Speed": 5.0, "Model/Gain[0]": 6.0})
+
+    assert sorted(control.rollback_parameters()) == ["Model/Gain[0]", "Model/Speed"]
+    assert control.read_signal_values(["Model/Speed", "Model/Gain[0]"]) == [1.0, 2.0]
+    # a rollback is not rolled back again
+    assert control.rollback_parameters() == []
@@ -0,0 +1,63 @@
+from ToolOne_API_control_module import ToolOneControl
+from ToolOne_planner import APPLICATION_STATE_LOADED, APPLICATION_STATE_RUNNING, CALIBRATION_STATE_OFFLINE, \
+    CALIBRATION_STATE_ONLINE, DesiredState, RecorderSettings, ToolOneState, plan_transition
+
+SETTINGS = RecorderSettings(True, "Trigger", True, True)
+# application running with online calibration and an armed recorder
+RUNNING = ToolOneState("Bench.CDP", "Experiment", "Model.osa", APPLICATION_STATE_RUNNING, CALIBRATION_STATE_ONLINE,
+                       True, recorder_settings=SETTINGS)
+TEST_RUN = DesiredState(project="Bench.CDP", experiment="Experiment", application="Apps/Model.osa",
+                        application_running=True, calibration_online=True, recorder_armed=SETTINGS)
+
+
+def _methods(plan):
+    return [step.method for step in plan]
+
+
+def test_desired_state_needs_no_steps():
+    assert _methods(plan_transition(RUNNING, TEST_RUN)) == []
+
+
+def test_calibration_is_only_toggled_to_start_the_application():
+    loaded = RUNNING._replace(application_state=APPLICATION_STATE_LOADED, is_measuring=False, recorder_settings=None)
+
+    assert _methods(plan_transition(loaded, TEST_RUN)) == ["stop_online_calibration", "start_application_on_platform",
+                                                           "start_online_calibration", "arm_recorder"]
+    assert _methods(plan_transition(loaded._replace(calibration_state=CALIBRATION_STATE_OFFLINE), TEST_RUN)) == [
+        "start_application_on_platform", "start_online_calibration", "arm_recorder"]
+
+
+def test_experiment_change_resets_everything_below_it():
+    plan = plan_transition(RUNNING._replace(experiment="Other"), TEST_RUN)
+
+    assert _methods(plan) == ["activate_experiment", "load_application_from_file", "start_application_on_platform",
+                              "start_online_calibration", "arm_recorder"]
+    assert plan.estimated_cost == 5.0 + 30.0 + 2.0 + 5.0 + 0.5
+
+
+def test_outdated_build_is_reloaded():
+    plan = plan_transition(RUNNING._replace(application_outdated=True), DesiredState(application="Apps/Model.osa"))
+
+    assert _methods(plan) == ["stop_online_calibration", "unload_application_from_platform",
+                              "load_application_from_file"]
+
+
+def test_recorder_is_rearmed_only_for_other_settings():
+    other_settings = SETTINGS._replace(overwrite_existing=False)
+
+    assert _methods(plan_transition(RUNNING, DesiredState(recorder_armed=other_settings))) == [
+        "stop_recording_measurement", "arm_recorder"]
+    assert _methods(plan_transition(RUNNING, DesiredState(recorder_armed=False))) == ["stop_recording_and_measuring"]
+
+
+def test_second_start_running_test_runs_no_step(bench, dispatch):
+    control = ToolOneControl(window_visible=False, dispatch=dispatch)
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+    control.load_application_from_file(bench["application"])
+    control.start_running_test(*SETTINGS)
+
+    plan = control.plan_state(DesiredState(application_running=True, calibration_online=True,
+                                           recorder_armed=SETTINGS))
+
+    assert _methods(plan) == []
@@ -0,0 +1,54 @@
+import os
+import time
+
+import pytest
+
+import ToolOne_simulator
+from ToolOne_API_control_module import ToolOneControl
+from ToolOne_simulator import SimulatedToolOne
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def recorder_starts(monkeypatch):
+    """ WithTrigger of every Recorder.Start() """
+    starts = []
+    start = ToolOne_simulator._Recorder.Start
+
+    def recording_start(recorder, with_trigger, overwrite_existing):
+        starts.append(with_trigger)
+        start(recorder, with_trigger, overwrite_existing)
+
+    monkeypatch.setattr(ToolOne_simulator._Recorder, "Start", recording_start)
+    return starts
+
+
+@pytest.fixture
+def control(bench, simulator_config):
+    simulator_config.recording_samples = 100
+    control = ToolOneControl(window_visible=False, dispatch=lambda: SimulatedToolOne(simulator_config))
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+    control.load_application_from_file(bench["application"])
+    control.signals.update(["Model/Speed", "Model/Torque"])
+    control.set_signals_to_record()
+    return control
+
+
+@pytest.mark.parametrize("stop", ["stop_recording_and_measuring", "stop_measuring"])
+def test_rotation_indexes_every_chunk(bench, control, recorder_starts, stop):
+    manifest_path = str(bench["directory"] / "run.t1manifest")
+    control.start_running_test(True, "Trigger", True, True)
+    control.start_recording_rotation(manifest_path, max_duration=0.05)
+    time.sleep(0.3)
+
+    getattr(control, stop)()
+
+    chunk_paths = control.get_recording_paths()
+    assert control.get_recording_path() == manifest_path
+    assert len(chunk_paths) == len(recorder_starts) > 2
+    assert all(os.path.exists(path) for path in chunk_paths)
+    # only the first chunk waits for the trigger
+    assert recorder_starts[0] is True
+    assert not any(recorder_starts[1:])
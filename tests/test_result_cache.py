@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+from ToolOne_API_control_module import ToolOneControl
+from ToolOne_batch import main
+from ToolOne_result_cache import ResultCache, scenario_key
+from ToolOne_scenario import Scenario, run_scenario
+
+
+def _scenario(bench, name="scenario", **kwargs):
+    return Scenario(name, bench["project"], "Experiment", bench["application"], "Trigger", **kwargs)
+
+
+def test_key_ignores_the_scenario_name(bench):
+    assert scenario_key(_scenario(bench, "first")) == scenario_key(_scenario(bench, "second"))
+
+
+def test_key_covers_settings_and_parameters(bench):
+    key = scenario_key(_scenario(bench))
+
+    assert scenario_key(_scenario(bench, duration=1.0)) != key
+    assert scenario_key(_scenario(bench, parameters={"Model/Gain[0]": 2.0})) != key
+
+
+def test_key_follows_the_application_content_not_its_modification_time(bench):
+    key = scenario_key(_scenario(bench))
+
+    stat = os.stat(bench["application"])
+    os.utime(bench["application"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert scenario_key(_scenario(bench)) == key
+
+    with open(bench["application"], "ab") as application_file:
+        application_file.write(b" rebuilt")
+    assert scenario_key(_scenario(bench)) != key
+
+
+def test_key_covers_included_signal_files(bench):
+    directory = bench["directory"]
+    (directory / "common.signals").write_text("Model/Speed\n")
+    signal_file = directory / "scenario.signals"
+    signal_file.write_text("#include common.signals\nModel/Torque\n")
+    key = scenario_key(_scenario(bench, signal_file=str(signal_file)))
+
+    (directory / "common.signals").write_text("Model/Speed\nModel/Gain[0]\n")
+
+    assert scenario_key(_scenario(bench, signal_file=str(signal_file))) != key
+
+
+def test_cached_result_of_a_simulated_run(bench, dispatch):
+    scenario = _scenario(bench)
+    control = ToolOneControl(window_visible=False, dispatch=dispatch)
+    recording_path = run_scenario(control, scenario)
+    open(recording_path, "w").close()
+    cache = ResultCache(str(bench["directory"] / "cache"))
+
+    assert cache.get(scenario_key(scenario)) is None
+    stored = cache.put(scenario_key(scenario), [recording_path], summary={"passed": True})
+    assert cache.set_summary(scenario_key(scenario), {"passed": False})
+
+    cached = cache.get(scenario_key(_scenario(bench, "renamed")))
+    assert cached.recording_paths == stored.recording_paths
+    assert all(os.path.exists(path) for path in cached.recording_paths)
+    assert cached.summary == {"passed": False}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_simulated_batch_caches_and_analyzes_its_recordings(bench):
+    pytest.importorskip("numpy")
+    manifest_path = str(bench["directory"] / "batch.json")
+    with open(manifest_path, "w") as manifest_file:
+        json.dump({"defaults": {"project": bench["project"], "experiment": "Experiment",
+                                "application": bench["application"], "trigger_rules": "Trigger"},
+                   "scenarios": [{"name": "first"}, {"name": "second", "duration": 0.01}]}, manifest_file)
+    arguments = [manifest_path, "--simulator", "--simulator-samples", "10", "--analyze",
+                 "--cache-dir", str(bench["directory"] / "cache")]
+
+    assert main(arguments) == 0
+    assert main(arguments) == 0
+
+    with open(str(bench["directory"] / "batch.results.json")) as results_file:
+        index = json.load(results_file)
+    assert index["summary"]["cached"] == 2
+    assert all(entry["analysis"]["files"] for entry in index["results"])
@@ -0,0 +1,76 @@
+import pytest
+
+from ToolOne_API_control_module import ToolOneControl
+from ToolOne_signals import SignalCatalog, SignalFileError, SignalSet
+
+
+CATALOG = SignalCatalog(["Model/Gain[0]", "Model/Gain[1]", "Model/Engine/Speed", "Model/Engine/Torque",
+                         "Model/Gearbox/Speed"])
+
+
+def test_resolve_prefers_an_exact_name_with_glob_characters():
+    resolved, unknown = CATALOG.resolve(["Model/Gain[0]"])
+
+    assert list(resolved) == ["Model/Gain[0]"]
+    assert unknown == []
+
+
+def test_resolve_expands_globs_and_regexes():
+    resolved, unknown = CATALOG.resolve(["Model/*/Speed", "re:Model/Engine/T.*"])
+
+    assert list(resolved) == ["Model/Engine/Speed", "Model/Gearbox/Speed", "Model/Engine/Torque"]
+    assert unknown == []
+
+
+def test_resolve_reports_unknown_names_and_empty_patterns():
+    resolved, unknown = CATALOG.resolve(["Model/Engine/Speed", "Model/Engine/Sped", "Model/Clutch/*"])
+
+    assert list(resolved) == ["Model/Engine/Speed"]
+    assert unknown == ["Model/Engine/Sped", "Model/Clutch/*"]
+
+
+def test_double_star_spans_path_levels():
+    assert CATALOG.expand("Model/**Speed") == ["Model/Engine/Speed", "Model/Gearbox/Speed"]
+    assert CATALOG.expand("Model/*Speed") == []
+
+
+def test_signal_file_includes_and_cycles(tmp_path):
+    (tmp_path / "common.signals").write_text("# shared\nModel/Engine/Speed\n")
+    (tmp_path / "scenario.signals").write_text("#include common.signals\nModel/Engine/Speed\n Model/Gain[0] \n")
+    (tmp_path / "cycle.signals").write_text("#include cycle.signals\n")
+
+    assert list(SignalSet.from_file(str(tmp_path / "scenario.signals"))) == ["Model/Engine/Speed", "Model/Gain[0]"]
+    with pytest.raises(SignalFileError):
+        SignalSet.from_file(str(tmp_path / "cycle.signals"))
+
+
+def test_signal_file_resolved_against_the_simulated_catalog(bench, dispatch):
+    signal_file = bench["directory"] / "scenario.signals"
+    signal_file.write_text("Model/Gain[0]\nModel/T*\nModel/Missing\n")
+    control = ToolOneControl(window_visible=False, dispatch=dispatch)
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+    control.load_application_from_file(bench["application"])
+    catalog = control.signal_catalog(cache_dir=str(bench["directory"] / "cache"))
+
+    unknown = control.read_signals_from_file(str(signal_file), catalog=catalog)
+
+    assert list(control.signals) == ["Model/Gain[0]", "Model/Torque"]
+    assert unknown == ["Model/Missing"]
+
+
+def test_catalog_cache_is_bound_to_the_loaded_application(bench, dispatch, simulator_config):
+    cache_dir = str(bench["directory"] / "cache")
+    control = ToolOneControl(window_visible=False, dispatch=dispatch)
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+    assert len(control.signal_catalog(cache_dir=cache_dir)) == 0
+
+    control.load_application_from_file(bench["application"])
+    assert "Model/Speed" in control.signal_catalog(cache_dir=cache_dir)
+
+    simulator_config.variables = ("Model/Speed", "Model/Power")
+    with open(bench["application"], "ab") as application_file:
+        application_file.write(b" rebuilt")
+    control.load_application_from_file(bench["application"])
+    assert "Model/Power" in control.signal_catalog(cache_dir=cache_dir)
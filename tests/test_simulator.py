@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from ToolOne_API_control_module import ToolOneControl
+from ToolOne_benchmark import compare_with_baseline, main
+from ToolOne_simulator import SimulatedComError, SimulatedToolOne
+
+
+@pytest.fixture
+def tool(simulator_config):
+    return SimulatedToolOne(simulator_config)
+
+
+def test_round_trips_are_counted_per_name(bench, tool):
+    control = ToolOneControl(window_visible=False, dispatch=lambda: tool)
+    tool.reset_call_counts()
+
+    control.open_project(bench["project"])
+
+    assert tool.call_count("Application.OpenProject") == 1
+    assert tool.call_count("Application.ActiveProject") == 1
+    assert tool.call_count() == 2
+
+
+def test_injected_failures_fail_the_next_calls_only(bench, tool, simulator_config):
+    control = ToolOneControl(window_visible=False, dispatch=lambda: tool)
+    control.open_project(bench["project"])
+    simulator_config.fail("Project.Save")
+
+    with pytest.raises(SimulatedComError):
+        control.save_project()
+    control.save_project()
+
+    assert tool.call_count("Project.Save") == 2
+
+
+def test_benchmark_round_trips_are_stable_and_checked_against_the_baseline(tmp_path):
+    results_path = str(tmp_path / "results.json")
+    arguments = ["set_signals_to_record", "--signals", "200", "--repeat", "2"]
+
+    assert main(arguments + ["--json", results_path]) == 0
+    with open(results_path) as results_file:
+        results = json.load(results_file)
+    assert main(arguments + ["--bulk-signal-api", "--baseline", results_path, "--tolerance", "100"]) == 0
+
+    com_calls = results["set_signals_to_record"]["com_calls"]
+    assert com_calls > 200
+    assert compare_with_baseline(results, results, 0.0) == []
+    baseline = {"set_signals_to_record": dict(results["set_signals_to_record"], com_calls=com_calls - 1)}
+    assert compare_with_baseline(results, baseline, 100.0) == [
+        "set_signals_to_record: {} COM round-trips, baseline {}".format(com_calls, com_calls - 1)]
@@ -0,0 +1,76 @@
+import pytest
+
+from ToolOne_API_control_module import ToolOneControl
+from ToolOne_simulator import SimulatedToolOne
+
+
+@pytest.fixture
+def standby_dispatch(simulator_config):
+    """ SimulatedToolOne backend of the standby, counting the started standbys in standby_dispatch.count """
+    def standby_dispatch():
+        standby_dispatch.count += 1
+        return SimulatedToolOne(simulator_config)
+    standby_dispatch.count = 0
+    return standby_dispatch
+
+
+@pytest.fixture
+def control(dispatch, standby_dispatch):
+    control = ToolOneControl(window_visible=False, dispatch=dispatch, standby=True,
+                             standby_dispatch=standby_dispatch)
+    yield control
+    control.close_ToolOne()
+
+
+def _other_project(bench):
+    project = bench["directory"] / "Other.CDP"
+    project.write_text("project")
+    return str(project)
+
+
+def test_one_standby_per_session(bench, control, standby_dispatch):
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+    control.activate_experiment("Experiment")
+    control._com_thread().submit(lambda: None).result()
+
+    assert standby_dispatch.count == 1
+    assert control._standby_session == (bench["project"], "Experiment")
+
+
+def test_restart_swaps_in_the_standby(bench, control, dispatch, standby_dispatch):
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+
+    control.restart_ToolOne(window_visible=False)
+    control._com_thread().submit(lambda: None).result()
+
+    assert dispatch.count == 1
+    assert standby_dispatch.count == 2
+    assert control.snapshot().project_path == bench["project"]
+    assert control.current_experiment_name() == "Experiment"
+    assert control._standby_session == (bench["project"], "Experiment")
+
+
+def test_project_change_with_the_same_experiment_name_replaces_the_standby(bench, control):
+    other_project = _other_project(bench)
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+
+    control.open_project(other_project)
+    assert control._standby is None
+    control.activate_experiment("Experiment")
+    control.restart_ToolOne(window_visible=False)
+
+    assert control.snapshot().project_path == other_project
+
+
+def test_restart_without_experiment_starts_a_new_ToolOne(bench, control, dispatch, standby_dispatch):
+    control.open_project(bench["project"])
+
+    control.restart_ToolOne(window_visible=False)
+    control._com_thread().submit(lambda: None).result()
+
+    assert standby_dispatch.count == 0
+    assert dispatch.count == 2
+    assert control.snapshot().project_path is None
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+import ToolOne_API_control_module
+import ToolOne_simulator
+from ToolOne_API_control_module import ToolOneControl, ToolOneHangError
+from ToolOne_simulator import SimulatedComError
+
+
+@pytest.fixture
+def hung_save(monkeypatch):
+    """ makes Project.Save hang until the ToolOne process is killed; the kill takes a while, like process.wait() """
+    killed = threading.Event()
+
+    def save(project):
+        killed.wait(5)
+        # the COM call fails as soon as the server process is gone
+        raise SimulatedComError("The RPC server is unavailable")
+
+    def kill_process(pid):
+        killed.set()
+        time.sleep(0.2)
+
+    monkeypatch.setattr(ToolOne_simulator._Project, "Save", save)
+    monkeypatch.setattr(ToolOne_API_control_module, "_kill_process", kill_process)
+    return killed
+
+
+def test_hung_call_is_killed_and_reconnected(bench, dispatch, hung_save):
+    control = ToolOneControl(window_visible=False, dispatch=dispatch, call_timeout=0.1)
+    control.open_project(bench["project"])
+    control.activate_experiment("Experiment")
+    control._process_id = 4242
+
+    with pytest.raises(ToolOneHangError):
+        control.save_project()
+
+    assert hung_save.is_set()
+    assert dispatch.count == 2
+    assert not control._killed
+    assert control.snapshot().project_path == bench["project"]
+    assert control.current_experiment_name() == "Experiment"
+
+
+def test_call_within_the_deadline_is_not_killed(bench, dispatch, hung_save):
+    control = ToolOneControl(window_visible=False, dispatch=dispatch, call_timeout=5.0)
+    control._process_id = 4242
+
+    control.open_project(bench["project"])
+
+    assert not hung_save.is_set()
+    assert dispatch.count == 1
+
+
+def test_hang_without_process_id_passes_the_error_on(bench, dispatch, monkeypatch):
+    monkeypatch.setattr(ToolOne_simulator._Project, "Save", lambda project: time.sleep(0.3))
+    control = ToolOneControl(window_visible=False, dispatch=dispatch, call_timeout=0.1)
+    control.open_project(bench["project"])
+
+    # ToolOne cannot be killed, the slow call completes normally
+    control.save_project()
+
+    assert dispatch.count == 1